@@ -0,0 +1,112 @@
+"""
+Compares converting raw Google API payloads into models one item at a time with the bulk converters.
+
+Run from the project root:
+
+    python -m benchmarks.conversion_benchmark [--count 10000] [--repeat 5] [--json]
+
+"before" is the per-item conversion the tools used to do (a CalendarEvent
+built and validated per event; three header scans and a strptime per
+message); "after" is productivity_assistant.tools.converters. The date
+parser cache is cleared before each timed run, so "after" does not benefit
+from dates parsed in earlier runs.
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from benchmarks import fixtures
+from productivity_assistant.models import CalendarEvent, CalendarEvents, EmailItem, EmailItems
+from productivity_assistant.tools import converters
+
+
+def _calendar_events_before(raw_events: list[dict]) -> CalendarEvents:
+    events = []
+    for event_data in raw_events:
+        organizer = event_data.get('organizer', {})
+        events.append(CalendarEvent(
+            id=event_data.get('id'),
+            name=event_data.get('summary', 'No Title'),
+            status=event_data.get('status'),
+            description=event_data.get('description'),
+            html_link=event_data.get('htmlLink'),
+            created=event_data.get('created'),
+            updated=event_data.get('updated'),
+            organizer_name=organizer.get('displayName', organizer.get('email')),
+            organizer_email=organizer.get('email'),
+            start_time=event_data.get('start', {}).get('dateTime'),
+            end_time=event_data.get('end', {}).get('dateTime'),
+            location=event_data.get('location'),
+            time_zone=event_data.get('start', {}).get('timeZone'),
+            attendees=[{'email': att.get('email'), 'display_name': att.get('displayName'), 'response_status': att.get('responseStatus')}
+                       for att in event_data.get('attendees', [])],
+        ))
+    return CalendarEvents(count=len(events), events=events, next_page_token=None)
+
+
+def _email_items_before(messages: list[dict]) -> EmailItems:
+    items = []
+    for msg_data in messages:
+        headers = msg_data['payload']['headers']
+        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
+        sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
+        date_str = next((h['value'] for h in headers if h['name'] == 'Date'), None)
+        try:
+            date = datetime.strptime(date_str.split(' (')[0].strip(), '%a, %d %b %Y %H:%M:%S %z')
+        except ValueError:
+            date = datetime.now()
+        items.append(EmailItem(id=msg_data['id'], subject=subject, sender=sender, date=date, body=msg_data.get('snippet', '')))
+    return EmailItems(count=len(items), messages=items)
+
+
+def _best_ms(convert, payload, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(repeat):
+        converters.parse_date_header.cache_clear()
+        started = time.perf_counter()
+        result = convert(payload)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def run(count: int = 10_000, repeat: int = 5) -> list[dict]:
+    scenarios = [
+        ("calendar events", fixtures.raw_calendar_events(count), _calendar_events_before, converters.calendar_events),
+        ("email messages", fixtures.raw_messages(count), _email_items_before, converters.email_items),
+    ]
+    rows = []
+    for name, payload, before, after in scenarios:
+        before_ms, expected = _best_ms(before, payload, repeat)
+        after_ms, actual = _best_ms(after, payload, repeat)
+        if actual.model_dump() != expected.model_dump():
+            raise AssertionError(f"{name}: the converters' output differs from the per-item conversion")
+        rows.append({
+            "payload": name,
+            "items": count,
+            "before_ms": round(before_ms, 1),
+            "after_ms": round(after_ms, 1),
+            "speedup": round(before_ms / after_ms, 2),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10_000, help="events and messages to convert")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per converter; the fastest is reported")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = run(count=args.count, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'payload':<18}{'items':>8}{'before ms':>12}{'after ms':>11}{'speedup':>10}")
+    for row in rows:
+        print(f"{row['payload']:<18}{row['items']:>8}{row['before_ms']:>12}{row['after_ms']:>11}{row['speedup']:>9}x")
+
+
+if __name__ == "__main__":
+    main()
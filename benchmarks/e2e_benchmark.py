@@ -0,0 +1,221 @@
+"""
+End-to-end benchmark of MCPAgent turns against fake Google and Anthropic backends.
+
+Run from the project root:
+
+    python -m benchmarks.e2e_benchmark [--json] [--sessions N] [--turns N]
+        [--google-latency MS] [--llm-latency MS] [--scenario NAME] [--no-stores]
+        [--no-tool-cache] [--fast-path] [--compare BASELINE.json]
+
+Each scenario scripts Claude's side of a turn (which tools it calls, then its
+answer) with benchmarks.fakes.ScriptedAnthropic, while the real MCPAgent,
+tool servers, service pools and local stores run against
+benchmarks.fakes.FakeGoogleHttp. N sessions run their turns concurrently.
+Reported per scenario:
+
+- p50 / p99 turn latency and throughput (turns per second)
+- Claude requests, Google HTTP round trips and requests carried in batches, per turn
+- input / output tokens per turn, estimated from request and response sizes
+- share of tool calls answered by the agent's tool cache
+
+With --fast-path, prompts the agent's intent router recognizes are answered
+without Claude, which shows up as fewer Claude requests per turn.
+
+No credentials or network access are needed. Save --json output from one run
+and pass it to --compare on the next to see the change per scenario.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.fakes import FakeGoogleHttp, ScriptedAnthropic, text, tool_use
+
+SCENARIOS = {
+    "list 50 emails": {
+        "prompt": "Show me my last 50 emails",
+        "script": [
+            [tool_use("list-messages", {"max_results": 50})],
+            [text("Here are your 50 most recent emails, mostly follow-ups from this week's meetings.")],
+        ],
+    },
+    "week agenda": {
+        "prompt": "What does my week look like?",
+        "script": [
+            [tool_use("list-calendar-events", {"max_results": 50})],
+            [text("You have a busy week: project syncs, design reviews and a customer call on Thursday.")],
+        ],
+    },
+    "read email": {
+        "prompt": "Read me the email from Dave",
+        "script": [
+            [tool_use("get-message-body", {"message_id": "m3"})],
+            [text("Dave shared the notes from today's meeting and the action items for next week.")],
+        ],
+    },
+    "multi-tool turn": {
+        "prompt": "Find 30 minutes for a meeting this week and summarize what is in my inbox",
+        "script": [
+            [text("Let me check your calendar and inbox."),
+             tool_use("list-calendar-events", {"max_results": 20}),
+             tool_use("find-free-slots", {"duration_minutes": 30}),
+             tool_use("list-messages", {"max_results": 10})],
+            [tool_use("get-message-body", {"message_id": "m0"})],
+            [text("Tomorrow at 10:00 works. Your inbox is mostly meeting follow-ups; Alice's note lists next week's action items.")],
+        ],
+    },
+}
+
+
+def _environment(workdir: str, stores: bool) -> None:
+    """Points the tool servers at a placeholder client secret and throwaway local stores."""
+    secret = os.path.join(workdir, "client_secret.json")
+    with open(secret, "w") as secret_file:
+        json.dump({"installed": {}}, secret_file)
+    os.environ["GOOGLE_API_CLIENT_SECRET_FILE"] = secret
+    os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    for name, file_name in [("MAILBOX_CACHE_PATH", "mailbox.sqlite3"), ("CALENDAR_CACHE_PATH", "calendar.sqlite3"),
+                            ("MESSAGE_INDEX_PATH", "message_index.sqlite3")]:
+        os.environ[name] = os.path.join(workdir, file_name) if stores else ""
+
+
+async def _agent(google: FakeGoogleHttp, tool_cache: bool, fast_path: bool):
+    from productivity_assistant.mcp_agent import MCPAgent
+    from productivity_assistant.servers import calendar_server, gmail_server
+    from productivity_assistant.tools.google_api_service import build_service
+
+    agent = MCPAgent(tool_cache_entries=None if tool_cache else 0, fast_path=fast_path)
+    await agent.initialize()
+    calendar_server.calendar_tool.create_service_func = lambda *args, **kwargs: build_service("calendar", "v3", http=google)
+    gmail_server.gmail_tool.create_service_func = lambda *args, **kwargs: build_service("gmail", "v1", http=google)
+    return agent
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))]
+
+
+async def run_scenario(agent, google: FakeGoogleHttp, name: str, sessions: int, turns: int, llm_latency: float) -> dict:
+    scenario = SCENARIOS[name]
+    anthropic = ScriptedAnthropic(scenario["script"], latency=llm_latency)
+    agent.client = anthropic.client()
+
+    # One untimed turn builds the service pools and fills the local stores, as a running server would have
+    await agent.chat(scenario["prompt"], session_id="warmup")
+    agent.reset_session("warmup")
+    cache_before = agent.tool_cache.stats()["tools"]
+    google.reset_counts()
+    anthropic.requests = 0
+
+    latencies = []
+
+    async def session(session_id: str):
+        for _ in range(turns):
+            started = time.perf_counter()
+            await agent.chat(scenario["prompt"], session_id=session_id)
+            latencies.append(time.perf_counter() - started)
+
+    session_ids = [f"{name}-{index}" for index in range(sessions)]
+    started = time.perf_counter()
+    await asyncio.gather(*(session(session_id) for session_id in session_ids))
+    elapsed = time.perf_counter() - started
+
+    usage = [turn for session_id in session_ids for turn in agent.sessions[session_id].usage]
+    for session_id in session_ids:
+        agent.reset_session(session_id)
+    total = len(latencies)
+    cache_calls = cache_answered = 0
+    for tool_name, stats in agent.tool_cache.stats()["tools"].items():
+        before = cache_before.get(tool_name, {"hits": 0, "misses": 0, "coalesced": 0})
+        answered = stats["hits"] + stats["coalesced"] - before["hits"] - before["coalesced"]
+        cache_answered += answered
+        cache_calls += answered + stats["misses"] - before["misses"]
+    return {
+        "scenario": name,
+        "sessions": sessions,
+        "turns": total,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "throughput_turns_per_s": round(total / elapsed, 2),
+        "llm_requests_per_turn": round(anthropic.requests / total, 2),
+        "google_http_calls_per_turn": round(sum(google.calls.values()) / total, 2),
+        "google_batched_requests_per_turn": round(sum(google.batched.values()) / total, 2),
+        "input_tokens_per_turn": round(sum(turn.input_tokens for turn in usage) / total),
+        "output_tokens_per_turn": round(sum(turn.output_tokens for turn in usage) / total),
+        "tool_cache_hit_rate": round(cache_answered / cache_calls, 2) if cache_calls else 0.0,
+    }
+
+
+async def run(sessions: int = 8, turns: int = 5, google_latency: float = 0.05, llm_latency: float = 0.2,
+              scenarios: list[str] | None = None, stores: bool = True, tool_cache: bool = True,
+              fast_path: bool = False) -> list[dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        _environment(workdir, stores)
+        google = FakeGoogleHttp(latency=google_latency)
+        agent = await _agent(google, tool_cache, fast_path)
+        return [
+            await run_scenario(agent, google, name, sessions, turns, llm_latency)
+            for name in scenarios or SCENARIOS
+        ]
+
+
+def _compare(rows: list[dict], baseline_path: str) -> None:
+    with open(baseline_path) as baseline_file:
+        baseline = {row["scenario"]: row for row in json.load(baseline_file)}
+    print(f"\nchange vs {baseline_path}")
+    print(f"{'scenario':<18}{'p50':>10}{'p99':>10}{'turns/s':>10}{'http/turn':>11}{'in tok/turn':>13}")
+    for row in rows:
+        before = baseline.get(row["scenario"])
+        if before is None:
+            continue
+
+        def change(key):
+            return f"{(row[key] - before[key]) / before[key] * 100:+.0f}%" if before[key] else "n/a"
+
+        print(f"{row['scenario']:<18}{change('p50_ms'):>10}{change('p99_ms'):>10}{change('throughput_turns_per_s'):>10}"
+              f"{change('google_http_calls_per_turn'):>11}{change('input_tokens_per_turn'):>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=5, help="turns per session")
+    parser.add_argument("--google-latency", type=float, default=50, help="milliseconds per Google HTTP round trip")
+    parser.add_argument("--llm-latency", type=float, default=200, help="milliseconds per Claude response")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="run only this scenario (repeatable)")
+    parser.add_argument("--no-stores", action="store_true", help="disable the local mailbox, calendar and index stores")
+    parser.add_argument("--no-tool-cache", action="store_true", help="disable the agent's cache of tool results")
+    parser.add_argument("--fast-path", action="store_true", help="answer recognized prompts without Claude")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON output of an earlier run to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rows = asyncio.run(run(
+        sessions=args.sessions, turns=args.turns,
+        google_latency=args.google_latency / 1000, llm_latency=args.llm_latency / 1000,
+        scenarios=args.scenario, stores=not args.no_stores, tool_cache=not args.no_tool_cache,
+        fast_path=args.fast_path,
+    ))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'scenario':<18}{'p50 ms':>9}{'p99 ms':>9}{'turns/s':>9}{'llm/turn':>10}{'http/turn':>11}"
+              f"{'batched/turn':>14}{'in tok/turn':>13}{'out tok/turn':>14}{'cache hits':>12}")
+        for row in rows:
+            print(f"{row['scenario']:<18}{row['p50_ms']:>9}{row['p99_ms']:>9}{row['throughput_turns_per_s']:>9}"
+                  f"{row['llm_requests_per_turn']:>10}{row['google_http_calls_per_turn']:>11}"
+                  f"{row['google_batched_requests_per_turn']:>14}{row['input_tokens_per_turn']:>13}{row['output_tokens_per_turn']:>14}"
+                  f"{row['tool_cache_hit_rate']:>12}")
+    if args.compare:
+        _compare(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
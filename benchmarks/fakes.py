@@ -0,0 +1,288 @@
+"""
+In-process stand-ins for Google APIs and the Anthropic Messages API, used by the benchmarks.
+
+FakeGoogleHttp replaces the `httplib2.Http` of googleapiclient services: it
+answers Gmail and Calendar requests (including batch requests) from generated
+data after a configurable latency and counts every HTTP round trip.
+ScriptedAnthropic builds an AsyncAnthropic client whose transport replays a
+scripted sequence of tool_use and text responses as server-sent events.
+"""
+import asyncio
+import base64
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import httpx
+
+from productivity_assistant.history import estimate_tokens
+
+_TOPICS = ["Project Sync", "1:1", "Design Review", "Sprint Planning", "Customer Call", "Lunch", "Interview", "Roadmap"]
+_PEOPLE = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi"]
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+class FakeGoogleHttp:
+    """
+    Thread-safe `httplib2.Http` stand-in serving a generated mailbox and calendar.
+
+    Every HTTP request, a batch request counting once, sleeps for `latency`
+    seconds before it is answered, like a round trip to Google would.
+
+    Args:
+        latency (float): Seconds added to every HTTP request.
+        messages (int): Number of messages in the mailbox.
+        events (int): Number of events spread over the next seven days.
+    """
+
+    def __init__(self, latency: float = 0.05, messages: int = 200, events: int = 60) -> None:
+        self.latency = latency
+        self.message_count = messages
+        self._lock = threading.Lock()
+        self.calls = Counter() # HTTP round trips by API
+        self.batched = Counter() # Requests carried inside batch round trips, by API
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.events = [self._event(i, now + timedelta(hours=2 + i * 168 // max(events, 1))) for i in range(events)]
+        self._next_id = 0
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.batched.clear()
+
+    # httplib2.Http interface used by googleapiclient
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        time.sleep(self.latency)
+        api = "gmail" if "gmail" in uri else "calendar"
+        with self._lock:
+            self.calls[api] += 1
+        if uri.endswith("/batch") or "/batch/" in uri:
+            return self._batch(api, body.decode() if isinstance(body, bytes) else body)
+        status, payload = self._dispatch(method, uri, body)
+        return httplib2.Response({"status": str(status), "content-type": "application/json"}), json.dumps(payload).encode() if payload is not None else b""
+
+    def close(self):
+        pass
+
+    def _batch(self, api: str, body: str):
+        parts = []
+        for part in re.split(r"--=+\d+==|--\S+\r?\n", body):
+            content_id = re.search(r"Content-ID: <(.+?)>", part)
+            if not content_id:
+                continue
+            inner = re.split(r"\r?\n\r?\n", part, maxsplit=1)[1]
+            request_line, _, rest = inner.partition("\n")
+            method, path = request_line.split()[:2]
+            inner_body = re.split(r"\r?\n\r?\n", rest, maxsplit=1)[1].strip() if re.search(r"\r?\n\r?\n", rest) else ""
+            status, payload = self._dispatch(method, "https://www.googleapis.com" + path, inner_body or None)
+            parts.append(
+                f"--batch_boundary\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id.group(1)}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload) if payload is not None else ''}\r\n"
+            )
+        with self._lock:
+            self.batched[api] += len(parts)
+        content = ("".join(parts) + "--batch_boundary--").encode()
+        return httplib2.Response({"status": "200", "content-type": "multipart/mixed; boundary=batch_boundary"}), content
+
+    def _dispatch(self, method: str, uri: str, body):
+        url = urlparse(uri)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path
+        if isinstance(body, (bytes, bytearray)):
+            body = body.decode()
+        data = json.loads(body) if body else None
+
+        if "/gmail/v1/users/me/" in path:
+            return self._gmail(method, path.split("/gmail/v1/users/me/", 1)[1], query)
+        if path.endswith("/freeBusy"):
+            return self._freebusy(data)
+        if "/calendars/primary/events" in path:
+            return self._calendar(method, path.split("/calendars/primary/events", 1)[1].strip("/"), query, data)
+        return 404, {"error": {"code": 404, "message": f"No fake for {method} {path}"}}
+
+    # Gmail
+    def _message(self, index: int, fmt: str) -> dict:
+        name = _PEOPLE[index % len(_PEOPLE)]
+        sent = datetime.now(timezone.utc) - timedelta(minutes=37 * index)
+        message = {
+            "id": f"m{index}",
+            "threadId": f"t{index}",
+            "labelIds": ["INBOX"],
+            "snippet": "Hi team, thanks for joining today. As discussed, the notes and action items for next week are below.",
+            "internalDate": str(int(sent.timestamp() * 1000)),
+        }
+        headers = [
+            {"name": "Subject", "value": f"Re: {_TOPICS[index % len(_TOPICS)]} follow-up"},
+            {"name": "From", "value": f"{name.title()} <{name}@example.com>"},
+            {"name": "Date", "value": sent.strftime("%a, %d %b %Y %H:%M:%S +0000")},
+        ]
+        if fmt == "full":
+            text = "Hi team,\n\n" + "Here are the notes from today's meeting and the action items for next week.\n" * 20
+            message["payload"] = {"mimeType": "multipart/alternative", "headers": headers, "parts": [
+                {"mimeType": "text/plain", "body": {"data": _b64(text)}},
+                {"mimeType": "text/html", "body": {"data": _b64(f"<p>{text}</p>")}},
+            ]}
+        else:
+            message["payload"] = {"headers": headers}
+        return message
+
+    def _gmail(self, method: str, path: str, query: dict):
+        if path == "profile":
+            return 200, {"emailAddress": "me@example.com", "historyId": "1000"}
+        if path == "history":
+            return 200, {"historyId": "1000"}
+        if path == "messages":
+            size = min(int(query.get("maxResults", 100)), self.message_count)
+            page = {"messages": [{"id": f"m{i}", "threadId": f"t{i}"} for i in range(size)], "resultSizeEstimate": self.message_count}
+            if size < self.message_count:
+                page["nextPageToken"] = str(size)
+            return 200, page
+        if path.startswith("messages/"):
+            index = int(path.split("/", 1)[1].lstrip("m") or 0)
+            if index >= self.message_count:
+                return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+            return 200, self._message(index, query.get("format", "full"))
+        return 404, {"error": {"code": 404, "message": f"No fake for Gmail {path}"}}
+
+    # Calendar
+    def _event(self, index: int, start: datetime) -> dict:
+        attendees = [{"email": f"{name}@example.com", "responseStatus": "accepted"} for name in _PEOPLE[:index % 5]]
+        return {
+            "id": f"e{index}",
+            "status": "confirmed",
+            "summary": _TOPICS[index % len(_TOPICS)],
+            "description": "Agenda:\n- status updates\n- open questions\n- next steps" if index % 3 else None,
+            "htmlLink": f"https://www.google.com/calendar/event?eid=e{index}",
+            "created": "2025-11-20T17:04:11.000Z",
+            "updated": "2025-11-21T09:30:52.118Z",
+            "organizer": {"email": "me@example.com"},
+            "start": {"dateTime": start.isoformat(), "timeZone": "UTC"},
+            "end": {"dateTime": (start + timedelta(minutes=45)).isoformat(), "timeZone": "UTC"},
+            "attendees": attendees,
+        }
+
+    def _calendar(self, method: str, event_id: str, query: dict, data):
+        if method == "POST" and not event_id:
+            with self._lock:
+                self._next_id += 1
+                created = dict(data, id=f"new{self._next_id}", status="confirmed", htmlLink="https://example.com",
+                               created="2025-11-20T17:04:11.000Z", updated="2025-11-20T17:04:11.000Z",
+                               organizer={"email": "me@example.com"})
+            return 200, created
+        if method == "DELETE":
+            return 204, None
+        if method in ("GET", "PATCH") and event_id:
+            event = next((event for event in self.events if event["id"] == event_id), None)
+            return (200, dict(event, **(data or {}))) if event else (404, {"error": {"code": 404, "message": "Not Found"}})
+
+        events = self.events
+        if "timeMin" in query:
+            low, high = query["timeMin"].replace("Z", "+00:00"), query.get("timeMax", "9999").replace("Z", "+00:00")
+            events = [event for event in events
+                      if datetime.fromisoformat(event["end"]["dateTime"]) > datetime.fromisoformat(low)
+                      and ("timeMax" not in query or datetime.fromisoformat(event["start"]["dateTime"]) < datetime.fromisoformat(high))]
+        if "q" in query:
+            events = [event for event in events if query["q"].lower() in event["summary"].lower()]
+        start = int(query.get("pageToken") or 0)
+        size = int(query.get("maxResults", 250))
+        page = {"items": events[start:start + size]}
+        if start + size < len(events):
+            page["nextPageToken"] = str(start + size)
+        else:
+            page["nextSyncToken"] = "sync-1"
+        return 200, page
+
+    def _freebusy(self, data: dict):
+        busy = [{"start": event["start"]["dateTime"], "end": event["end"]["dateTime"]} for event in self.events]
+        return 200, {"calendars": {item["id"]: {"busy": busy[i::len(data["items"])]} for i, item in enumerate(data["items"])}}
+
+
+def text(value: str) -> dict:
+    return {"type": "text", "text": value}
+
+
+def tool_use(name: str, tool_input: dict) -> dict:
+    return {"type": "tool_use", "name": name, "input": tool_input}
+
+
+def _sse(blocks: list[dict], input_tokens: int) -> bytes:
+    stop_reason = "tool_use" if any(block["type"] == "tool_use" for block in blocks) else "end_turn"
+    events = [{"type": "message_start", "message": {
+        "id": "msg_bench", "type": "message", "role": "assistant", "model": "claude-sonnet-4-20250514", "content": [],
+        "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+    }}]
+    output_tokens = 0
+    for index, block in enumerate(blocks):
+        if block["type"] == "text":
+            events.append({"type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}})
+            for word in block["text"].split(" "):
+                events.append({"type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": word + " "}})
+            output_tokens += estimate_tokens(block["text"])
+        else:
+            events.append({"type": "content_block_start", "index": index, "content_block": {
+                "type": "tool_use", "id": block["id"], "name": block["name"], "input": {}}})
+            events.append({"type": "content_block_delta", "index": index, "delta": {
+                "type": "input_json_delta", "partial_json": json.dumps(block["input"])}})
+            output_tokens += estimate_tokens(block["input"]) + 10
+        events.append({"type": "content_block_stop", "index": index})
+    events.append({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                   "usage": {"output_tokens": output_tokens}})
+    events.append({"type": "message_stop"})
+    return "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events).encode()
+
+
+class ScriptedAnthropic:
+    """
+    Fake Messages API replaying a script of assistant responses for every user turn.
+
+    `script` lists the responses of one turn, each a list of content blocks
+    built with `text()` and `tool_use()`; every response but the last should
+    use tools. Which response to send is derived from the request itself (the
+    number of tool-result rounds since the last user message), so any number
+    of sessions can run concurrently. Input tokens are estimated from the
+    request size; prompt caching is not simulated.
+
+    Args:
+        script (list): The responses of one turn, in order.
+        latency (float): Seconds before each response is returned.
+    """
+
+    def __init__(self, script: list[list[dict]], latency: float = 0.2) -> None:
+        self.script = script
+        self.latency = latency
+        self.requests = 0
+
+    def client(self):
+        from anthropic import AsyncAnthropic
+
+        transport = httpx.MockTransport(self._handle)
+        return AsyncAnthropic(api_key="benchmark", http_client=httpx.AsyncClient(transport=transport), max_retries=0)
+
+    def _step(self, messages: list[dict]) -> int:
+        step = 0
+        for message in reversed(messages):
+            content = message["content"]
+            if message["role"] == "user" and not (isinstance(content, list) and content and content[0].get("type") == "tool_result"):
+                break
+            if message["role"] == "assistant":
+                step += 1
+        return min(step, len(self.script) - 1)
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        step = self._step(body["messages"])
+        blocks = [dict(block, id=f"toolu_{step}_{index}") if block["type"] == "tool_use" else block
+                  for index, block in enumerate(self.script[step])]
+        content = _sse(blocks, estimate_tokens(request.content.decode()))
+
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=content)
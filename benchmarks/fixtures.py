@@ -0,0 +1,132 @@
+"""Representative tool payloads shared by the benchmarks."""
+import random
+from datetime import datetime, timedelta, timezone
+
+from productivity_assistant.models import Attendee, CalendarEvent, CalendarEvents, EmailItem, EmailItems, MessageBody
+
+_TOPICS = ["Project Sync", "1:1", "Design Review", "Sprint Planning", "Customer Call", "Lunch", "Interview",
+           "Roadmap", "Standup", "Retro", "Budget Review", "Offsite Prep"]
+_PEOPLE = ["alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi", "ivan", "judy"]
+
+
+def calendar_events(count: int = 50, seed: int = 7) -> CalendarEvents:
+    """A week of busy calendar: descriptions, locations and attendee lists on most events."""
+    rng = random.Random(seed)
+    start = datetime(2025, 12, 1, 8, tzinfo=timezone(timedelta(hours=-8)))
+    events = []
+    for i in range(count):
+        begin = start + timedelta(hours=rng.randint(0, 24 * 7))
+        attendees = [
+            Attendee(email=f"{name}@example.com", display_name=name.title() if rng.random() < 0.5 else None,
+                     response_status=rng.choice(["accepted", "needsAction", "tentative", "declined"]))
+            for name in rng.sample(_PEOPLE, rng.randint(0, 8))
+        ]
+        events.append(CalendarEvent(
+            id=f"{rng.getrandbits(80):020x}",
+            name=rng.choice(_TOPICS),
+            status="confirmed",
+            description=("Agenda:\n- status updates\n- open questions\n- next steps" if rng.random() < 0.6 else None),
+            html_link=f"https://www.google.com/calendar/event?eid={rng.getrandbits(160):040x}",
+            created="2025-11-20T17:04:11.000Z",
+            updated="2025-11-21T09:30:52.118Z",
+            organizer_name="Aadit Shah",
+            organizer_email="aadit@example.com",
+            start_time=begin.isoformat(),
+            end_time=(begin + timedelta(minutes=rng.choice([30, 45, 60]))).isoformat(),
+            location=(rng.choice(["Room 4B", "https://meet.google.com/abc-defg-hij"]) if rng.random() < 0.5 else None),
+            time_zone="America/Los_Angeles",
+            attendees=attendees,
+        ))
+    return CalendarEvents(count=len(events), events=events, next_page_token=None)
+
+
+def email_items(count: int = 50, seed: int = 11) -> EmailItems:
+    """A page of inbox metadata with Gmail-sized snippets."""
+    rng = random.Random(seed)
+    now = datetime(2025, 12, 1, 9, tzinfo=timezone.utc)
+    messages = [
+        EmailItem(
+            id=f"{rng.getrandbits(64):016x}",
+            subject=f"Re: {rng.choice(_TOPICS)} follow-up",
+            sender=f"{(name := rng.choice(_PEOPLE)).title()} <{name}@example.com>",
+            date=now - timedelta(minutes=37 * i),
+            body=("Hi team, thanks for joining today. As discussed, I am attaching the notes and the action items "
+                  "for next week. Please review before Thursday so we can"),
+        )
+        for i in range(count)
+    ]
+    return EmailItems(count=len(messages), messages=messages)
+
+
+def raw_calendar_events(count: int = 250, seed: int = 5) -> list[dict]:
+    """Events as the Calendar API returns them from events.list, with a mix of attendee list sizes."""
+    rng = random.Random(seed)
+    start = datetime(2025, 12, 1, 8, tzinfo=timezone(timedelta(hours=-8)))
+    events = []
+    for i in range(count):
+        begin = start + timedelta(minutes=30 * rng.randint(0, 48 * 30))
+        event = {
+            "kind": "calendar#event",
+            "etag": f'"{rng.getrandbits(48)}"',
+            "id": f"{rng.getrandbits(80):020x}",
+            "status": "confirmed",
+            "htmlLink": f"https://www.google.com/calendar/event?eid={rng.getrandbits(160):040x}",
+            "created": "2025-11-20T17:04:11.000Z",
+            "updated": "2025-11-21T09:30:52.118Z",
+            "summary": rng.choice(_TOPICS),
+            "creator": {"email": "aadit@example.com", "self": True},
+            "organizer": {"email": "aadit@example.com", "displayName": "Aadit Shah", "self": True},
+            "start": {"dateTime": begin.isoformat(), "timeZone": "America/Los_Angeles"},
+            "end": {"dateTime": (begin + timedelta(minutes=rng.choice([30, 45, 60]))).isoformat(), "timeZone": "America/Los_Angeles"},
+            "iCalUID": f"{rng.getrandbits(64):016x}@google.com",
+            "sequence": 0,
+            "reminders": {"useDefault": True},
+            "eventType": "default",
+        }
+        if rng.random() < 0.6:
+            event["description"] = "Agenda:\n- status updates\n- open questions\n- next steps"
+        if rng.random() < 0.5:
+            event["location"] = rng.choice(["Room 4B", "https://meet.google.com/abc-defg-hij"])
+        attendees = []
+        for name in rng.sample(_PEOPLE, rng.randint(0, 8)):
+            attendee = {"email": f"{name}@example.com", "responseStatus": rng.choice(["accepted", "needsAction", "tentative", "declined"])}
+            if rng.random() < 0.5:
+                attendee["displayName"] = name.title()
+            attendees.append(attendee)
+        if attendees:
+            event["attendees"] = attendees
+        events.append(event)
+    return events
+
+
+def raw_messages(count: int = 100, seed: int = 13) -> list[dict]:
+    """Messages as Gmail returns them from messages.get with format='metadata'."""
+    rng = random.Random(seed)
+    now = datetime(2025, 12, 1, 9, tzinfo=timezone.utc)
+    messages = []
+    for i in range(count):
+        name = rng.choice(_PEOPLE)
+        sent = now - timedelta(minutes=37 * i)
+        date = sent.strftime("%a, %d %b %Y %H:%M:%S +0000") + (" (UTC)" if rng.random() < 0.3 else "")
+        messages.append({
+            "id": f"{rng.getrandbits(64):016x}",
+            "threadId": f"{rng.getrandbits(64):016x}",
+            "labelIds": ["INBOX", "UNREAD"],
+            "snippet": "Hi team, thanks for joining today. As discussed, the notes and action items for next week are below.",
+            "internalDate": str(int(sent.timestamp() * 1000)),
+            # Only the metadataHeaders GmailTool asks for, in the order they appear in the message
+            "payload": {"headers": [
+                {"name": "Date", "value": date},
+                {"name": "From", "value": f"{name.title()} <{name}@example.com>"},
+                {"name": "Subject", "value": f"Re: {rng.choice(_TOPICS)} follow-up"},
+            ]},
+            "sizeEstimate": rng.randint(2_000, 60_000),
+        })
+    return messages
+
+
+def message_body(paragraphs: int = 150) -> MessageBody:
+    """A long newsletter-style plain text body."""
+    paragraph = ("This week in engineering: the platform team shipped the new deploy pipeline, "
+                 "the data team migrated the warehouse, and the on-call rotation changes next Monday.\n\n")
+    return MessageBody(status="success", body=paragraph * paragraphs)
@@ -0,0 +1,87 @@
+"""
+Compares the size of tool results sent to Claude before and after compact serialization.
+
+Run from the project root:
+
+    python -m benchmarks.serialization_benchmark [--json] [--count-tokens]
+
+Token counts are estimated from the encoded size; with --count-tokens (and
+ANTHROPIC_API_KEY set) they are measured with the Messages count_tokens API.
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks import fixtures
+from productivity_assistant.history import estimate_tokens
+from productivity_assistant.serialization import encode_tool_result
+
+SCENARIOS = [
+    ("list-calendar-events", lambda: fixtures.calendar_events(50)),
+    ("search-calendar-events", lambda: fixtures.calendar_events(10, seed=3)),
+    ("list-messages", lambda: fixtures.email_items(50)),
+    ("get-message-body", lambda: fixtures.message_body()),
+]
+
+
+def _token_counter(exact: bool):
+    if not exact:
+        return estimate_tokens
+
+    from anthropic import Anthropic
+    client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+    def count(text: str) -> int:
+        return client.messages.count_tokens(
+            model="claude-sonnet-4-20250514",
+            messages=[{"role": "user", "content": text}],
+        ).input_tokens
+
+    return count
+
+
+def run(exact_tokens: bool = False) -> list[dict]:
+    count_tokens = _token_counter(exact_tokens)
+    rows = []
+    for tool_name, build in SCENARIOS:
+        result = build()
+        before = result.model_dump_json(indent=2)
+
+        started = time.perf_counter()
+        after = encode_tool_result(tool_name, result)
+        encode_ms = (time.perf_counter() - started) * 1000
+
+        rows.append({
+            "tool": tool_name,
+            "bytes_before": len(before.encode()),
+            "bytes_after": len(after.encode()),
+            "tokens_before": count_tokens(before),
+            "tokens_after": count_tokens(after),
+            "encode_ms": round(encode_ms, 3),
+            "truncated": '"truncated"' in after or "characters truncated]" in after,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--count-tokens", action="store_true", help="measure tokens with the Anthropic API")
+    args = parser.parse_args()
+
+    rows = run(exact_tokens=args.count_tokens)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'tool':<24}{'bytes before':>14}{'bytes after':>13}{'tokens before':>15}{'tokens after':>14}{'saved':>8}{'ms':>8}")
+    for row in rows:
+        saved = 1 - row["tokens_after"] / row["tokens_before"]
+        marker = " (capped)" if row["truncated"] else ""
+        print(f"{row['tool']:<24}{row['bytes_before']:>14}{row['bytes_after']:>13}{row['tokens_before']:>15}"
+              f"{row['tokens_after']:>14}{saved:>8.0%}{row['encode_ms']:>8.2f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
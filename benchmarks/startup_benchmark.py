@@ -0,0 +1,137 @@
+"""
+Measures how long a fresh worker takes before it can serve its first request.
+
+Run from the project root:
+
+    python -m benchmarks.startup_benchmark [--json] [--repeat N] [--network]
+
+Every stage runs in a new interpreter so module imports are cold. Stages:
+
+- agent import: importing productivity_assistant.mcp_agent
+- tool registration: MCPAgent.initialize(), which imports both FastMCP servers
+- discovery (bundled): building the Gmail and Calendar services from the
+  discovery documents shipped with google-api-python-client
+- discovery (network): the same with static_discovery=False, as done before;
+  only with --network
+- gradio import / app import: the UI framework and the full main module
+
+No Google or Anthropic credentials are needed; a placeholder client secret is used.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+STAGES = {
+    "agent import": """
+import productivity_assistant.mcp_agent
+""",
+    "tool registration": """
+import asyncio
+from productivity_assistant.mcp_agent import MCPAgent
+agent = MCPAgent()
+started = time.perf_counter()
+asyncio.run(agent.initialize())
+""",
+    "discovery (bundled)": """
+import httplib2
+from productivity_assistant.tools.google_api_service import build_service
+started = time.perf_counter()
+build_service('gmail', 'v1', http=httplib2.Http())
+build_service('calendar', 'v3', http=httplib2.Http())
+""",
+    "gradio import": """
+import gradio
+""",
+    "app import": """
+import productivity_assistant.main
+""",
+}
+
+NETWORK_STAGES = {
+    "discovery (network)": """
+import httplib2
+from googleapiclient.discovery import build
+started = time.perf_counter()
+build('gmail', 'v1', http=httplib2.Http(), static_discovery=False)
+build('calendar', 'v3', http=httplib2.Http(), static_discovery=False)
+""",
+}
+
+# Wraps a stage: `started` may be reset by the stage to exclude its own setup imports
+_TEMPLATE = """
+import time, json
+started = time.perf_counter()
+{body}
+print(json.dumps(time.perf_counter() - started))
+"""
+
+
+def _environment(workdir: str) -> dict:
+    env = dict(os.environ)
+    secret = os.path.join(workdir, "client_secret.json")
+    with open(secret, "w") as secret_file:
+        json.dump({"installed": {}}, secret_file)
+    env.setdefault("GOOGLE_API_CLIENT_SECRET_FILE", secret)
+    env.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    env["MAILBOX_CACHE_PATH"] = os.path.join(workdir, "mailbox.sqlite3")
+    env["CALENDAR_CACHE_PATH"] = os.path.join(workdir, "calendar.sqlite3")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def measure(body: str, env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", _TEMPLATE.format(body=body)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat: int = 3, network: bool = False) -> list[dict]:
+    stages = dict(STAGES, **(NETWORK_STAGES if network else {}))
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = _environment(workdir)
+        for name, body in stages.items():
+            try:
+                samples = [measure(body, env) for _ in range(repeat)]
+            except subprocess.CalledProcessError as e:
+                rows.append({"stage": name, "error": e.stderr.strip().splitlines()[-1]})
+                continue
+            rows.append({
+                "stage": name,
+                "median_ms": round(statistics.median(samples) * 1000, 1),
+                "min_ms": round(min(samples) * 1000, 1),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts measured per stage")
+    parser.add_argument("--network", action="store_true", help="also time network discovery (the old path)")
+    args = parser.parse_args()
+
+    rows = run(repeat=args.repeat, network=args.network)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'stage':<24}{'median ms':>12}{'min ms':>10}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['stage']:<24}  failed: {row['error']}")
+            continue
+        print(f"{row['stage']:<24}{row['median_ms']:>12}{row['min_ms']:>10}")
+    by_stage = {row["stage"]: row.get("median_ms", 0) for row in rows}
+    ready = by_stage["agent import"] + by_stage["tool registration"] + by_stage["discovery (bundled)"]
+    print(f"\nagent ready for its first tool call ≈ {ready:.0f} ms (excluding the Gradio UI import)")
+
+
+if __name__ == "__main__":
+    main()
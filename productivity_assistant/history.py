@@ -0,0 +1,148 @@
+import json
+import logging
+from typing import List, Dict, Any
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Rough number of characters per token, used to estimate history size without an API call
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(value: Any) -> int:
+    """Estimate the token count of a message, content block or string."""
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TurnUsage(BaseModel):
+    """Token usage of one user turn, summed over all Claude requests it made."""
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    history_tokens: int = 0
+
+
+class ConversationHistory:
+    """Message history of one chat session, kept within a token budget.
+
+    Tool results from earlier turns are shrunk to a short preview, and once the
+    estimated size of the history exceeds ``token_budget`` the oldest turns are
+    folded into a compact summary that is sent as part of the system prompt.
+    The most recent ``keep_recent_turns`` turns are never compacted.
+    """
+
+    def __init__(self, token_budget: int = 20000, keep_recent_turns: int = 2, tool_result_preview: int = 300,
+                 max_summary_lines: int = 20):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.tool_result_preview = tool_result_preview
+        self.max_summary_lines = max_summary_lines
+
+        self.messages: List[Dict[str, Any]] = []
+        self.summary: List[str] = []
+        self.usage: List[TurnUsage] = []
+        self._turn_starts: List[int] = []
+
+    def start_turn(self, user_message: str):
+        """Begin a new user turn, compacting older turns first."""
+        self._shrink_tool_results()
+        self.messages.append({"role": "user", "content": user_message})
+        self._turn_starts.append(len(self.messages) - 1)
+        self.usage.append(TurnUsage())
+        self._compact()
+
+    def add_assistant(self, content: List[Dict[str, Any]]):
+        self.messages.append({"role": "assistant", "content": content})
+
+    def add_tool_results(self, tool_results: List[Dict[str, Any]]):
+        self.messages.append({"role": "user", "content": tool_results})
+
+    def record_usage(self, usage):
+        """Add the usage of one Claude response to the current turn."""
+        turn = self.usage[-1]
+        turn.requests += 1
+        turn.input_tokens += usage.input_tokens
+        turn.output_tokens += usage.output_tokens
+        turn.cache_creation_input_tokens += usage.cache_creation_input_tokens or 0
+        turn.cache_read_input_tokens += usage.cache_read_input_tokens or 0
+
+    def end_turn(self) -> TurnUsage:
+        """Finish the current turn and report its token usage."""
+        turn = self.usage[-1]
+        turn.history_tokens = self.estimate_tokens()
+        logger.info(f"📊 Turn usage: {turn.requests} requests, {turn.input_tokens} input / "
+                    f"{turn.output_tokens} output tokens, cache {turn.cache_read_input_tokens} read / "
+                    f"{turn.cache_creation_input_tokens} written, history ≈ {turn.history_tokens} tokens")
+        return turn
+
+    def system_prompt(self, current_date: str) -> str:
+        """System prompt carrying the date and the summary of compacted turns."""
+        prompt = f"Current date is {current_date}."
+        if self.summary:
+            prompt += "\n\nSummary of the earlier conversation:\n" + "\n".join(self.summary)
+        return prompt
+
+    def estimate_tokens(self) -> int:
+        return estimate_tokens(self.messages) + estimate_tokens(self.summary)
+
+    def for_request(self) -> List[Dict[str, Any]]:
+        """Messages as sent to the Messages API, without bookkeeping fields."""
+        return [
+            {
+                "role": message["role"],
+                "content": [
+                    {key: value for key, value in block.items() if not key.startswith("_")}
+                    for block in message["content"]
+                ] if isinstance(message["content"], list) else message["content"],
+            }
+            for message in self.messages
+        ]
+
+    def _shrink_tool_results(self):
+        """Replace full tool results of finished turns with a short preview."""
+        tool_names = {}
+        for message in self.messages:
+            if not isinstance(message["content"], list):
+                continue
+            for block in message["content"]:
+                if block.get("type") == "tool_use":
+                    tool_names[block["id"]] = block["name"]
+                elif block.get("type") == "tool_result" and not block.get("_shrunk"):
+                    content = block["content"]
+                    if len(content) > self.tool_result_preview:
+                        tool = tool_names.get(block["tool_use_id"], "the tool")
+                        block["content"] = (f"{content[:self.tool_result_preview]}… [{len(content) - self.tool_result_preview} "
+                                            f"more characters omitted; call {tool} again if the details are needed]")
+                    block["_shrunk"] = True
+
+    def _compact(self):
+        """Fold the oldest turns into the summary until the history fits the budget."""
+        while self.estimate_tokens() > self.token_budget and len(self._turn_starts) > max(self.keep_recent_turns, 1):
+            end = self._turn_starts[1]
+            self.summary.append(self._summarize(self.messages[:end]))
+            del self.messages[:end]
+            self._turn_starts = [start - end for start in self._turn_starts[1:]]
+            logger.info(f"🗜️ Compacted oldest turn, history ≈ {self.estimate_tokens()} tokens")
+        del self.summary[:-self.max_summary_lines]
+
+    @staticmethod
+    def _summarize(turn: List[Dict[str, Any]]) -> str:
+        """One line describing a turn: the user's request, tools used and the final answer."""
+        request = turn[0]["content"]
+        tools, answer = [], ""
+        for message in turn[1:]:
+            if message["role"] != "assistant":
+                continue
+            for block in message["content"]:
+                if block.get("type") == "tool_use":
+                    tools.append(block["name"])
+                elif block.get("type") == "text":
+                    answer = block["text"]
+        line = f"- User: {request[:200]}"
+        if tools:
+            line += f" | Tools: {', '.join(dict.fromkeys(tools))}"
+        return line + f" | Assistant: {answer[:300]}"
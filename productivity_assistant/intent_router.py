@@ -0,0 +1,189 @@
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+NUMBER_WORDS = {
+    "a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twenty": 20,
+}
+DEFAULT_EMAIL_COUNT = 5 # Emails listed for "show my latest emails" without a number
+MAX_EMAIL_COUNT = 50 # Larger requests are left to the agent, which can page and summarize
+MAX_EVENTS = 50 # Events listed for one day or week
+
+# Courtesy words, emoji and punctuation around a request that do not change its meaning
+_NOISE = re.compile(r"^[^\w]+|[\s?.!]+$|\b(?:please|pls|can you|could you)\b\s*", re.IGNORECASE)
+_NUMBER = r"\d+|" + "|".join(NUMBER_WORDS)
+_EMAILS = re.compile(
+    r"^(?:(?:check|show|list|get|fetch|give|read)(?: me)?|what are)?\s*(?:my|the)?\s*"
+    r"(?:(?P<count>" + _NUMBER + r")\s+)?(?:last|latest|recent|newest|most recent)\s+(?:(?P<count_after>" + _NUMBER + r")\s+)?"
+    r"(?P<noun>e-?mails?|messages?|mails?)(?: in my inbox)?$",
+    re.IGNORECASE,
+)
+_CALENDAR = re.compile(
+    r"^(?:(?:what(?:'s| is)|show(?: me)?|list|check|get|what do i have)\s*)?"
+    r"(?:on\s+)?(?:my\s+)?(?:calendar|schedule|agenda|events|meetings)?\s*"
+    r"(?:for\s+|on\s+)?(?P<when>today|tomorrow|this week)$",
+    re.IGNORECASE,
+)
+# At least one of these must appear, so that e.g. "what's on today" is not read as a calendar request
+_CALENDAR_WORDS = re.compile(r"\b(?:calendar|schedule|agenda|events|meetings|what do i have)\b", re.IGNORECASE)
+
+
+class Intent(NamedTuple):
+    """A request the fast path can answer: the tool to call, its arguments, and what to call the result."""
+    name: str
+    tool: str
+    arguments: Dict[str, Any]
+    label: str
+
+
+def _count(word: Optional[str], noun: str) -> int:
+    if not word:
+        return DEFAULT_EMAIL_COUNT if noun.lower().endswith("s") else 1
+    return int(word) if word.isdigit() else NUMBER_WORDS[word.lower()]
+
+
+def parse_intent(message: str, now: Optional[datetime] = None) -> Optional[Intent]:
+    """
+    Recognizes the most common requests with anchored patterns.
+
+    Only requests that consist of nothing but a recognized intent match; any
+    extra condition ("from Dave", "about the launch", "and reply") makes the
+    request ambiguous and returns None, leaving it to the full agent.
+
+    Args:
+        message (str): The user's message.
+        now (datetime): Current time with a timezone; defaults to the local time.
+
+    Returns:
+        Intent: The recognized intent, or None.
+    """
+    text = _NOISE.sub("", message.strip()).strip()
+
+    match = _EMAILS.match(text)
+    if match:
+        if match.group("count") and match.group("count_after"):
+            return None
+        count = _count(match.group("count") or match.group("count_after"), match.group("noun"))
+        if not 0 < count <= MAX_EMAIL_COUNT:
+            return None
+        return Intent("recent_emails", "list-messages", {"max_results": count}, f"last {count} emails" if count > 1 else "latest email")
+
+    match = _CALENDAR.match(text)
+    if match and _CALENDAR_WORDS.search(text):
+        now = now or datetime.now().astimezone()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        when = match.group("when").lower()
+        if when == "today":
+            start, end = now, midnight + timedelta(days=1)
+        elif when == "tomorrow":
+            start, end = midnight + timedelta(days=1), midnight + timedelta(days=2)
+        else:
+            start, end = now, midnight + timedelta(days=7 - now.weekday()) # Until the end of Sunday
+        arguments = {"max_results": MAX_EVENTS, "time_min": start.isoformat(), "time_max": end.isoformat()}
+        return Intent(f"calendar_{when.replace(' ', '_')}", "list-calendar-events", arguments, when)
+
+    return None
+
+
+def _format_time(value: Optional[str], pattern: str) -> str:
+    if not value:
+        return "All day"
+    try:
+        return datetime.fromisoformat(value).strftime(pattern)
+    except ValueError:
+        return value
+
+
+def render_emails(data: Dict[str, Any], intent: Intent) -> str:
+    """Answer for a recent_emails intent from the list-messages result data."""
+    messages: List[Dict[str, Any]] = data.get("messages", [])
+    if not messages:
+        return "Your inbox has no emails."
+    lines = [f"Here are your {intent.label}:" if len(messages) > 1 else "Here is your latest email:", ""]
+    for number, message in enumerate(messages, 1):
+        date = _format_time(message.get("date"), "%b %d, %H:%M")
+        lines.append(f"{number}. **{message.get('subject') or 'No Subject'}** — {message.get('sender', 'Unknown Sender')} · {date}")
+        if message.get("body"):
+            lines.append(f"   {message['body']}")
+    return "\n".join(lines)
+
+
+def render_events(data: Dict[str, Any], intent: Intent) -> str:
+    """Answer for a calendar intent from the list-calendar-events result data."""
+    events: List[Dict[str, Any]] = data.get("events", [])
+    if not events:
+        return f"You have nothing on your calendar {intent.label}."
+    week = intent.label == "this week"
+    pattern = "%a %b %d, %H:%M" if week else "%H:%M"
+    noun = "event" if len(events) == 1 else "events"
+    lines = [f"You have {len(events)} {noun} {intent.label}:", ""]
+    for event in events:
+        when = f"{_format_time(event.get('start_time'), pattern)}–{_format_time(event.get('end_time'), '%H:%M')}"
+        line = f"- **{when}** {event.get('name') or '(No title)'}"
+        if event.get("location"):
+            line += f" ({event['location']})"
+        lines.append(line)
+    if len(events) >= MAX_EVENTS:
+        lines.append(f"\nShowing the first {MAX_EVENTS}; ask for a narrower range to see the rest.")
+    return "\n".join(lines)
+
+
+RENDERERS = {
+    "list-messages": render_emails,
+    "list-calendar-events": render_events,
+}
+
+
+class FastPathStats:
+    """
+    Hit counts and latencies of the fast path, compared with full agent turns.
+
+    The latency saved is estimated per answered request as the mean full turn
+    latency minus the mean fast path latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.answered: Dict[str, int] = {}
+        self.fell_back = 0 # Matched, but the tool failed, so the agent answered instead
+        self._fast_ms = 0.0
+        self._agent_turns = 0
+        self._agent_ms = 0.0
+
+    def record_message(self):
+        with self._lock:
+            self.messages += 1
+
+    def record_answer(self, intent: str, elapsed_ms: float):
+        with self._lock:
+            self.answered[intent] = self.answered.get(intent, 0) + 1
+            self._fast_ms += elapsed_ms
+
+    def record_fallback(self):
+        with self._lock:
+            self.fell_back += 1
+
+    def record_agent_turn(self, elapsed_ms: float):
+        with self._lock:
+            self._agent_turns += 1
+            self._agent_ms += elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            answered = sum(self.answered.values())
+            fast_mean = self._fast_ms / answered if answered else None
+            agent_mean = self._agent_ms / self._agent_turns if self._agent_turns else None
+            saved = (agent_mean - fast_mean) * answered if answered and agent_mean is not None else None
+            return {
+                "messages": self.messages,
+                "answered": answered,
+                "hit_rate": round(answered / self.messages, 3) if self.messages else 0.0,
+                "fell_back": self.fell_back,
+                "by_intent": dict(self.answered),
+                "mean_fast_path_ms": round(fast_mean, 1) if fast_mean is not None else None,
+                "mean_agent_turn_ms": round(agent_mean, 1) if agent_mean is not None else None,
+                "estimated_ms_saved": round(saved) if saved is not None else None,
+            }
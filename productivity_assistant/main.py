@@ -1,18 +1,41 @@
+import os
+
 import gradio as gr
-import asyncio
 from productivity_assistant.mcp_agent import MCPAgent
+from productivity_assistant.telemetry import tracer
+from productivity_assistant.tools.accounts import registry_stats
+from productivity_assistant.tools.request_executor import executor_stats
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Initialize agent
+# Whose Google account the tools use: "process" (one account for everyone) or "user" (each signed-in
+# Gradio user's own, authorized beforehand with productivity_assistant.tools.authorize_account)
+ACCOUNT_SCOPE = os.getenv("ACCOUNT_SCOPE", "process").lower()
+if ACCOUNT_SCOPE not in ("process", "user"):
+    raise ValueError(f"ACCOUNT_SCOPE must be 'process' or 'user', not {ACCOUNT_SCOPE!r}")
+
+# Gradio sign-in, as "user:password,user:password"; required for ACCOUNT_SCOPE=user
+GRADIO_AUTH = [tuple(item.strip().split(":", 1)) for item in os.getenv("GRADIO_AUTH", "").split(",") if ":" in item]
+
+# Initialize agent; its tools are loaded on first use (or when the first page loads) rather than at import
 agent = MCPAgent()
-asyncio.run(agent.initialize())
 
-def chat(message, history):
-    """Process chat message and return response."""
-    response = agent.chat(message)
-    return response
+async def chat(message, history, request: gr.Request):
+    """Process chat message and stream the response as it is generated."""
+    # Gradio keys each browser tab by its session hash; an empty history
+    # means the user cleared the chat, so start that session over.
+    session_id = request.session_hash
+    if not history:
+        agent.reset_session(session_id)
+    account = None
+    if ACCOUNT_SCOPE == "user":
+        account = request.username
+        if not account:
+            # Never fall back to the process's own account for someone who is not signed in
+            raise gr.Error("Sign in to use your Google account.")
+    async for partial_response in agent.chat_stream(message, session_id=session_id, account=account):
+        yield partial_response
 
 # Create Gradio interface
 demo = gr.ChatInterface(
@@ -25,6 +48,8 @@ demo = gr.ChatInterface(
         "📝 Create a meeting for tomorrow at 2pm",
         "🗓️ Show me my events this week"
     ],
+    # Turns are bounded by MCPAgent itself, so let Gradio run them concurrently
+    concurrency_limit=None,
     chatbot=gr.Chatbot(
         height=550,
         avatar_images=(
@@ -37,9 +62,67 @@ demo = gr.ChatInterface(
     ),
 )
 
+def end_session(request: gr.Request):
+    """Drop the conversation of a browser tab once it is closed."""
+    agent.close_session(request.session_hash)
+
+# Warm up the tools as soon as someone opens the app, before their first message
+with demo:
+    demo.load(agent.ensure_initialized)
+    demo.unload(end_session)
+
+def create_app():
+    """Gradio app mounted on a FastAPI app that also serves the agent's metrics.
+
+    /metrics returns latency histograms, error counts, token usage and tool
+    cache hit counts in the Prometheus text format; /metrics.json returns the
+    same aggregates with approximate p50/p99 latencies and cache hit rates.
+    When GRADIO_AUTH is set, the chat requires signing in and the metrics
+    require the same credentials through HTTP Basic authentication.
+    """
+    if ACCOUNT_SCOPE == "user" and not GRADIO_AUTH:
+        raise ValueError("ACCOUNT_SCOPE=user requires GRADIO_AUTH, since accounts are chosen by the signed-in user")
+
+    import secrets
+
+    from fastapi import Depends, FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse
+    from fastapi.security import HTTPBasic, HTTPBasicCredentials
+
+    basic = HTTPBasic(auto_error=False)
+
+    def require_credentials(credentials: HTTPBasicCredentials | None = Depends(basic)):
+        if not GRADIO_AUTH:
+            return
+        if credentials is not None:
+            given = (credentials.username.encode(), credentials.password.encode())
+            for username, password in GRADIO_AUTH:
+                # Compare in constant time so a response's timing does not reveal a password
+                if secrets.compare_digest(given[0], username.encode()) & secrets.compare_digest(given[1], password.encode()):
+                    return
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Basic"})
+
+    app = FastAPI(dependencies=[Depends(require_credentials)])
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        lines = ["# TYPE assistant_tool_cache_calls_total counter"]
+        for tool_name, stats in agent.tool_cache.stats()["tools"].items():
+            for outcome in ("hits", "misses", "coalesced"):
+                lines.append(f'assistant_tool_cache_calls_total{{tool="{tool_name}",outcome="{outcome}"}} {stats[outcome]}')
+        return tracer.metrics.render_prometheus() + "\n".join(lines) + "\n"
+
+    @app.get("/metrics.json")
+    def metrics_json():
+        workers = agent.worker_pool.stats() if agent.worker_pool is not None else {}
+        return {**tracer.metrics.snapshot(), "tool_cache": agent.tool_cache.stats(), "mcp_workers": workers,
+                "google_apis": executor_stats(), "google_accounts": registry_stats(),
+                "fast_path": agent.fast_path_stats.snapshot() if agent.fast_path_stats is not None else None}
+
+    return gr.mount_gradio_app(app, demo, path="/", show_error=True, auth=GRADIO_AUTH or None)
+
+
 if __name__ == "__main__":
-    demo.launch(
-        share=False,
-        server_name="0.0.0.0",
-        show_error=True,
-    )
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run(create_app(), host="0.0.0.0", port=7860)
@@ -1,41 +1,174 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import contextvars
+import functools
 import os
 import json
-from typing import List, Dict, Any
-from anthropic import Anthropic
+import time
+import uuid
+from types import SimpleNamespace
+from typing import List, Dict, Any, AsyncIterator
 from dotenv import load_dotenv
 import logging
 from pydantic import BaseModel
 
-# Direct imports of your MCP servers
-from productivity_assistant.servers.calendar_server import app as calendar_app
-from productivity_assistant.servers.gmail_server import app as gmail_app
+from productivity_assistant.history import ConversationHistory
+from productivity_assistant.intent_router import FastPathStats, Intent, RENDERERS, parse_intent
+from productivity_assistant.mcp_workers import MCPWorkerPool
+from productivity_assistant.serialization import encode_tool_result, MAX_RESULT_CHARS
+from productivity_assistant.telemetry import tracer
+from productivity_assistant.tool_cache import ToolCache, parse_ttls
+from productivity_assistant.tools.accounts import DEFAULT_ACCOUNT, use_account
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Marks the end of a prompt prefix that Anthropic may cache and reuse across requests
+CACHE_CONTROL = {"type": "ephemeral"}
+
+MODEL = "claude-sonnet-4-20250514"
+
 
 class MCPAgent:
-    """Agent that uses MCP tools by directly importing FastMCP apps."""
+    """Agent that uses MCP tools by directly importing FastMCP apps.
+
+    With ``mcp_workers`` > 0 the servers instead run as that many separate MCP
+    server processes each, reached over stdio (see MCPWorkerPool), so tool work
+    runs on other cores and a stuck tool cannot block the UI's process.
+
+    With ``fast_path`` enabled, messages that are nothing but a common request
+    ("Check my last 3 emails", "What's on my calendar today?") are answered
+    from a template after calling the tool directly, without Claude (see
+    intent_router); everything else goes through the full agent loop.
+
+    Each chat session keeps its own conversation history, and the number of
+    turns in flight across all sessions is bounded by ``max_concurrent_turns``.
+    Sessions idle for ``session_idle_timeout`` seconds are forgotten, as are the
+    least recently used ones beyond ``max_sessions``.
+    Tool calls requested in the same model turn run concurrently on a shared
+    pool of ``max_tool_workers`` threads. Session histories are kept within
+    ``history_token_budget`` estimated tokens (see ConversationHistory).
+    Results of read-only tools are cached for all sessions in a ToolCache of
+    ``tool_cache_entries`` results (0 disables it).
+
+    Every message may name the Google ``account`` its tools run as, so that one
+    agent serves many users' mailboxes and calendars (see tools.accounts);
+    without one, tools use the process's default account.
+    """
     
-    def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        self.messages = []
+    def __init__(self, max_concurrent_turns: int | None = None, max_tool_workers: int | None = None,
+                 tool_timeout: float | None = None, history_token_budget: int | None = None,
+                 tool_cache_entries: int | None = None, mcp_workers: int | None = None, fast_path: bool | None = None,
+                 max_sessions: int | None = None, session_idle_timeout: float | None = None):
+        self._client = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self.sessions: Dict[str, ConversationHistory] = {} # Least recently used first
         self.all_tools = []
         self.tool_map = {}
+        self.tool_manifest: List[Dict[str, Any]] = []
+
+        if max_concurrent_turns is None:
+            max_concurrent_turns = int(os.getenv("MAX_CONCURRENT_TURNS", "16"))
+        self._turn_slots = asyncio.Semaphore(max_concurrent_turns)
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_turns: Dict[str, int] = {} # Turns waiting or running, by session; such sessions are never evicted
+        self._session_used: Dict[str, float] = {}
+
+        if max_sessions is None:
+            max_sessions = int(os.getenv("MAX_SESSIONS", "1000"))
+        if session_idle_timeout is None:
+            session_idle_timeout = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+        self.max_sessions = max_sessions
+        self.session_idle_timeout = session_idle_timeout
+
+        if max_tool_workers is None:
+            max_tool_workers = int(os.getenv("MAX_TOOL_WORKERS", "8"))
+        if tool_timeout is None:
+            tool_timeout = float(os.getenv("TOOL_TIMEOUT_SECONDS", "30"))
+        self.tool_timeout = tool_timeout
+        self.tool_result_max_chars = int(os.getenv("TOOL_RESULT_MAX_CHARS", str(MAX_RESULT_CHARS)))
+        self._tool_executor = ThreadPoolExecutor(max_workers=max_tool_workers, thread_name_prefix="mcp-tool")
+
+        if history_token_budget is None:
+            history_token_budget = int(os.getenv("HISTORY_TOKEN_BUDGET", "20000"))
+        self.history_token_budget = history_token_budget
+
+        if tool_cache_entries is None:
+            tool_cache_entries = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "512"))
+        self.tool_cache = ToolCache(max_entries=tool_cache_entries, ttls=parse_ttls(os.getenv("TOOL_CACHE_TTLS", "")))
+
+        if mcp_workers is None:
+            mcp_workers = int(os.getenv("MCP_SERVER_WORKERS", "0"))
+        self.mcp_workers = mcp_workers
+        self.worker_pool: MCPWorkerPool | None = None
+
+        if fast_path is None:
+            fast_path = os.getenv("FAST_PATH", "false").lower() in ("1", "true", "yes")
+        self.fast_path_stats = FastPathStats() if fast_path else None
         
+    @property
+    def client(self):
+        """Anthropic client, created on first use so that importing the agent stays cheap."""
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    async def ensure_initialized(self):
+        """Load the tools once, on first use."""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if not self._initialized:
+                await self.initialize()
+
     async def initialize(self):
-        """Load tools from MCP apps."""
-        # Get tools from MCP apps
-        calendar_tools = await self._get_tools_from_app(calendar_app, "calendar")
-        gmail_tools = await self._get_tools_from_app(gmail_app, "gmail")
+        """Load tools from MCP apps, or from the worker processes when ``mcp_workers`` is set."""
+        if self.mcp_workers > 0:
+            self.worker_pool = MCPWorkerPool(workers=self.mcp_workers, call_timeout=self.tool_timeout)
+            await self.worker_pool.start()
+            calendar_tools = await self._get_tools_from_workers("calendar")
+            gmail_tools = await self._get_tools_from_workers("gmail")
+        else:
+            # Direct imports of your MCP servers, deferred until the tools are needed
+            from productivity_assistant.servers.calendar_server import app as calendar_app
+            from productivity_assistant.servers.gmail_server import app as gmail_app
+
+            # Get tools from MCP apps
+            calendar_tools = await self._get_tools_from_app(calendar_app, "calendar")
+            gmail_tools = await self._get_tools_from_app(gmail_app, "gmail")
         
         self.all_tools = calendar_tools + gmail_tools
+        self.tool_manifest = self._build_tool_manifest(self.all_tools)
+        self._initialized = True
         
         logger.info(f"✓ Loaded {len(calendar_tools)} calendar tools")
         logger.info(f"✓ Loaded {len(gmail_tools)} gmail tools")
         
+    @staticmethod
+    def _build_tool_manifest(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Tool definitions as sent to Claude, built once and reused by every request."""
+        # Remove internal fields
+        manifest = [
+            {
+                "name": tool['name'],
+                "description": tool['description'],
+                "input_schema": tool['input_schema']
+            }
+            for tool in tools
+        ]
+        # Tools are the first part of the prompt, so a breakpoint on the last one caches all of them
+        if manifest:
+            manifest[-1]["cache_control"] = CACHE_CONTROL
+        return manifest
+
     async def _get_tools_from_app(self, mcp_app, server_name: str) -> List[Dict[str, Any]]:
         """Extract tools from FastMCP app."""
         tools = []
@@ -61,7 +194,11 @@ class MCPAgent:
                     }
                     tools.append(tool_schema)
                     # Store in tool map for execution
-                    self.tool_map[tool.name] = {'func': tool_func, 'server': server_name}
+                    self.tool_map[tool.name] = {
+                        'func': tool_func,
+                        'server': server_name,
+                        'arg_model': getattr(getattr(tool_obj, 'fn_metadata', None), 'arg_model', None),
+                    }
                     
         except Exception as e:
             logger.error(f"Error extracting tools from {server_name}: {e}")
@@ -70,73 +207,311 @@ class MCPAgent:
         
         return tools
     
-    def chat(self, user_message: str) -> str:
-        """Chat with Claude using MCP tools."""
-        current_date = datetime.now().strftime("%A, %B %d, %Y")
-        self.messages.append({"role": "assistant", "content": f"Current Date is {current_date}"})
-        self.messages.append({"role": "user", "content": user_message})
-        
-        # Prepare tools for Claude (remove internal fields)
-        tools_for_claude = []
+    async def _get_tools_from_workers(self, server_name: str) -> List[Dict[str, Any]]:
+        """List the tools of a server running in worker processes; calls to them go through the pool."""
+        tools = []
+        for tool in await self.worker_pool.list_tools(server_name):
+            tools.append({
+                "name": tool.name,
+                "description": tool.description or f"Tool: {tool.name}",
+                "input_schema": tool.inputSchema,
+                "_server": server_name,
+            })
+            # Arguments are validated by the server process
+            self.tool_map[tool.name] = {'func': None, 'server': server_name, 'arg_model': None}
+        return tools
+
+    async def close(self):
+        """Stop the MCP worker processes, if any."""
+        if self.worker_pool is not None:
+            await self.worker_pool.stop()
+            self.worker_pool = None
+            self._initialized = False
+
+    def reset_session(self, session_id: str):
+        """Forget the conversation history of a session."""
+        self.sessions.pop(session_id, None)
+        self._session_locks.pop(session_id, None)
+        self._session_used.pop(session_id, None)
+
+    def close_session(self, session_id: str):
+        """Forget a session whose user has left, unless a turn of it is still running (it is then evicted once idle)."""
+        if not self._session_turns.get(session_id):
+            self.reset_session(session_id)
+
+    def _evict_sessions(self):
+        """Forget idle sessions and the least recently used ones beyond ``max_sessions``."""
+        deadline = time.monotonic() - self.session_idle_timeout
+        for session_id in list(self.sessions):
+            if len(self.sessions) <= self.max_sessions and self._session_used.get(session_id, 0) > deadline:
+                break
+            if not self._session_turns.get(session_id):
+                self.reset_session(session_id)
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        """Lock that keeps turns of the same session from interleaving."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        return lock
+
+    async def chat(self, user_message: str, session_id: str = "default", account: str | None = None) -> str:
+        """Chat with Claude using MCP tools within the given session."""
+        reply = "No response"
+        async for reply in self.chat_stream(user_message, session_id=session_id, account=account):
+            pass
+        return reply
+
+    async def chat_stream(self, user_message: str, session_id: str = "default", account: str | None = None) -> AsyncIterator[str]:
+        """Chat with Claude using MCP tools, yielding the reply as it is generated.
+
+        Each yielded value is the full text to display so far, including a
+        progress line while tools are running. Tools run as ``account``, or as
+        the default account if it is None.
+        """
+        account = account or DEFAULT_ACCOUNT
+        await self.ensure_initialized()
+        self._session_turns[session_id] = self._session_turns.get(session_id, 0) + 1
+        try:
+            async with self._session_lock(session_id), self._turn_slots:
+                history = self.sessions.pop(session_id, None)
+                if history is None:
+                    history = ConversationHistory(token_budget=self.history_token_budget)
+                self.sessions[session_id] = history # Most recently used last
+                self._session_used[session_id] = time.monotonic()
+                self._evict_sessions()
+
+                if self.fast_path_stats is not None:
+                    self.fast_path_stats.record_message()
+                    intent = parse_intent(user_message)
+                    if intent is not None:
+                        reply = await self._answer_fast(history, user_message, intent, account)
+                        if reply is not None:
+                            yield reply
+                            return
+
+                turn_started = time.perf_counter()
+                async for reply in self._run_turn(history, user_message, account):
+                    yield reply
+                if self.fast_path_stats is not None:
+                    self.fast_path_stats.record_agent_turn((time.perf_counter() - turn_started) * 1000)
+        finally:
+            self._session_turns[session_id] -= 1
+            if not self._session_turns[session_id]:
+                del self._session_turns[session_id]
+            if session_id in self.sessions:
+                self._session_used[session_id] = time.monotonic()
+
+    async def _answer_fast(self, history: ConversationHistory, user_message: str, intent: Intent, account: str = DEFAULT_ACCOUNT) -> str | None:
+        """Answer a recognized intent by calling its tool directly and filling in a template.
+
+        The exchange is recorded in the history as a regular tool call, so
+        Claude sees the listed emails or events in follow-up turns. Returns
+        None, leaving the message to the agent loop, if the tool fails.
+        """
+        started = time.perf_counter()
+        with tracer.span("agent.fast_path", "turn", intent=intent.name) as span:
+            tool_block = SimpleNamespace(id=f"toolu_fast_{uuid.uuid4().hex[:24]}", name=intent.tool, input=intent.arguments)
+            tool_result = await self._execute_tool(tool_block, account)
+            try:
+                data = None if tool_result.get("is_error") else json.loads(tool_result["content"])
+            except ValueError:
+                data = None
+            if not isinstance(data, dict) or data.get("error"):
+                span.set(fell_back=True)
+                self.fast_path_stats.record_fallback()
+                return None
+            reply = RENDERERS[intent.tool](data, intent)
+
+        history.start_turn(user_message)
+        history.add_assistant([{"type": "tool_use", "id": tool_block.id, "name": tool_block.name, "input": tool_block.input}])
+        history.add_tool_results([tool_result])
+        history.add_assistant([{"type": "text", "text": reply}])
+        history.end_turn()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.fast_path_stats.record_answer(intent.name, elapsed_ms)
+        logger.info(f"⚡ Answered {intent.name} without Claude in {elapsed_ms:.0f}ms")
+        return reply
+
+    async def _run_turn(self, history: ConversationHistory, user_message: str, account: str = DEFAULT_ACCOUNT) -> AsyncIterator[str]:
+        """Run the agent loop for a single user message, streaming Claude's text.
+
+        The turn is traced as an 'agent.turn' span whose children are one
+        'anthropic.messages' span per Claude request and one 'tool.<name>' span
+        per tool call, with the Google HTTP requests nested under their tool.
+        """
+        with tracer.span("agent.turn", "turn") as turn_span:
+            turn_started = time.perf_counter()
+            first_token_at = None
+
+            current_date = datetime.now().strftime("%A, %B %d, %Y")
+            history.start_turn(user_message)
+            system = [{"type": "text", "text": history.system_prompt(current_date), "cache_control": CACHE_CONTROL}]
+
+            reply = ""
+            requests = 0
+            while True:
+                requests += 1
+                with tracer.span("anthropic.messages", "llm", model=MODEL) as llm_span:
+                    request_started = time.perf_counter()
+                    async with self.client.messages.stream(
+                        model=MODEL,
+                        max_tokens=4096,
+                        system=system,
+                        messages=self._with_cache_breakpoint(history.for_request()),
+                        tools=self.tool_manifest
+                    ) as stream:
+                        async for event in stream:
+                            if event.type == "content_block_start" and event.content_block.type == "text" and reply:
+                                reply += "\n"
+                            elif event.type == "text":
+                                if "time_to_first_token_ms" not in llm_span.attributes:
+                                    llm_span.set(time_to_first_token_ms=round((time.perf_counter() - request_started) * 1000, 1))
+                                if first_token_at is None:
+                                    first_token_at = time.perf_counter()
+                                    logger.info(f"⏱️ First token after {first_token_at - turn_started:.2f}s")
+                                reply += event.text
+                                yield reply
+                        response = await stream.get_final_message()
+                    llm_span.set(
+                        stop_reason=response.stop_reason,
+                        input_tokens=response.usage.input_tokens,
+                        output_tokens=response.usage.output_tokens,
+                        cache_read_input_tokens=response.usage.cache_read_input_tokens or 0,
+                        cache_creation_input_tokens=response.usage.cache_creation_input_tokens or 0,
+                    )
+
+                history.record_usage(response.usage)
+
+                # Check for tool use
+                tool_use_blocks = [b for b in response.content if b.type == "tool_use"]
+
+                if not tool_use_blocks:
+                    history.add_assistant([block.model_dump(exclude_none=True) for block in response.content])
+                    logger.info(f"⏱️ Turn finished after {time.perf_counter() - turn_started:.2f}s")
+                    turn_span.set(llm_requests=requests)
+                    history.end_turn()
+                    break
+
+                # Show which tools are running until Claude continues the reply; this is yielded
+                # before the tool_use blocks enter the history, in case the reader stops here
+                calling = ", ".join(dict.fromkeys(b.name for b in tool_use_blocks))
+                yield (reply + "\n\n" if reply else "") + f"🔧 Calling {calling}…"
+
+                history.add_assistant([block.model_dump(exclude_none=True) for block in response.content])
+                # Execute tools concurrently; results keep the order of the tool_use blocks
+                try:
+                    tool_results = await asyncio.gather(*(self._execute_tool(b, account) for b in tool_use_blocks))
+                except BaseException:
+                    # The turn was cancelled mid-call; every tool_use still needs a tool_result,
+                    # or the session's next request would be rejected
+                    history.add_tool_results([self._tool_error(b, f"Tool {b.name} was interrupted") for b in tool_use_blocks])
+                    raise
+
+                # Send results back
+                history.add_tool_results(list(tool_results))
+                if reply:
+                    reply += "\n"
+
+        yield reply.strip() or "No response"
+
+    @staticmethod
+    def _with_cache_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mark the end of the history as cacheable.
+
+        The next request of the agent loop repeats this history plus the new
+        assistant message and tool results, so it reads the whole prefix from
+        the cache instead of processing it again.
+        """
+        last = messages[-1]
+        if isinstance(last["content"], str):
+            last["content"] = [{"type": "text", "text": last["content"]}]
+        last["content"][-1]["cache_control"] = CACHE_CONTROL
+        return messages
+
+    async def _execute_tool(self, tool_block, account: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
+        """Run one tool_use block as ``account`` and build its tool_result.
+
+        Failures and timeouts are reported back to Claude as error results so
+        that they never cancel the other tools of the same turn.
+        """
+        tool_name = tool_block.name
+        tool_input = tool_block.input
         
-        for tool in self.all_tools:
-            clean_tool = {
-                "name": tool['name'],
-                "description": tool['description'],
-                "input_schema": tool['input_schema']
-            }
-            tools_for_claude.append(clean_tool)
+        logger.info(f"🔧 Calling: {tool_name}")
+        logger.info(f"   Input: {json.dumps(tool_input, indent=2)}")
+
+        with tracer.span(f"tool.{tool_name}", "tool", tool=tool_name) as span:
+            tool = self.tool_map.get(tool_name)
+            if tool is None:
+                span.fail(f"Unknown tool: {tool_name}", "unknown_tool")
+                return self._tool_error(tool_block, f"Unknown tool: {tool_name}")
+
+            # Tools make blocking Google API calls, so keep them off the event loop; the copied
+            # context makes their Google HTTP spans children of this tool span
+            loop = asyncio.get_running_loop()
+
+            def run():
+                with use_account(account):
+                    return tool['func'](**arguments)
+
+            def load():
+                if tool['func'] is None:
+                    return self.worker_pool.call_tool(tool['server'], tool_name, arguments, account)
+                return loop.run_in_executor(self._tool_executor, functools.partial(contextvars.copy_context().run, run))
+
+            try:
+                arguments = self._tool_arguments(tool, tool_input)
+                result, outcome = await asyncio.wait_for(
+                    self.tool_cache.call(tool_name, tool['server'], arguments, load, self._cacheable, account), self.tool_timeout
+                )
+                span.set(cache=outcome)
+            except asyncio.TimeoutError:
+                span.fail(f"timed out after {self.tool_timeout:g}s", "timeout")
+                return self._tool_error(tool_block, f"Tool {tool_name} timed out after {self.tool_timeout:g}s")
+            except Exception as e:
+                span.fail(e, type(e).__name__)
+                return self._tool_error(tool_block, f"Tool {tool_name} failed: {e}")
+
+            # Encode compactly, keeping only the fields Claude needs from this tool
+            if not isinstance(result, (BaseModel, dict, list)):
+                result = str(result)
+            content = encode_tool_result(tool_name, result, self.tool_result_max_chars)
+            span.set(result_chars=len(content))
+            # Tools report API failures in the result's error field rather than raising
+            error = getattr(result, "error", None)
+            if error:
+                span.fail(error, "tool_error")
+            logger.info(f"   Result: {content[:200]}...")
         
-        while True:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                messages=self.messages,
-                tools=tools_for_claude
-            )
-            
-            self.messages.append({
-                "role": "assistant",
-                "content": response.content
-            })
-            
-            # Check for tool use
-            tool_use_blocks = [b for b in response.content if b.type == "tool_use"]
-            
-            if not tool_use_blocks:
-                # Return text response
-                text_blocks = [b.text for b in response.content if hasattr(b, 'text')]
-                return "\n".join(text_blocks) if text_blocks else "No response"
-            
-            # Execute tools
-            tool_results = []
-            for tool_block in tool_use_blocks:
-                tool_name = tool_block.name
-                tool_input = tool_block.input
-                
-                logger.info(f"🔧 Calling: {tool_name}")
-                logger.info(f"   Input: {json.dumps(tool_input, indent=2)}")
-                
-                # Call the tool directly
-                tool_func = self.tool_map[tool_name]['func']
-                result = tool_func(**tool_input)
-                
-                # Handle Pydantic models by serializing them
-                if isinstance(result, BaseModel):
-                    content = result.model_dump_json(indent=2)
-                    logger.info(f"   Result: {content[:200]}...")
-                else:
-                    content = str(result)
-                    logger.info(f"   Result: {content[:200]}...")
-                
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": tool_block.id,
-                    "content": content
-                })
-            
-            # Send results back
-            self.messages.append({
-                "role": "user",
-                "content": tool_results
-            })
\ No newline at end of file
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_block.id,
+            "content": content
+        }
+
+    @staticmethod
+    def _tool_arguments(tool: Dict[str, Any], tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate the input against the tool's signature, as the MCP server would, filling in defaults."""
+        if tool.get('arg_model') is None:
+            return dict(tool_input)
+        return tool['arg_model'].model_validate(tool_input).model_dump_one_level()
+
+    @staticmethod
+    def _cacheable(result: Any) -> bool:
+        """Whether a tool result may be cached; results that report a failure are not."""
+        if isinstance(result, dict):
+            return not (result.get("error") or result.get("status") == "error")
+        return not (getattr(result, "error", None) or getattr(result, "status", None) == "error")
+
+    @staticmethod
+    def _tool_error(tool_block, message: str) -> Dict[str, Any]:
+        """Build an error tool_result for a failed tool call."""
+        logger.warning(f"   {message}")
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_block.id,
+            "content": message,
+            "is_error": True
+        }
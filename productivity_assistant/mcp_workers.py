@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import sys
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules run as MCP server processes, by server name
+SERVER_MODULES = {
+    "calendar": "productivity_assistant.servers.calendar_server",
+    "gmail": "productivity_assistant.servers.gmail_server",
+}
+
+RESTART_DELAY = 1.0 # Seconds to wait before restarting a worker whose process failed
+START_TIMEOUT = 60.0 # Seconds a new worker may take to start and complete the MCP handshake
+
+
+class ToolCallError(Exception):
+    """A tool reported an error through MCP (isError), as opposed to the worker failing."""
+
+
+class MCPWorker:
+    """One MCP server process reached over stdio, restarted whenever it fails or a call to it is abandoned.
+
+    FastMCP runs synchronous tools on the server's event loop, so a worker runs
+    one tool call at a time; the pool spreads concurrent calls over workers.
+    """
+
+    def __init__(self, server_name: str, module: str, index: int, call_timeout: Optional[float] = None):
+        self.server_name = server_name
+        self.module = module
+        self.index = index
+        # A tool call still running after call_timeout seconds fails, and the worker is restarted
+        self.read_timeout = timedelta(seconds=call_timeout) if call_timeout else None
+        self.in_flight = 0
+        self.session = None
+        self.ready = asyncio.Event()
+        self._restart = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def __repr__(self):
+        return f"<MCPWorker {self.server_name}#{self.index}>"
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name=f"mcp-worker-{self.server_name}-{self.index}")
+
+    async def _run(self):
+        from mcp import ClientSession
+        from mcp.client.stdio import StdioServerParameters, stdio_client
+
+        # Workers inherit the agent's environment, including settings loaded from .env
+        params = StdioServerParameters(command=sys.executable, args=["-m", self.module], env=dict(os.environ))
+        while not self._stopping:
+            try:
+                async with stdio_client(params) as (read_stream, write_stream):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await session.initialize()
+                        self.session = session
+                        self.ready.set()
+                        logger.info(f"✓ Started {self}")
+                        await self._restart.wait()
+            except Exception as e:
+                logger.warning(f"{self} failed: {e}")
+            finally:
+                self.ready.clear()
+                self.session = None
+                self._restart.clear()
+            if not self._stopping:
+                await asyncio.sleep(RESTART_DELAY)
+
+    def restart(self):
+        """Stop the worker's process (killing it if it does not exit) and start a new one."""
+        logger.warning(f"Restarting {self}")
+        self.ready.clear()
+        self._restart.set()
+
+    async def stop(self):
+        self._stopping = True
+        self._restart.set()
+        if self._task is not None:
+            await self._task
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any], account: str = "") -> Any:
+        """Call a tool on this worker as ``account`` and return its structured result (or its text if it has none)."""
+        self.in_flight += 1
+        completed = False
+        try:
+            # The server's tools read the account from the request's _meta (see tools.accounts.account_tool)
+            result = await self.session.call_tool(
+                name, arguments, read_timeout_seconds=self.read_timeout, meta={"account": account} if account else None
+            )
+            completed = True
+        except Exception:
+            completed = True # The connection failed or the call timed out, rather than the call being abandoned
+            self.restart()
+            raise
+        finally:
+            self.in_flight -= 1
+            if not completed:
+                # Timed out or cancelled: the process is still busy with a call nobody waits for
+                self.restart()
+
+        if result.isError:
+            raise ToolCallError(self._text(result) or f"Tool {name} failed")
+        if result.structuredContent is not None:
+            return result.structuredContent
+        return self._text(result)
+
+    @staticmethod
+    def _text(result) -> str:
+        return "\n".join(block.text for block in result.content if getattr(block, "text", None))
+
+
+class MCPWorkerPool:
+    """
+    Runs each MCP server as ``workers`` separate processes and balances tool calls across them.
+
+    Every call goes to the ready worker of its server with the fewest calls in
+    flight, so tool work runs on several cores and outside the UI's process. A
+    worker whose call times out or whose connection fails is restarted while
+    the others keep serving. A call still running after ``call_timeout``
+    seconds fails with a timeout and its worker is restarted.
+    """
+
+    def __init__(self, workers: int = 2, servers: Optional[Dict[str, str]] = None, call_timeout: Optional[float] = None):
+        self.workers: Dict[str, List[MCPWorker]] = {
+            server_name: [MCPWorker(server_name, module, index, call_timeout) for index in range(workers)]
+            for server_name, module in (servers or SERVER_MODULES).items()
+        }
+
+    async def start(self):
+        """Start every worker and wait until at least one worker of each server is ready."""
+        for workers in self.workers.values():
+            for worker in workers:
+                worker.start()
+        for server_name in self.workers:
+            await asyncio.wait_for(self._ready_worker(server_name), START_TIMEOUT)
+
+    async def stop(self):
+        await asyncio.gather(*(worker.stop() for workers in self.workers.values() for worker in workers))
+
+    async def list_tools(self, server_name: str) -> list:
+        worker = await self._ready_worker(server_name)
+        return (await worker.session.list_tools()).tools
+
+    async def call_tool(self, server_name: str, name: str, arguments: Dict[str, Any], account: str = "") -> Any:
+        worker = await self._ready_worker(server_name)
+        return await worker.call_tool(name, arguments, account)
+
+    async def _ready_worker(self, server_name: str) -> MCPWorker:
+        """The least loaded ready worker, waiting for one to (re)start if none is ready."""
+        workers = self.workers[server_name]
+        while True:
+            ready = [worker for worker in workers if worker.ready.is_set() and worker.session is not None]
+            if ready:
+                return min(ready, key=lambda worker: worker.in_flight)
+            waiters = [asyncio.create_task(worker.ready.wait()) for worker in workers]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            server_name: [{"worker": worker.index, "ready": worker.ready.is_set(), "in_flight": worker.in_flight}
+                          for worker in workers]
+            for server_name, workers in self.workers.items()
+        }
@@ -3,6 +3,13 @@ from datetime import datetime
 
 
 
+class ApiError(BaseModel):
+    """Why a Google API call failed"""
+    status: int | None = Field(None, description="HTTP status code, if the API answered.")
+    reason: str | None = Field(None, description="Google's error reason (e.g. 'rateLimitExceeded'), or the exception type.")
+    message: str = Field(..., description="Error message.")
+    retryable: bool = Field(False, description="Whether the same call may succeed later (rate limits, server errors).")
+
 class EmailItem(BaseModel):
     """Represents an email from the inbox"""
     id: str
@@ -62,22 +69,57 @@ class CalendarAddResult(BaseModel):
     success: bool
     message: str
 
+class NewCalendarEvent(BaseModel):
+    """An event to create in a bulk request"""
+    summary: str = Field(..., description="Title of the event.")
+    description: str = Field("", description="Description of the event.")
+    start_time: str = Field(..., description="Start time of the event in ISO format (e.g., '2025-12-25T09:00:00-07:00').")
+    end_time: str = Field(..., description="End time of the event in ISO format (e.g., '2025-12-25T10:00:00-07:00').")
+    attendees: list[str] = Field(default_factory=list, description="Optional list of attendee emails.")
+    timezone: str = Field('America/Los_Angeles', description="Timezone for the event (e.g., 'America/Los_Angeles').")
+
+class BulkCalendarAddResult(BaseModel):
+    """Results of creating several events, one per requested event and in the same order"""
+    succeeded: int
+    failed: int
+    results: list[CalendarAddResult]
+
 class CalendarEvents(BaseModel):
     count: int = Field(..., description="The number of calendar events.")
     events: list[CalendarEvent] = Field(..., description="List of calendar events.")
     next_page_token: str | None = Field(..., description="Token for the next page of results.")
+    error: ApiError | None = Field(None, description="Why the events could not be listed, if they could not.")
+
+class FreeSlot(BaseModel):
+    start_time: str = Field(..., description="Start of the free slot in ISO format.")
+    end_time: str = Field(..., description="End of the free slot in ISO format.")
+    free_until: str = Field(..., description="When the free time containing this slot ends.")
+
+class FreeSlots(BaseModel):
+    count: int = Field(..., description="The number of free slots.")
+    slots: list[FreeSlot] = Field(..., description="Free slots, best first.")
+    unavailable_calendars: list[str] = Field(default_factory=list, description="Calendars whose availability could not be read.")
+    error: ApiError | None = Field(None, description="Why the search failed, if it did.")
 
 class DeleteResult(BaseModel):
     """Result of a delete operation"""
     status: str
     message: str
 
+class BulkDeleteResult(BaseModel):
+    """Results of deleting several events, one per requested event ID and in the same order"""
+    succeeded: int
+    failed: int
+    results: list[DeleteResult]
+
 class EmailItems(BaseModel):
     """A list of emails"""
     count: int
     messages: list[EmailItem]
+    error: ApiError | None = None
 
 class MessageBody(BaseModel):
     """The body of an email message"""
     status: str
-    body: str
\ No newline at end of file
+    body: str
+    error: ApiError | None = None
\ No newline at end of file
@@ -0,0 +1,147 @@
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+# Default cap on the size of one encoded tool result, in characters
+MAX_RESULT_CHARS = 32000
+
+# Fields of each tool's result that are sent back to Claude. A set lists the
+# fields kept from a dict, a dict maps kept fields to the projection of their
+# value (applied to every item of a list). Tools not listed are sent in full.
+_EVENT_FIELDS = {
+    'id': True,
+    'name': True,
+    'status': True,
+    'start_time': True,
+    'end_time': True,
+    'location': True,
+    'description': True,
+    'attendees': {'email', 'response_status'},
+}
+TOOL_PROJECTIONS: dict[str, dict] = {
+    'list-calendar-events': {'count': True, 'next_page_token': True, 'events': _EVENT_FIELDS, 'error': True},
+    'search-calendar-events': {'count': True, 'next_page_token': True, 'events': _EVENT_FIELDS, 'error': True},
+    'list-messages': {'count': True, 'messages': {'id', 'subject', 'sender', 'date', 'body'}, 'error': True},
+    'search-messages-local': {'count': True, 'messages': {'id', 'subject', 'sender', 'date', 'body'}, 'error': True},
+}
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def to_data(result: Any) -> Any:
+    """Convert a tool result to plain JSON data without nulls, defaults and empty values."""
+    if isinstance(result, BaseModel):
+        result = result.model_dump(mode='json', exclude_none=True, exclude_defaults=True)
+    return _drop_empty(result)
+
+
+def _drop_empty(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {key: _drop_empty(value) for key, value in data.items() if value is not None and value != [] and value != {}}
+    if isinstance(data, list):
+        return [_drop_empty(item) for item in data]
+    return data
+
+
+def project(data: Any, spec) -> Any:
+    """Keep only the fields named by a projection spec (see TOOL_PROJECTIONS)."""
+    if isinstance(data, list):
+        return [project(item, spec) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if isinstance(spec, (set, frozenset)):
+        return {key: value for key, value in data.items() if key in spec}
+    return {
+        key: value if spec[key] is True else project(value, spec[key])
+        for key, value in data.items() if key in spec
+    }
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Cut a string to about `max_chars`, saying how much was dropped."""
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}…[{len(text) - max_chars} more characters truncated]"
+
+
+def _truncate_strings(data: Any, max_chars: int) -> Any:
+    if isinstance(data, str):
+        return truncate_text(data, max_chars)
+    if isinstance(data, dict):
+        return {key: _truncate_strings(value, max_chars) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_truncate_strings(item, max_chars) for item in data]
+    return data
+
+
+def _largest_fit(candidate, low: int, high: int, max_chars: int):
+    """Largest n in [low, high] for which candidate(n) encodes within max_chars, with its encoding."""
+    best = None
+    while low <= high:
+        middle = (low + high) // 2
+        text = _dumps(candidate(middle))
+        if len(text) <= max_chars:
+            best = (middle, text)
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def _fit(data: Any, max_chars: int) -> str:
+    """Shrink encoded data below max_chars, first by dropping trailing list items, then by cutting strings."""
+    if isinstance(data, dict):
+        lists = sorted((key for key, value in data.items() if isinstance(value, list) and value),
+                       key=lambda key: len(_dumps(data[key])), reverse=True)
+        for key in lists:
+            items = data[key]
+
+            def keep(n, key=key, items=items):
+                trimmed = dict(data, **{key: items[:n]})
+                if n < len(items):
+                    trimmed['truncated'] = f"{len(items) - n} more {key} omitted; narrow the query or lower max_results"
+                return trimmed
+
+            fit = _largest_fit(keep, 1, len(items), max_chars)
+            if fit is not None:
+                return fit[1]
+            data = keep(1)
+
+    fit = _largest_fit(lambda n: _truncate_strings(data, n), 0, max_chars, max_chars)
+    if fit is not None:
+        return fit[1]
+    return truncate_text(_dumps(data), max_chars)
+
+
+def encode_tool_result(tool_name: str, result: Any, max_chars: int = MAX_RESULT_CHARS) -> str:
+    """
+    Encodes a tool result compactly for Claude.
+
+    Pydantic models and plain dicts are encoded as minified JSON without null,
+    default or empty fields, projected to the fields listed for the tool in
+    TOOL_PROJECTIONS, and capped at `max_chars` with an explicit truncation
+    marker so the model knows the result is incomplete.
+
+    Args:
+        tool_name (str): Name of the tool that produced the result.
+        result (Any): The tool's return value.
+        max_chars (int): Maximum size of the encoded result.
+
+    Returns:
+        str: The encoded result.
+    """
+    if isinstance(result, str):
+        return truncate_text(result, max_chars)
+
+    data = to_data(result)
+    spec = TOOL_PROJECTIONS.get(tool_name)
+    if spec is not None:
+        data = project(data, spec)
+
+    text = _dumps(data)
+    if len(text) <= max_chars:
+        return text
+    return _fit(data, max_chars)
@@ -3,7 +3,9 @@ from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 # from mcp.server.stdio import stdio_server # Import run_app_stdio
 
+from productivity_assistant.tools.accounts import account_tool
 from productivity_assistant.tools.calendar_tool import CalendarTool
+from productivity_assistant.tools.event_store import EventStore, DEFAULT_EVENT_STORE_PATH
 from productivity_assistant.tools.google_api_service import create_service
 
 
@@ -17,40 +19,76 @@ if not GOOGLE_API_CLIENT_SECRET_FILE:
 if not os.path.exists(GOOGLE_API_CLIENT_SECRET_FILE):
     raise FileNotFoundError(f"Client secret file not found at {GOOGLE_API_CLIENT_SECRET_FILE}")
 
-# Initialize FastMCP instance
+# Initialize FastMCP instance; every tool runs as the Google account named by its caller (see tools.accounts)
 app = FastMCP(name='Google Calendar')
 
+# Local event store; set CALENDAR_CACHE_PATH to an empty value to always query Google Calendar directly
+CALENDAR_CACHE_PATH = os.getenv("CALENDAR_CACHE_PATH", DEFAULT_EVENT_STORE_PATH)
+event_store = EventStore(CALENDAR_CACHE_PATH) if CALENDAR_CACHE_PATH else None
+
+# Number of Google API clients (each with its own HTTP connection) that may be used concurrently, per account
+GOOGLE_SERVICE_POOL_SIZE = int(os.getenv("GOOGLE_SERVICE_POOL_SIZE", "8"))
+
+# Google accounts served at once and API clients kept across them; least recently used idle accounts are evicted beyond
+# either limit, and any account unused for GOOGLE_ACCOUNT_IDLE_SECONDS
+GOOGLE_MAX_ACCOUNTS = int(os.getenv("GOOGLE_MAX_ACCOUNTS", "32"))
+GOOGLE_MAX_SERVICES = int(os.getenv("GOOGLE_MAX_SERVICES", "64"))
+GOOGLE_ACCOUNT_IDLE_SECONDS = float(os.getenv("GOOGLE_ACCOUNT_IDLE_SECONDS", "900"))
+
 # Initialize CalendarTool, passing create_service to it
-calendar_tool = CalendarTool(client_secret_file=GOOGLE_API_CLIENT_SECRET_FILE, create_service_func=create_service)
+calendar_tool = CalendarTool(client_secret_file=GOOGLE_API_CLIENT_SECRET_FILE, create_service_func=create_service, event_store=event_store, pool_size=GOOGLE_SERVICE_POOL_SIZE,
+                             max_accounts=GOOGLE_MAX_ACCOUNTS, max_services=GOOGLE_MAX_SERVICES, account_idle_timeout=GOOGLE_ACCOUNT_IDLE_SECONDS)
 
 # Add tools to FastMCP instance
 app.add_tool(
-    calendar_tool.create_calendar_event,
+    account_tool(calendar_tool.create_calendar_event),
     name='create-calendar-event',
     description='Create a new calendar event with summary, description, start time, end time, and optional attendees and timezone.'
 )
 
 app.add_tool(
-    calendar_tool.list_calendar_events,
+    account_tool(calendar_tool.bulk_create_calendar_events),
+    name='bulk-create-calendar-events',
+    description='Create several calendar events in one call, each with summary, description, start time, end time, and optional attendees and timezone. Returns one result per event.'
+)
+
+app.add_tool(
+    account_tool(calendar_tool.list_calendar_events),
     name='list-calendar-events',
     description='List upcoming calendar events, with optional max_results, time_min, and time_max.'
 )
 
 app.add_tool(
-    calendar_tool.search_calendar_events,
+    account_tool(calendar_tool.search_calendar_events),
     name='search-calendar-events',
-    description='Search for calendar events matching a query, with optional max_results.'
+    description='Search for calendar events matching a query, with optional max_results, time_min, and time_max (defaults to the past 30 days through the next year).'
 )
 
 app.add_tool(
-    calendar_tool.delete_calendar_event,
+    account_tool(calendar_tool.find_free_slots),
+    name='find-free-slots',
+    description='Find meeting times when the user and optional attendees are all free, within working hours, with optional duration, time range, timezone, and max_results. Returns ranked candidate slots.'
+)
+
+app.add_tool(
+    account_tool(calendar_tool.delete_calendar_event),
     name='delete-calendar-event',
     description='Delete a calendar event by its event ID.'
 )
 
 app.add_tool(
-    calendar_tool.add_attendees_to_event,
+    account_tool(calendar_tool.bulk_delete_calendar_events),
+    name='bulk-delete-calendar-events',
+    description='Delete several calendar events in one call by their event IDs. Returns one result per event ID.'
+)
+
+app.add_tool(
+    account_tool(calendar_tool.add_attendees_to_event),
     name='add-attendees-to-event',
     description='Add a list of attendees to an existing calendar event using the event ID.'
 )
 
+
+if __name__ == "__main__":
+    # Serve the tools over stdio, as a worker process of MCPAgent's worker pool or for any other MCP client
+    app.run()
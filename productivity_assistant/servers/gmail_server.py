@@ -3,8 +3,12 @@ from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 # from mcp.server.stdio import stdio_server # Import run_app_stdio
 
+from productivity_assistant.tools.accounts import account_tool
+from productivity_assistant.tools.body_cache import BodyCache
 from productivity_assistant.tools.gmail_tool import GmailTool
 from productivity_assistant.tools.google_api_service import create_service
+from productivity_assistant.tools.mailbox_store import MailboxStore, DEFAULT_MAILBOX_PATH
+from productivity_assistant.tools.message_index import MessageIndex, DEFAULT_INDEX_PATH
 
 
 load_dotenv()
@@ -15,22 +19,56 @@ if not GOOGLE_API_CLIENT_SECRET_FILE:
 if not os.path.exists(GOOGLE_API_CLIENT_SECRET_FILE):
     raise FileNotFoundError(f"Client secret file not found at {GOOGLE_API_CLIENT_SECRET_FILE}")
 
-# Initialize FastMCP instance
+# Initialize FastMCP instance; every tool runs as the Google account named by its caller (see tools.accounts)
 app = FastMCP(name='Google Gmail')
 
-gmail_tool = GmailTool(client_secret_file=GOOGLE_API_CLIENT_SECRET_FILE, create_service_func=create_service)
+# Local mailbox cache; set MAILBOX_CACHE_PATH to an empty value to always query Gmail directly
+MAILBOX_CACHE_PATH = os.getenv("MAILBOX_CACHE_PATH", DEFAULT_MAILBOX_PATH)
+mailbox_store = MailboxStore(MAILBOX_CACHE_PATH) if MAILBOX_CACHE_PATH else None
+
+# Number of Google API clients (each with its own HTTP connection) that may be used concurrently, per account
+GOOGLE_SERVICE_POOL_SIZE = int(os.getenv("GOOGLE_SERVICE_POOL_SIZE", "8"))
+
+# Google accounts served at once and API clients kept across them; least recently used idle accounts are evicted beyond
+# either limit, and any account unused for GOOGLE_ACCOUNT_IDLE_SECONDS
+GOOGLE_MAX_ACCOUNTS = int(os.getenv("GOOGLE_MAX_ACCOUNTS", "32"))
+GOOGLE_MAX_SERVICES = int(os.getenv("GOOGLE_MAX_SERVICES", "64"))
+GOOGLE_ACCOUNT_IDLE_SECONDS = float(os.getenv("GOOGLE_ACCOUNT_IDLE_SECONDS", "900"))
+
+# In-memory cache of decoded message bodies, in millions of characters; 0 disables it
+GMAIL_BODY_CACHE_MB = float(os.getenv("GMAIL_BODY_CACHE_MB", "16"))
+body_cache = BodyCache(int(GMAIL_BODY_CACHE_MB * 1_000_000)) if GMAIL_BODY_CACHE_MB > 0 else None
+
+# Fetch the bodies of listed messages in the background so that reading one is served from memory
+GMAIL_PREFETCH_BODIES = os.getenv("GMAIL_PREFETCH_BODIES", "false").lower() in ("1", "true", "yes")
+
+# Full-text index of every email seen; set MESSAGE_INDEX_PATH to an empty value to disable local search
+MESSAGE_INDEX_PATH = os.getenv("MESSAGE_INDEX_PATH", DEFAULT_INDEX_PATH)
+message_index = MessageIndex(MESSAGE_INDEX_PATH) if MESSAGE_INDEX_PATH else None
+
+gmail_tool = GmailTool(client_secret_file=GOOGLE_API_CLIENT_SECRET_FILE, create_service_func=create_service, mailbox_store=mailbox_store, pool_size=GOOGLE_SERVICE_POOL_SIZE,
+                       body_cache=body_cache, prefetch_bodies=GMAIL_PREFETCH_BODIES, message_index=message_index,
+                       max_accounts=GOOGLE_MAX_ACCOUNTS, max_services=GOOGLE_MAX_SERVICES, account_idle_timeout=GOOGLE_ACCOUNT_IDLE_SECONDS)
 
 app.add_tool(
-    gmail_tool.list_messages,
+    account_tool(gmail_tool.list_messages),
     name='list-messages',
     description='Lists messages from the user\'s Gmail inbox with optional query and max results.'
 )
 
 app.add_tool(
-    gmail_tool.get_message_body,
+    account_tool(gmail_tool.get_message_body),
     name='get-message-body',
     description='Retrieves the full body of a specific Gmail message by its ID.'
 )
 
+app.add_tool(
+    account_tool(gmail_tool.search_messages_local),
+    name='search-messages-local',
+    description='Instantly searches emails already seen in this mailbox (subject, sender, snippet and any body already read), best match first. Use list-messages with a query to search the whole mailbox on Gmail.'
+)
 
 
+if __name__ == "__main__":
+    # Serve the tools over stdio, as a worker process of MCPAgent's worker pool or for any other MCP client
+    app.run()
@@ -0,0 +1,227 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Span attributes added to counters when a span ends (tokens reported on LLM spans)
+COUNTED_ATTRIBUTES = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation: an agent turn, a Claude request, a tool call or a Google HTTP request."""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_time", "duration_ms", "attributes", "status", "error")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = time.time()
+        self.duration_ms = 0.0
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        """Add attributes, e.g. token usage or a status code, once they are known."""
+        self.attributes.update(attributes)
+
+    def fail(self, error: Any, code: Any = None):
+        """Mark the span as failed with an error message and an optional error code."""
+        self.status = "error"
+        self.error = str(error)
+        if code is not None:
+            self.attributes["error_code"] = code
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Metrics:
+    """Latency histograms and counters aggregated from finished spans, keyed by span kind and name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[tuple, list] = {}
+        self._sums: Dict[tuple, float] = defaultdict(float)
+        self._calls: Dict[tuple, int] = defaultdict(int)
+        self._errors: Dict[tuple, int] = defaultdict(int)
+        self._counters: Dict[tuple, float] = defaultdict(float)
+
+    def record(self, span: Span):
+        key = (span.kind, span.name)
+        bucket = bisect_left(LATENCY_BUCKETS_MS, span.duration_ms)
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [0] * (len(LATENCY_BUCKETS_MS) + 1))
+            histogram[bucket] += 1
+            self._sums[key] += span.duration_ms
+            self._calls[key] += 1
+            if span.status == "error":
+                self._errors[key + (str(span.attributes.get("error_code", "")),)] += 1
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if value:
+                    self._counters[key + (attribute,)] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregated metrics as plain data, with approximate latency percentiles from the histograms."""
+        with self._lock:
+            errors = defaultdict(dict)
+            for (kind, name, code), count in self._errors.items():
+                errors[(kind, name)][code] = count
+            rows = []
+            for key, histogram in sorted(self._histograms.items()):
+                calls = self._calls[key]
+                rows.append({
+                    "kind": key[0],
+                    "name": key[1],
+                    "calls": calls,
+                    "errors": sum(errors[key].values()),
+                    "error_codes": errors[key],
+                    "mean_ms": round(self._sums[key] / calls, 2),
+                    "p50_ms": self._percentile(histogram, calls, 0.5),
+                    "p99_ms": self._percentile(histogram, calls, 0.99),
+                    **{attribute: self._counters[key + (attribute,)] for attribute in COUNTED_ATTRIBUTES
+                       if key + (attribute,) in self._counters},
+                })
+        return {"spans": rows}
+
+    @staticmethod
+    def _percentile(histogram: list, calls: int, quantile: float):
+        """Upper bound of the bucket containing the quantile (None if it is the overflow bucket)."""
+        target = quantile * calls
+        seen = 0
+        for index, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def render_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE assistant_span_duration_ms histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._histograms.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, histogram):
+                    cumulative += count
+                    lines.append(f'assistant_span_duration_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'assistant_span_duration_ms_bucket{{{labels},le="+Inf"}} {self._calls[(kind, name)]}')
+                lines.append(f'assistant_span_duration_ms_sum{{{labels}}} {self._sums[(kind, name)]:.3f}')
+                lines.append(f'assistant_span_duration_ms_count{{{labels}}} {self._calls[(kind, name)]}')
+            lines.append("# TYPE assistant_span_errors_total counter")
+            for (kind, name, code), errors in sorted(self._errors.items()):
+                lines.append(f'assistant_span_errors_total{{kind="{kind}",name="{name}",code="{code}"}} {errors}')
+            lines.append("# TYPE assistant_tokens_total counter")
+            for (kind, name, attribute), value in sorted(self._counters.items()):
+                lines.append(f'assistant_tokens_total{{kind="{kind}",name="{name}",type="{attribute}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+class Tracer:
+    """
+    Creates spans, aggregates them into Metrics and optionally exports them as JSON lines.
+
+    The current span is tracked in a context variable, so spans opened inside
+    another span (also in tool threads started with a copied context) become
+    its children and share its trace ID.
+    """
+
+    def __init__(self, export_path: Optional[str] = None):
+        self.metrics = Metrics()
+        self.export_path = export_path
+        self._export_lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name, kind, parent, attributes)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            if span.status != "error":
+                # API errors carry their HTTP status; anything else is named by its type
+                span.fail(e, getattr(e, "status_code", None) or type(e).__name__)
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A streaming generator may be resumed from another task than the one that started it
+                _current_span.set(parent)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        self.metrics.record(span)
+        if not self.export_path:
+            return
+        try:
+            line = json.dumps(span.to_dict(), default=str)
+            with self._export_lock, open(self.export_path, "a") as export_file:
+                export_file.write(line + "\n")
+        except Exception as e:
+            logger.warning(f"Could not export span {span.name}: {e}")
+
+
+class TracedHttp:
+    """
+    Wraps an httplib2-compatible HTTP object so that every request is recorded as a span.
+
+    Everything but `request` is delegated to the wrapped object, so it can be
+    handed to googleapiclient in place of the original (including for batch
+    requests and credential refreshes).
+    """
+
+    def __init__(self, http, tracer: "Tracer"):
+        self._http = http
+        self._tracer = tracer
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        url = urlparse(uri)
+        with self._tracer.span("google.http", "google_http", method=method, host=url.netloc, path=url.path) as span:
+            response, content = self._http.request(uri, method, body, headers, *args, **kwargs)
+            span.set(status_code=response.status)
+            if response.status >= 400:
+                span.fail(f"HTTP {response.status}", response.status)
+            return response, content
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+# Process-wide tracer; set TRACE_EXPORT_PATH to also write every finished span to a JSONL file
+tracer = Tracer(export_path=os.getenv("TRACE_EXPORT_PATH") or None)
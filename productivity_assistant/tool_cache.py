@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a result of each read-only tool stays valid. Tools not listed are never cached.
+DEFAULT_TTLS: Dict[str, float] = {
+    'list-calendar-events': 60,
+    'search-calendar-events': 60,
+    'find-free-slots': 60,
+    'list-messages': 30,
+    'get-message-body': 600, # A message's body never changes
+}
+
+# Tools that change their server's data; running one drops every cached result of that server
+WRITE_TOOLS = {
+    'create-calendar-event',
+    'bulk-create-calendar-events',
+    'delete-calendar-event',
+    'bulk-delete-calendar-events',
+    'add-attendees-to-event',
+}
+
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """Parse TTL overrides written as 'tool=seconds,tool=seconds' (0 disables caching of a tool)."""
+    ttls = {}
+    for item in spec.split(','):
+        if item.strip():
+            tool, _, seconds = item.partition('=')
+            ttls[tool.strip()] = float(seconds)
+    return ttls
+
+
+class ToolCache:
+    """Read-through cache of tool results, shared by all chat sessions of an agent.
+
+    Results are keyed by account, tool name and the validated arguments
+    (defaults filled in, keys sorted), so calls that differ only in spelling
+    share an entry and accounts never see each other's results. Each
+    tool has its own TTL, and at most ``max_entries`` results are kept, least
+    recently used evicted first. Identical calls that arrive while one is
+    running wait for that call instead of starting their own; once every
+    caller waiting for it has given up, the call is cancelled. A write tool
+    invalidates its account's entries of its server both before and after it
+    runs, and a read that was in flight during the write is not stored.
+
+    All methods run on the agent's event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries: int = 512, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries: OrderedDict[Tuple[str, str, str], Tuple[float, Tuple[str, str], Any]] = OrderedDict()
+        self._pending: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._waiters: Dict[Tuple[str, str, str], int] = defaultdict(int) # Callers waiting for each pending call
+        self._generations: Dict[Tuple[str, str], int] = defaultdict(int) # By (account, server)
+        self._epoch = 0 # Advanced when every entry is dropped at once
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0, 'coalesced': 0})
+        self.invalidations = 0
+
+    @staticmethod
+    def key(tool_name: str, arguments: Dict[str, Any], account: str = '') -> Tuple[str, str, str]:
+        return account, tool_name, json.dumps(arguments, sort_keys=True, separators=(',', ':'), default=str)
+
+    async def call(self, tool_name: str, server: str, arguments: Dict[str, Any],
+                   load: Callable[[], Awaitable[Any]], cacheable: Callable[[Any], bool] = lambda result: True,
+                   account: str = '') -> Tuple[Any, str]:
+        """Return the tool's result and how it was obtained: 'hit', 'coalesced', 'miss', 'write' or 'uncached'.
+
+        Args:
+            tool_name (str): Registered tool name.
+            server (str): Server the tool belongs to; write tools invalidate their server's entries.
+            arguments (dict): Validated tool arguments.
+            load (callable): Runs the tool; awaited at most once for concurrent identical calls.
+            cacheable (callable): Whether a result may be stored (failed calls should not be).
+            account (str): Google account the tool runs as ('' for the default account).
+        """
+        scope = (account, server)
+        if tool_name in WRITE_TOOLS:
+            self.invalidate(server, account)
+            try:
+                return await load(), 'write'
+            finally:
+                self.invalidate(server, account)
+
+        ttl = self.ttls.get(tool_name, 0)
+        if ttl <= 0 or self.max_entries <= 0:
+            return await load(), 'uncached'
+
+        stats = self._stats[tool_name]
+        key = self.key(tool_name, arguments, account)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                stats['hits'] += 1
+                return entry[2], 'hit'
+            del self._entries[key]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            stats['coalesced'] += 1
+            return await self._wait(key, pending), 'coalesced'
+
+        stats['misses'] += 1
+        generation = (self._epoch, self._generations.get(scope, 0))
+        task = asyncio.ensure_future(load())
+        self._pending[key] = task
+        result = await self._wait(key, task)
+
+        if (self._epoch, self._generations.get(scope, 0)) == generation and cacheable(result):
+            self._entries[key] = (time.monotonic() + ttl, scope, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result, 'miss'
+
+    async def _wait(self, key: Tuple[str, str, str], task: asyncio.Future) -> Any:
+        """Wait for a pending call; the last waiter to leave, done or not, forgets it."""
+        self._waiters[key] += 1
+        try:
+            # Shielded so that a waiter timing out does not cancel the call for the others
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._pending[key]
+                # Nobody waits for the call any more, so stop it (a stuck MCP worker is then restarted)
+                task.cancel()
+
+    def invalidate(self, server: Optional[str] = None, account: str = '') -> None:
+        """Drop the cached results of one server for one account, or of all servers and accounts."""
+        if server is None:
+            self._epoch += 1
+            self._generations.clear()
+            self._entries.clear()
+        else:
+            scope = (account, server)
+            self._generations[scope] += 1
+            for key in [key for key, entry in self._entries.items() if entry[1] == scope]:
+                del self._entries[key]
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and coalesced call counts and the hit rate of each cached tool."""
+        tools = {}
+        for tool_name, counts in sorted(self._stats.items()):
+            calls = counts['hits'] + counts['misses'] + counts['coalesced']
+            tools[tool_name] = {
+                **counts,
+                'hit_rate': round((counts['hits'] + counts['coalesced']) / calls, 3) if calls else 0.0,
+                'ttl_seconds': self.ttls.get(tool_name, 0),
+            }
+        return {'entries': len(self._entries), 'max_entries': self.max_entries, 'invalidations': self.invalidations, 'tools': tools}
@@ -0,0 +1,250 @@
+import contextvars
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from productivity_assistant.tools.service_pool import ServicePool
+
+logger = logging.getLogger(__name__)
+
+# The account of a single-user deployment; its token files and stores keep their original, unsuffixed names
+DEFAULT_ACCOUNT = ''
+
+# Account IDs made only of these characters are used as-is in file names; others are replaced by a hash
+_SAFE_ACCOUNT = re.compile(r'[A-Za-z0-9_.@+-]{1,64}')
+
+_current_account: contextvars.ContextVar[str] = contextvars.ContextVar('google_account', default=DEFAULT_ACCOUNT)
+
+
+def current_account() -> str:
+    """The account whose Google credentials, services and stores tool calls in this context use."""
+    return _current_account.get()
+
+
+@contextmanager
+def use_account(account: str | None):
+    """Runs a `with` block as `account` (None or '' meaning the default account)."""
+    token = _current_account.set(account or DEFAULT_ACCOUNT)
+    try:
+        yield
+    finally:
+        _current_account.reset(token)
+
+
+def account_suffix(account: str) -> str:
+    """
+    Suffix that makes the file names of an account's token files and stores unique.
+
+    The default account has none, so existing single-user files keep working.
+    """
+    if account == DEFAULT_ACCOUNT:
+        return ''
+    if _SAFE_ACCOUNT.fullmatch(account):
+        return f'_{account}'
+    # '=' never appears in a safe ID, so a hashed ID cannot collide with one
+    return '_=' + hashlib.sha256(account.encode('utf-8')).hexdigest()[:24]
+
+
+def account_path(path: str, account: str) -> str:
+    """The per-account variant of a store path, e.g. 'mailbox_alice@example.com.sqlite3'."""
+    root, extension = os.path.splitext(path)
+    return f'{root}{account_suffix(account)}{extension}'
+
+
+def _request_account() -> str:
+    """The account named in the `_meta` of the MCP request being served, if any, else the current one."""
+    from mcp.server.lowlevel.server import request_ctx
+
+    try:
+        meta = request_ctx.get().meta
+    except LookupError:
+        return current_account()
+    account = getattr(meta, 'account', None) if meta is not None else None
+    return account if isinstance(account, str) else current_account()
+
+
+def account_tool(func):
+    """
+    Wraps a tool for FastMCP so that it runs as the account its caller names.
+
+    A client passes the account as `_meta={'account': ...}` of the tools/call
+    request (as MCPWorkerPool does); called in-process, the tool uses the
+    caller's current account. The wrapper keeps the tool's signature and
+    docstring, from which FastMCP derives its schema.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_account(_request_account()):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class _Account:
+    __slots__ = ('services', 'state', 'last_used', 'active')
+
+    def __init__(self, services: ServicePool, state) -> None:
+        self.services = services
+        self.state = state
+        self.last_used = time.monotonic()
+        self.active = 0 # Checkouts in progress; an account is never evicted while it has any
+
+
+_registries: 'weakref.WeakSet[AccountRegistry]' = weakref.WeakSet()
+
+
+class AccountRegistry:
+    """
+    Per-account Google API services (and tool state) of one tool, built lazily and evicted when idle.
+
+    Each account gets its own ServicePool, whose services are authorized with
+    that account's credentials only, and optionally a state object made by
+    `state_factory(account)` (e.g. its local stores). The registry keeps at
+    most `max_accounts` accounts and `max_services` built services; beyond
+    either, the least recently used accounts without a call in progress are
+    evicted. Accounts unused for `idle_timeout` seconds are evicted as well.
+    Evicting an account closes its services' HTTP connections and passes its
+    state to `on_evict(account, state)`; its next call builds them again.
+    """
+
+    SWEEP_INTERVAL = 60 # Seconds between checks for idle accounts
+
+    def __init__(self, name: str, service_factory, state_factory=None, on_evict=None, pool_size: int = 8,
+                 max_accounts: int = 32, max_services: int = 64, idle_timeout: float = 900.0) -> None:
+        self.name = name
+        self._service_factory = service_factory
+        self._state_factory = state_factory
+        self._on_evict = on_evict
+        self.pool_size = pool_size
+        self.max_accounts = max_accounts
+        self.max_services = max_services
+        self.idle_timeout = idle_timeout
+        self._accounts: dict[str, _Account] = {} # Least recently used first
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stopped = threading.Event()
+        self.evictions = 0
+        _registries.add(self)
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a service of the current account for the duration of a `with` block."""
+        account_id = current_account()
+        account = self._acquire(account_id)
+        try:
+            with account.services.checkout() as service:
+                yield service
+        finally:
+            with self._lock:
+                account.active -= 1
+                account.last_used = time.monotonic()
+
+    def state(self):
+        """The state object of the current account."""
+        account_id = current_account()
+        account = self._acquire(account_id)
+        with self._lock:
+            account.active -= 1
+        return account.state
+
+    def _acquire(self, account_id: str) -> _Account:
+        evicted = []
+        with self._lock:
+            account = self._accounts.pop(account_id, None)
+            if account is None:
+                state = self._state_factory(account_id) if self._state_factory is not None else None
+                services = ServicePool(functools.partial(self._service_factory, account_id), max_size=self.pool_size)
+                account = _Account(services, state)
+                logger.info(f"Added {self.name} account {account_id or '(default)'}")
+            self._accounts[account_id] = account # Most recently used last
+            account.active += 1
+            account.last_used = time.monotonic()
+            # A new service may be built for this account, so make room for it among the others
+            evicted = self._evict_over_limits(reserve=1)
+        self._start_sweeper()
+        self._close(evicted)
+        return account
+
+    def _total_services(self) -> int:
+        return sum(account.services.size for account in self._accounts.values())
+
+    def _evict_over_limits(self, reserve: int = 0) -> list[tuple[str, _Account]]:
+        evicted = []
+        for account_id, account in list(self._accounts.items()):
+            over = len(self._accounts) > self.max_accounts or self._total_services() + reserve > self.max_services
+            if not over:
+                break
+            if account.active == 0:
+                evicted.append((account_id, self._accounts.pop(account_id)))
+        return evicted
+
+    def evict_idle(self) -> int:
+        """Evicts the accounts unused for `idle_timeout` seconds; returns how many were evicted."""
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            evicted = [(account_id, account) for account_id, account in self._accounts.items()
+                       if account.active == 0 and account.last_used < deadline]
+            for account_id, _ in evicted:
+                del self._accounts[account_id]
+        self._close(evicted)
+        return len(evicted)
+
+    def evict(self, account_id: str) -> bool:
+        """Evicts one account, unless it has a call in progress."""
+        with self._lock:
+            account = self._accounts.get(account_id)
+            if account is None or account.active:
+                return False
+            del self._accounts[account_id]
+        self._close([(account_id, account)])
+        return True
+
+    def _close(self, evicted: list[tuple[str, _Account]]) -> None:
+        for account_id, account in evicted:
+            self.evictions += 1
+            logger.info(f"Evicted {self.name} account {account_id or '(default)'}")
+            try:
+                account.services.close()
+                if self._on_evict is not None:
+                    self._on_evict(account_id, account.state)
+            except Exception as e:
+                logger.warning(f"Could not release {self.name} account {account_id or '(default)'}: {e}")
+
+    def _start_sweeper(self) -> None:
+        if self._sweeper is None and self.idle_timeout > 0:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name=f'{self.name}-account-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stopped.wait(min(self.SWEEP_INTERVAL, self.idle_timeout)):
+            self.evict_idle()
+
+    def close(self) -> None:
+        """Stops the idle sweeper and evicts every account without a call in progress."""
+        self._stopped.set()
+        with self._lock:
+            evicted = [(account_id, account) for account_id, account in self._accounts.items() if account.active == 0]
+            for account_id, _ in evicted:
+                del self._accounts[account_id]
+        self._close(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'accounts': len(self._accounts),
+                'max_accounts': self.max_accounts,
+                'services': self._total_services(),
+                'max_services': self.max_services,
+                'active_calls': sum(account.active for account in self._accounts.values()),
+                'evictions': self.evictions,
+            }
+
+
+def registry_stats() -> dict:
+    """Stats of every account registry in this process, by name."""
+    return {registry.name: registry.stats() for registry in list(_registries)}
@@ -0,0 +1,30 @@
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from productivity_assistant.tools.accounts import account_suffix
+from productivity_assistant.tools.calendar_tool import CalendarTool
+from productivity_assistant.tools.gmail_tool import GmailTool
+from productivity_assistant.tools.google_api_service import create_service
+
+
+def authorize_account(client_secret_file: str, account: str) -> None:
+    """
+    Authorizes an account for Calendar and Gmail in a browser and stores its token files.
+
+    Servers never open the OAuth flow for an account other than the default one
+    (see CredentialManager), so accounts served with ACCOUNT_SCOPE=user are
+    authorized with this beforehand, under the name their users sign in with.
+    """
+    for tool in (CalendarTool, GmailTool):
+        create_service(client_secret_file, tool.API_NAME, tool.API_VERSION, tool.SCOPES,
+                       prefix=account_suffix(account), interactive=True)
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    if len(sys.argv) != 2:
+        raise SystemExit('Usage: python -m productivity_assistant.tools.authorize_account <account>')
+    authorize_account(os.getenv('GOOGLE_API_CLIENT_SECRET_FILE'), sys.argv[1])
+    print(f'Authorized {sys.argv[1]}')
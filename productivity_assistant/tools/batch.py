@@ -0,0 +1,75 @@
+import time
+
+from productivity_assistant.tools.request_executor import RequestExecutor, is_quota_error, is_retryable
+
+
+def execute_batch(service, requests: list, chunk_size: int = 50, retries: int = 1, backoff: float = 0.5,
+                  executor: RequestExecutor | None = None, idempotent: bool = True, send_counts: list | None = None) -> list:
+    """
+    Executes API requests as Google batch HTTP requests.
+
+    Each batch HTTP request is a single round trip carrying up to `chunk_size`
+    requests. Requests that fail with a retryable status (rate limits, server
+    errors) are sent again in a follow-up batch; other failures are returned
+    as-is so callers can decide what to do with a partial result. Requests
+    that are not idempotent are only sent again after a quota error, since
+    a server error leaves unknown whether they took effect.
+
+    With an `executor`, each batch HTTP request is sent through it (counting
+    every request it carries against the rate limit and retrying the batch as
+    a whole on retryable errors), quota errors of individual requests shrink
+    its concurrency limit, and follow-up batches wait its jittered backoff.
+
+    Args:
+        service: The Google API resource the requests were built from.
+        requests (list): Unexecuted `HttpRequest` objects (e.g. `service.users().messages().get(...)`).
+        chunk_size (int): Maximum number of requests per batch HTTP request.
+        retries (int): How many follow-up batches to send for retryable failures.
+        backoff (float): Seconds to wait before the first retry, doubled on each further retry.
+        executor (RequestExecutor): Optional rate-limiting executor of the API.
+        idempotent (bool): False for requests such as inserts, which (alone or as a batch) are then only resent after quota errors.
+        send_counts (list): Optional empty list, filled with how many times each request was sent.
+
+    Returns:
+        list: One `(response, exception)` tuple per request, in the order of `requests`.
+    """
+    results = [(None, None)] * len(requests)
+    pending = list(range(len(requests)))
+    sends = [0] * len(requests)
+
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(executor.backoff(attempt - 1) if executor is not None else backoff * 2 ** (attempt - 1))
+
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+
+            def callback(request_id, response, exception):
+                results[int(request_id)] = (response, exception)
+
+            batch = service.new_batch_http_request(callback=callback)
+            for index in chunk:
+                batch.add(requests[index], request_id=str(index))
+
+            def send(batch=batch, chunk=chunk):
+                for index in chunk:
+                    sends[index] += 1
+                batch.execute()
+
+            if executor is not None:
+                executor.call(send, cost=len(chunk), idempotent=idempotent)
+                # A round trip over quota backs off once, however many of its requests were throttled
+                throttled = next((results[index][1] for index in chunk if is_quota_error(results[index][1])), None)
+                if throttled is not None:
+                    executor.record_failure(throttled)
+            else:
+                send()
+
+        should_retry = is_retryable if idempotent else is_quota_error
+        pending = [index for index in pending if should_retry(results[index][1])]
+        if not pending:
+            break
+
+    if send_counts is not None:
+        send_counts.extend(sends)
+    return results
@@ -0,0 +1,76 @@
+import threading
+from collections import OrderedDict
+
+
+class BodyCache:
+    """
+    In-memory LRU cache of decoded message bodies, bounded by their total size.
+
+    Bodies are keyed by message ID; Gmail message contents never change, so
+    entries only leave the cache when it is full. Size is counted in
+    characters, and a body larger than the whole cache is not kept.
+    """
+
+    def __init__(self, max_chars: int = 16_000_000) -> None:
+        self.max_chars = max_chars
+        self._bodies = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            return message_id in self._bodies
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, message_id: str) -> str | None:
+        with self._lock:
+            body = self._bodies.get(message_id)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(message_id)
+            self.hits += 1
+            return body
+
+    def put(self, message_id: str, body: str) -> None:
+        if len(body) > self.max_chars:
+            return
+        with self._lock:
+            previous = self._bodies.pop(message_id, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._bodies[message_id] = body
+            self._size += len(body)
+            while self._size > self.max_chars:
+                _, evicted = self._bodies.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class AccountBodyCache:
+    """
+    One account's view of a BodyCache shared by several accounts.
+
+    Keys are scoped to the account, so an account never sees another's
+    bodies, while all accounts together stay within the shared cache's size.
+    """
+
+    def __init__(self, cache: BodyCache, account: str) -> None:
+        self.cache = cache
+        self.account = account
+
+    def __contains__(self, message_id: str) -> bool:
+        return (self.account, message_id) in self.cache
+
+    def get(self, message_id: str) -> str | None:
+        return self.cache.get((self.account, message_id))
+
+    def put(self, message_id: str, body: str) -> None:
+        self.cache.put((self.account, message_id), body)
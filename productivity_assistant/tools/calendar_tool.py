@@ -1,31 +1,104 @@
 from datetime import datetime, timedelta
 import json
+import logging
+import threading
+import time
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from productivity_assistant.models import (
+    CalendarEvents, CalendarAddResult, DeleteResult,
+    NewCalendarEvent, BulkCalendarAddResult, BulkDeleteResult, FreeSlot, FreeSlots,
+)
+from productivity_assistant.tools.accounts import DEFAULT_ACCOUNT, AccountRegistry, account_path, account_suffix
+from productivity_assistant.tools.batch import execute_batch
+from productivity_assistant.tools.converters import calendar_events, to_calendar_events
+from productivity_assistant.tools.credential_manager import locked_file
+from productivity_assistant.tools.event_store import EventStore, to_timestamp
+from productivity_assistant.tools.google_api_service import release_credentials
+from productivity_assistant.tools.pagination import PageIterator
+from productivity_assistant.tools.request_executor import api_error, error_status, get_request_executor, is_quota_error, is_retryable
+from productivity_assistant.tools.slot_finder import find_free_slots, parse_time_of_day, rank_slots
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_failure(error: Exception) -> CalendarAddResult:
+    """
+    The result of an insert that failed with `error`.
+
+    After a server error or dropped connection the event may have been created
+    anyway, so it is reported as unknown rather than sent again.
+    """
+    if is_retryable(error) and not is_quota_error(error):
+        message = f"Unknown whether the event was created ({error}); check the calendar before trying again"
+    else:
+        message = str(error)
+    return CalendarAddResult(event_id="", success=False, message=message)
+
+
+def _deleted_earlier(error: Exception, sends: int) -> bool:
+    """Whether a delete sent `sends` times failed only because an earlier attempt had already deleted the event."""
+    return sends > 1 and error_status(error) in (404, 410)
+
+
+class CalendarAccount:
+    """The local event store of one account and when it was last synced."""
+
+    def __init__(self, event_store: EventStore | None) -> None:
+        self.event_store = event_store
+        self.sync_lock = threading.Lock()
+        self.last_sync = None
 
-from productivity_assistant.models import CalendarEvent, CalendarEvents, CalendarAddResult, DeleteResult
 
 class CalendarTool:
     API_NAME = 'calendar'
     API_VERSION = 'v3'
     SCOPES = ["https://www.googleapis.com/auth/calendar"]
+    SYNC_INTERVAL = 30 # Seconds the local event store is served without asking Calendar for changes
+    SYNC_PAGE_SIZE = 250
+    BATCH_SIZE = 50 # Requests per Calendar batch HTTP request (Google recommends at most 50)
+    LIST_PAGE_SIZE = 250 # Events requested per page when listing or searching through the API
+    SEARCH_LOOKBACK = timedelta(days=30) # Default range of search_calendar_events around now
+    SEARCH_LOOKAHEAD = timedelta(days=365)
 
-    def __init__(self, client_secret_file: str, create_service_func) -> None:
+    def __init__(self, client_secret_file: str, create_service_func, event_store: EventStore | None = None, pool_size: int = 8,
+                 max_accounts: int = 32, max_services: int = 64, account_idle_timeout: float = 900.0) -> None:
         self.client_secret_file = client_secret_file
         self.create_service_func = create_service_func # Store the passed function
-        self._service = None # Lazy load the service
+        # Services are built lazily, one per concurrent call, from the credentials of the calling account (see accounts)
+        self._services = AccountRegistry(self.API_NAME, self._build_service, self._new_account, self._release_account, pool_size=pool_size,
+                                         max_accounts=max_accounts, max_services=max_services, idle_timeout=account_idle_timeout)
+        self._requests = get_request_executor(self.API_NAME) # Rate limits and retries every Calendar request
         self.today = datetime.now()
         self.delta = timedelta(days=7)
-    
+        self._event_store = event_store # Optional local event store of the default account; other accounts get their own file
+
     @property
-    def service(self):
-        """Lazy load the service only when needed."""
-        if self._service is None:
-            self._service = self.create_service_func( # Use the stored function
-                self.client_secret_file,
-                self.API_NAME,
-                self.API_VERSION,
-                self.SCOPES
-            )
-        return self._service
+    def event_store(self) -> EventStore | None:
+        """The local event store of the current account."""
+        return self._services.state().event_store
+
+    def _new_account(self, account: str) -> CalendarAccount:
+        if account == DEFAULT_ACCOUNT or self._event_store is None:
+            return CalendarAccount(self._event_store)
+        return CalendarAccount(EventStore(account_path(self._event_store.path, account)))
+
+    def _release_account(self, account: str, state: CalendarAccount) -> None:
+        release_credentials(self.API_NAME, self.API_VERSION, prefix=account_suffix(account))
+
+    def _build_service(self, account: str):
+        return self.create_service_func( # Use the stored function
+            self.client_secret_file,
+            self.API_NAME,
+            self.API_VERSION,
+            self.SCOPES,
+            prefix=account_suffix(account) # Each account authorizes with its own token file
+        )
+
+    def account_stats(self) -> dict:
+        return self._services.stats()
 
     def create_calendar_event(self, summary: str, description: str, start_time: str, end_time: str, attendees: list[str] = None, timezone: str = 'America/Los_Angeles') -> CalendarAddResult:
         """
@@ -42,26 +115,51 @@ class CalendarTool:
         Returns:
             CalendarAddResult: A Pydantic model indicating success or failure and event details.
         """
-        event = {
-            'summary': summary,
-            'description': description,
-            'start': {
-                'dateTime': start_time,
-                'timeZone': timezone,
-            },
-            'end': {
-                'dateTime': end_time,
-                'timeZone': timezone,
-            },
-        }
-        if attendees:
-            event['attendees'] = [{'email': email} for email in attendees]
+        event = self._event_body(summary, description, start_time, end_time, attendees, timezone)
 
         try:
-            event = self.service.events().insert(calendarId='primary', body=event, sendUpdates='all').execute()
+            with self._services.checkout() as service:
+                event = self._requests.execute(service.events().insert(calendarId='primary', body=event, sendUpdates='all'), idempotent=False)
+            if self.event_store is not None:
+                self.event_store.upsert_events([event])
             return CalendarAddResult(event_id=event.get('id'), success=True, message="Event created")
         except Exception as e:
-            return CalendarAddResult(event_id="", success=False, message=str(e))
+            return _insert_failure(e)
+
+    def bulk_create_calendar_events(self, events: list[NewCalendarEvent]) -> BulkCalendarAddResult:
+        """
+        Creates several calendar events at once, sent as Calendar batch requests.
+
+        Args:
+            events (list[NewCalendarEvent]): The events to create.
+
+        Returns:
+            BulkCalendarAddResult: A Pydantic model with one result per event, in the order given.
+        """
+        bodies = [
+            self._event_body(event.summary, event.description, event.start_time, event.end_time, event.attendees, event.timezone)
+            for event in events
+        ]
+        try:
+            with self._services.checkout() as service:
+                requests = [service.events().insert(calendarId='primary', body=body, sendUpdates='all') for body in bodies]
+                responses = execute_batch(service, requests, chunk_size=self.BATCH_SIZE, executor=self._requests, idempotent=False)
+        except Exception as e:
+            results = [_insert_failure(e) for _ in events]
+            return BulkCalendarAddResult(succeeded=0, failed=len(results), results=results)
+
+        results = []
+        created = []
+        for created_event, error in responses:
+            if error is not None:
+                results.append(_insert_failure(error))
+                continue
+            created.append(created_event)
+            results.append(CalendarAddResult(event_id=created_event.get('id'), success=True, message="Event created"))
+
+        if self.event_store is not None and created:
+            self.event_store.upsert_events(created)
+        return BulkCalendarAddResult(succeeded=len(created), failed=len(results) - len(created), results=results)
 
     def list_calendar_events(self, max_results: int = 10, time_min: str = None, time_max: str = None) -> CalendarEvents:
         """
@@ -81,102 +179,209 @@ class CalendarTool:
         if not time_max:
             time_max = (datetime.utcnow() + timedelta(days=7)).isoformat() + 'Z'
 
+        if self.event_store is not None and self._sync_events():
+            try:
+                events = self.event_store.events_between(to_timestamp(time_min), to_timestamp(time_max), max_results)
+                return calendar_events(events)
+            except Exception as e:
+                return CalendarEvents(count=0, events=[], next_page_token=None, error=api_error(e))
+
         try:
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            events = events_result.get('items', [])
-            next_page_token = events_result.get('nextPageToken')
-
-            if not events:
-                return CalendarEvents(count=0, events=[], next_page_token=None)
-
-            events_list = []
-            for event_data in events:
-                # Ensure organizer and attendees are handled correctly
-                organizer = event_data.get('organizer', {})
-                attendees_data = event_data.get('attendees', [])
-
-                # Create CalendarEvent instance with proper validation
-                event = CalendarEvent(
-                    id=event_data.get('id'),
-                    name=event_data.get('summary', 'No Title'),
-                    status=event_data.get('status'),
-                    description=event_data.get('description'),
-                    html_link=event_data.get('htmlLink'),
-                    created=event_data.get('created'),
-                    updated=event_data.get('updated'),
-                    organizer_name=organizer.get('displayName', organizer.get('email')),
-                    organizer_email=organizer.get('email'),
-                    start_time=event_data.get('start', {}).get('dateTime'),
-                    end_time=event_data.get('end', {}).get('dateTime'),
-                    location=event_data.get('location'),
-                    time_zone=event_data.get('start', {}).get('timeZone'),
-                    attendees=[{'email': att.get('email'), 'display_name': att.get('displayName'), 'response_status': att.get('responseStatus')} for att in attendees_data]
-                )
-                events_list.append(event)
-            
-            return CalendarEvents(count=len(events_list), events=events_list, next_page_token=next_page_token)
+            return self._list_from_api(max_results, timeMin=time_min, timeMax=time_max)
         except Exception as e:
-            # For simplicity, returning an empty list on error. 
-            # In a real app, you'd want more robust error handling.
-            return CalendarEvents(count=0, events=[], next_page_token=None)
+            # Report the failure rather than an empty calendar, so the model does not mistake one for the other
+            return CalendarEvents(count=0, events=[], next_page_token=None, error=api_error(e))
 
-    def search_calendar_events(self, query: str, max_results: int = 10) -> CalendarEvents:
+    def search_calendar_events(self, query: str, max_results: int = 10, time_min: str = None, time_max: str = None) -> CalendarEvents:
         """
         Searches for calendar events matching a query.
 
         Args:
             query (str): The search query string.
             max_results (int): Maximum number of events to return.
+            time_min (str): Start of the searched range in ISO format. Defaults to SEARCH_LOOKBACK before now.
+            time_max (str): End of the searched range in ISO format. Defaults to SEARCH_LOOKAHEAD after now.
 
         Returns:
             CalendarEvents: A Pydantic model of matching events.
         """
+        if not time_min:
+            time_min = (datetime.utcnow() - self.SEARCH_LOOKBACK).isoformat() + 'Z'
+        if not time_max:
+            time_max = (datetime.utcnow() + self.SEARCH_LOOKAHEAD).isoformat() + 'Z'
+
+        if self.event_store is not None and self._sync_events():
+            try:
+                events = self.event_store.search(query, max_results, to_timestamp(time_min), to_timestamp(time_max))
+                return calendar_events(events)
+            except Exception as e:
+                return CalendarEvents(count=0, events=[], next_page_token=None, error=api_error(e))
+
         try:
-            events_result = self.service.events().list(
-                calendarId='primary',
-                q=query,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            events = events_result.get('items', [])
-            next_page_token = events_result.get('nextPageToken')
-
-            if not events:
-                return CalendarEvents(count=0, events=[], next_page_token=None)
-            
-            events_list = []
-            for event_data in events:
-                organizer = event_data.get('organizer', {})
-                attendees_data = event_data.get('attendees', [])
-                event = CalendarEvent(
-                    id=event_data.get('id'),
-                    name=event_data.get('summary', 'No Title'),
-                    status=event_data.get('status'),
-                    description=event_data.get('description'),
-                    html_link=event_data.get('htmlLink'),
-                    created=event_data.get('created'),
-                    updated=event_data.get('updated'),
-                    organizer_name=organizer.get('displayName', organizer.get('email')),
-                    organizer_email=organizer.get('email'),
-                    start_time=event_data.get('start', {}).get('dateTime'),
-                    end_time=event_data.get('end', {}).get('dateTime'),
-                    location=event_data.get('location'),
-                    time_zone=event_data.get('start', {}).get('timeZone'),
-                    attendees=[{'email': att.get('email'), 'display_name': att.get('displayName'), 'response_status': att.get('responseStatus')} for att in attendees_data]
+            return self._list_from_api(max_results, q=query, timeMin=time_min, timeMax=time_max)
+        except Exception as e:
+            return CalendarEvents(count=0, events=[], next_page_token=None, error=api_error(e))
+
+    def find_free_slots(self, attendees: list[str] = None, duration_minutes: int = 60, time_min: str = None, time_max: str = None,
+                        timezone: str = 'America/Los_Angeles', working_hours_start: str = '09:00', working_hours_end: str = '17:00',
+                        include_weekends: bool = False, max_results: int = 5) -> FreeSlots:
+        """
+        Finds times when the user and the given attendees are all free, using Calendar's free/busy query.
+
+        Args:
+            attendees (list[str]): Optional emails of other people who must be free. The user's own calendar is always included.
+            duration_minutes (int): Length of the meeting in minutes.
+            time_min (str): Start of the searched range in ISO format. Defaults to now.
+            time_max (str): End of the searched range in ISO format. Defaults to 7 days from now.
+            timezone (str): Timezone in which working hours apply (e.g., 'America/Los_Angeles').
+            working_hours_start (str): Start of working hours as 'HH:MM'.
+            working_hours_end (str): End of working hours as 'HH:MM'.
+            include_weekends (bool): Whether to search Saturdays and Sundays.
+            max_results (int): Maximum number of slots to return.
+
+        Returns:
+            FreeSlots: A Pydantic model of candidate slots, best first.
+        """
+        try:
+            tz = ZoneInfo(timezone)
+            start = self._parse_bound(time_min, tz) if time_min else datetime.now(tz)
+            end = self._parse_bound(time_max, tz) if time_max else start + timedelta(days=7)
+            calendar_ids = ['primary'] + [email for email in attendees or [] if email != 'primary']
+
+            with self._services.checkout() as service:
+                response = self._requests.execute(service.freebusy().query(body={
+                    'timeMin': start.isoformat(),
+                    'timeMax': end.isoformat(),
+                    'timeZone': timezone,
+                    'items': [{'id': calendar_id} for calendar_id in calendar_ids],
+                }))
+
+            busy = []
+            unavailable = []
+            for calendar_id, calendar in response.get('calendars', {}).items():
+                if calendar.get('errors'):
+                    unavailable.append(calendar_id)
+                    continue
+                busy.extend(
+                    (datetime.fromisoformat(block['start']), datetime.fromisoformat(block['end']))
+                    for block in calendar.get('busy', [])
                 )
-                events_list.append(event)
 
-            return CalendarEvents(count=len(events_list), events=events_list, next_page_token=next_page_token)
+            slots = find_free_slots(
+                busy, start, end, timedelta(minutes=duration_minutes), tz,
+                day_start=parse_time_of_day(working_hours_start),
+                day_end=parse_time_of_day(working_hours_end),
+                include_weekends=include_weekends,
+            )
+            free_slots = [
+                FreeSlot(
+                    start_time=slot_start.astimezone(tz).isoformat(),
+                    end_time=slot_end.astimezone(tz).isoformat(),
+                    free_until=free_until.astimezone(tz).isoformat(),
+                )
+                for slot_start, slot_end, free_until in rank_slots(slots)[:max_results]
+            ]
+            return FreeSlots(count=len(free_slots), slots=free_slots, unavailable_calendars=unavailable)
         except Exception as e:
-            return CalendarEvents(count=0, events=[], next_page_token=None)
+            return FreeSlots(count=0, slots=[], error=api_error(e))
+
+    @staticmethod
+    def _parse_bound(value: str, tz) -> datetime:
+        """Parses an ISO date-time, reading it in `tz` if it has no offset."""
+        parsed = datetime.fromisoformat(value)
+        return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=tz)
+
+    def _list_from_api(self, max_results: int, **params) -> CalendarEvents:
+        """Lists up to `max_results` events across as many pages as needed, converting each page while the next is fetched."""
+        with self._services.checkout() as service:
+            def fetch_page(page_token, page_size):
+                return self._requests.execute(service.events().list(
+                    calendarId='primary',
+                    maxResults=page_size,
+                    pageToken=page_token,
+                    singleEvents=True,
+                    orderBy='startTime',
+                    **params
+                ))
+
+            pages = PageIterator(fetch_page, limit=max_results, page_size=self.LIST_PAGE_SIZE)
+            events_list = to_calendar_events(pages)
+
+        return CalendarEvents(count=len(events_list), events=events_list, next_page_token=pages.next_page_token)
+
+    @staticmethod
+    def _event_body(summary: str, description: str, start_time: str, end_time: str, attendees: list[str] | None, timezone: str) -> dict:
+        """Builds the Calendar API body of a new event."""
+        event = {
+            'summary': summary,
+            'description': description,
+            'start': {
+                'dateTime': start_time,
+                'timeZone': timezone,
+            },
+            'end': {
+                'dateTime': end_time,
+                'timeZone': timezone,
+            },
+        }
+        if attendees:
+            event['attendees'] = [{'email': email} for email in attendees]
+        return event
+
+    def _sync_events(self) -> bool:
+        """
+        Brings the local event store up to date, at most once per SYNC_INTERVAL.
+
+        Processes sharing the store file (e.g. MCP server workers) take turns
+        through a lock file next to it, and skip a sync another one just made.
+
+        Returns:
+            bool: True if the store is current and can answer reads, False if syncing failed.
+        """
+        account = self._services.state()
+        with account.sync_lock:
+            if account.last_sync is not None and time.monotonic() - account.last_sync < self.SYNC_INTERVAL:
+                return True
+
+            try:
+                with locked_file(account.event_store.path + '.sync.lock'):
+                    synced_at = account.event_store.get_state('synced_at')
+                    if synced_at is None or time.time() - float(synced_at) >= self.SYNC_INTERVAL:
+                        sync_token = account.event_store.get_state('sync_token')
+                        try:
+                            self._pull_events(sync_token)
+                        except HttpError as e:
+                            if sync_token is None or error_status(e) != 410:
+                                raise
+                            # Google invalidated the sync token, so start over with a full sync
+                            self._pull_events(None)
+                        account.event_store.set_state('synced_at', str(time.time()))
+            except Exception as e:
+                logger.warning(f"Calendar sync failed, falling back to the Calendar API: {e}")
+                return False
+
+            account.last_sync = time.monotonic()
+            return True
+
+    def _pull_events(self, sync_token: str | None) -> None:
+        """Runs a full sync (no token) or an incremental sync from `sync_token` and stores the next token."""
+        params = {'calendarId': 'primary', 'singleEvents': True}
+        if sync_token:
+            params['syncToken'] = sync_token
+
+        with self._services.checkout() as service:
+            pages = PageIterator(
+                lambda page_token, page_size: self._requests.execute(service.events().list(pageToken=page_token, maxResults=page_size, **params)),
+                page_size=self.SYNC_PAGE_SIZE
+            )
+            changed = list(pages)
+        response = pages.last_response
+
+        if sync_token:
+            self.event_store.apply_changes(changed)
+        else:
+            self.event_store.replace_events(changed)
+        self.event_store.set_state('sync_token', response['nextSyncToken'])
 
     def delete_calendar_event(self, event_id: str) -> DeleteResult:
         """
@@ -188,12 +393,60 @@ class CalendarTool:
         Returns:
             DeleteResult: A Pydantic model indicating success or failure.
         """
+        sends = 0
+
+        def delete():
+            nonlocal sends
+            sends += 1
+            return request.execute()
+
         try:
-            self.service.events().delete(calendarId='primary', eventId=event_id).execute()
+            with self._services.checkout() as service:
+                request = service.events().delete(calendarId='primary', eventId=event_id)
+                try:
+                    self._requests.call(delete)
+                except HttpError as e:
+                    # A retry after a server error finds the event already gone if the first attempt went through
+                    if not _deleted_earlier(e, sends):
+                        raise
+            if self.event_store is not None:
+                self.event_store.delete_events([event_id])
             return DeleteResult(status="success", message=f"Event with ID '{event_id}' deleted successfully.")
         except Exception as e:
             return DeleteResult(status="error", message=str(e))
 
+    def bulk_delete_calendar_events(self, event_ids: list[str]) -> BulkDeleteResult:
+        """
+        Deletes several calendar events at once, sent as Calendar batch requests.
+
+        Args:
+            event_ids (list[str]): The IDs of the events to delete.
+
+        Returns:
+            BulkDeleteResult: A Pydantic model with one result per event ID, in the order given.
+        """
+        try:
+            with self._services.checkout() as service:
+                requests = [service.events().delete(calendarId='primary', eventId=event_id) for event_id in event_ids]
+                send_counts = []
+                responses = execute_batch(service, requests, chunk_size=self.BATCH_SIZE, executor=self._requests, send_counts=send_counts)
+        except Exception as e:
+            results = [DeleteResult(status="error", message=str(e)) for _ in event_ids]
+            return BulkDeleteResult(succeeded=0, failed=len(results), results=results)
+
+        results = []
+        deleted = []
+        for event_id, (_, error), sends in zip(event_ids, responses, send_counts):
+            if error is not None and not _deleted_earlier(error, sends):
+                results.append(DeleteResult(status="error", message=f"Event with ID '{event_id}' was not deleted: {error}"))
+                continue
+            deleted.append(event_id)
+            results.append(DeleteResult(status="success", message=f"Event with ID '{event_id}' deleted successfully."))
+
+        if self.event_store is not None and deleted:
+            self.event_store.delete_events(deleted)
+        return BulkDeleteResult(succeeded=len(deleted), failed=len(results) - len(deleted), results=results)
+
     def add_attendees_to_event(self, event_id: str, attendees: list[str]) -> CalendarAddResult:
         """
         Adds attendees to an existing calendar event.
@@ -206,25 +459,28 @@ class CalendarTool:
             CalendarAddResult: A Pydantic model indicating success or failure and event details.
         """
         try:
-            # First, get the existing event to preserve existing attendees
-            event = self.service.events().get(calendarId='primary', eventId=event_id).execute()
+            with self._services.checkout() as service:
+                # First, get the existing event to preserve existing attendees
+                event = self._requests.execute(service.events().get(calendarId='primary', eventId=event_id))
 
-            # Get the current list of attendees, or initialize a new list if none
-            current_attendees = event.get('attendees', [])
+                # Get the current list of attendees, or initialize a new list if none
+                current_attendees = event.get('attendees', [])
             
-            # Add new attendees to the list
-            for email in attendees:
-                current_attendees.append({'email': email})
+                # Add new attendees to the list
+                for email in attendees:
+                    current_attendees.append({'email': email})
 
-            # Update the event with the new list of attendees
-            updated_event_body = {'attendees': current_attendees}
+                # Update the event with the new list of attendees
+                updated_event_body = {'attendees': current_attendees}
             
-            updated_event = self.service.events().patch(
-                calendarId='primary',
-                eventId=event_id,
-                body=updated_event_body,
-                sendUpdates='all'
-            ).execute()
+                updated_event = self._requests.execute(service.events().patch(
+                    calendarId='primary',
+                    eventId=event_id,
+                    body=updated_event_body,
+                    sendUpdates='all'
+                ))
+            if self.event_store is not None:
+                self.event_store.upsert_events([updated_event])
 
             return CalendarAddResult(event_id=updated_event.get('id'), success=True, message="Attendees added successfully")
         except Exception as e:
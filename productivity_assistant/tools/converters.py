@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+from pydantic import AliasChoices, AliasPath, Field, TypeAdapter
+
+from productivity_assistant.models import Attendee, CalendarEvent, CalendarEvents, EmailItem, EmailItems
+
+
+def _api_field(name: str, *paths, default=...):
+    """A field validated from its own name or, failing that, from the first of `paths` present in a raw API item."""
+    return Field(default, validation_alias=AliasChoices(name, *(AliasPath(*path) if isinstance(path, tuple) else path for path in paths)))
+
+
+class _ApiAttendee(Attendee):
+    """An Attendee validated straight from an attendee of a raw Calendar API event."""
+    display_name: str | None = _api_field('display_name', 'displayName', default=None)
+    response_status: str | None = _api_field('response_status', 'responseStatus', default=None)
+
+
+class _ApiCalendarEvent(CalendarEvent):
+    """
+    A CalendarEvent validated straight from a raw Calendar API event.
+
+    The aliases let pydantic-core pick the fields out of the nested payload
+    itself, so no intermediate dict is built per event or attendee. Instances
+    serialize exactly like CalendarEvent.
+    """
+    name: str = _api_field('name', 'summary', default='No Title')
+    description: str | None = None
+    html_link: str = _api_field('html_link', 'htmlLink')
+    organizer_name: str = _api_field('organizer_name', ('organizer', 'displayName'), ('organizer', 'email'))
+    organizer_email: str = _api_field('organizer_email', ('organizer', 'email'))
+    start_time: str = _api_field('start_time', ('start', 'dateTime'))
+    end_time: str = _api_field('end_time', ('end', 'dateTime'))
+    location: str | None = None
+    time_zone: str = _api_field('time_zone', ('start', 'timeZone'))
+    attendees: list[_ApiAttendee] = Field(default_factory=list)
+
+
+# Validate a whole page of items in one call into pydantic-core
+_EVENTS = TypeAdapter(list[_ApiCalendarEvent])
+_EMAIL_ITEMS = TypeAdapter(list[EmailItem])
+
+EMAIL_HEADERS = ('Subject', 'From', 'Date') # Headers an EmailItem is built from
+
+_MONTHS = {month: number for number, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+_ZONES: dict[str, timezone] = {}
+
+
+def to_calendar_events(raw_events) -> list[CalendarEvent]:
+    """
+    Converts raw Calendar API events (any iterable, e.g. a PageIterator) into CalendarEvents.
+
+    Raises:
+        pydantic.ValidationError: If an event lacks a required field.
+    """
+    return _EVENTS.validate_python(raw_events if isinstance(raw_events, list) else list(raw_events))
+
+
+def calendar_events(raw_events, next_page_token: str | None = None) -> CalendarEvents:
+    """A page of raw Calendar API events as CalendarEvents."""
+    events = to_calendar_events(raw_events)
+    return CalendarEvents(count=len(events), events=events, next_page_token=next_page_token)
+
+
+def header_index(headers: list[dict], names=EMAIL_HEADERS) -> dict[str, str]:
+    """The first value of each of `names` among a message's headers, found in a single pass."""
+    found = {}
+    for header in headers:
+        name = header['name']
+        if name in names and name not in found:
+            found[name] = header['value']
+    return found
+
+
+def _parse_canonical_date(value: str) -> datetime:
+    """Parses the usual 'Mon, 1 Dec 2025 09:00:00 +0000 (UTC)' form; raises for anything else."""
+    parts = value.split()
+    if parts[0].endswith(','):
+        del parts[0]
+    day, month, year, clock, zone = parts[:5]
+    if len(year) != 4:
+        raise ValueError(f'Not a four-digit year: {year}') # Two-digit years need email.utils' interpretation
+    hour, minute, second = clock.split(':')
+    tz = _ZONES.get(zone)
+    if tz is None:
+        if len(zone) != 5 or zone[0] not in '+-':
+            raise ValueError(f'Not a numeric time zone: {zone}')
+        offset = timedelta(hours=int(zone[1:3]), minutes=int(zone[3:5]))
+        tz = _ZONES[zone] = timezone(-offset if zone[0] == '-' else offset)
+    return datetime(int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second), tzinfo=tz)
+
+
+@lru_cache(maxsize=8192)
+def parse_date_header(value: str) -> datetime | None:
+    """
+    Parses an RFC 2822 Date header, or returns None if it cannot be parsed.
+
+    The common form is parsed directly; others (obsolete zone names, missing
+    seconds) go through email.utils. Results are cached, since the same
+    messages are converted again whenever the mailbox is listed or synced.
+    """
+    try:
+        return _parse_canonical_date(value)
+    except (KeyError, ValueError, IndexError):
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    # '-0000' means UTC with no local time zone given
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def email_item_fields(message_id: str, msg_data: dict) -> dict:
+    """The EmailItem fields of a message fetched with format='metadata', as a dict."""
+    headers = header_index(msg_data['payload']['headers'])
+    date_header = headers.get('Date')
+    date = parse_date_header(date_header.strip()) if date_header else None
+    return {
+        'id': message_id,
+        'subject': headers.get('Subject', 'No Subject'),
+        'sender': headers.get('From', 'Unknown Sender'),
+        'date': date or datetime.now(), # Fallback
+        'body': msg_data.get('snippet', ''),
+    }
+
+
+def to_email_items(messages: list[dict]) -> list[EmailItem]:
+    """Converts messages fetched with format='metadata' into EmailItems."""
+    return _EMAIL_ITEMS.validate_python([email_item_fields(message['id'], message) for message in messages])
+
+
+def email_items(messages: list[dict]) -> EmailItems:
+    """A page of messages fetched with format='metadata' as EmailItems."""
+    items = to_email_items(messages)
+    return EmailItems(count=len(items), messages=items)
@@ -0,0 +1,190 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def locked_file(path: str):
+    """Holds an exclusive, cross-process lock on `path` for the duration of a `with` block."""
+    with open(path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AccountNotAuthorized(Exception):
+    """An account has no usable token file, and authorizing it in a browser on this host is not allowed."""
+
+
+def _utcnow() -> datetime:
+    # google-auth stores expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CredentialManager:
+    """
+    Keeps the OAuth credentials of one token file fresh for every tool and process on a host.
+
+    A background thread refreshes the access token REFRESH_MARGIN seconds before
+    it expires, so requests never wait for an OAuth round trip. The token file
+    is only read and written under a cross-process lock; before refreshing, the
+    manager re-reads the file and adopts a token another process has already
+    refreshed instead of refreshing it again. Services built from `get()` share
+    one Credentials object, which is updated in place.
+
+    Without a usable token file, an `interactive` manager runs the OAuth flow in
+    a browser on this host; any other raises AccountNotAuthorized, so a server
+    never blocks on a flow nobody can complete.
+    """
+
+    REFRESH_MARGIN = 600 # Seconds before expiry at which the token is refreshed
+    RETRY_INTERVAL = 30 # Seconds between attempts after a failed refresh
+
+    def __init__(self, client_secret_file: str, token_file_path: str, scopes: list[str], interactive: bool = True) -> None:
+        self.client_secret_file = client_secret_file
+        self.token_file_path = token_file_path
+        self.lock_file_path = token_file_path + '.lock'
+        self.scopes = scopes
+        self.interactive = interactive
+        self._credentials = None
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._stopped = threading.Event()
+
+    def get(self):
+        """Returns valid credentials, authorizing interactively (if allowed) the first time there is no token file."""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load_or_authorize()
+            elif self._needs_refresh(self._credentials, margin=0):
+                # The background refresh fell behind; this is the only case where a caller pays for it
+                self._refresh()
+            self._start_refresher()
+            return self._credentials
+
+    def reset(self) -> None:
+        """Forgets the cached credentials so the next `get()` loads or authorizes them again."""
+        with self._lock:
+            self._credentials = None
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _needs_refresh(self, credentials, margin: float) -> bool:
+        if not credentials.token or credentials.expiry is None:
+            return not credentials.token
+        return (credentials.expiry - _utcnow()).total_seconds() <= margin
+
+    def _read_token_file(self):
+        from google.oauth2.credentials import Credentials
+
+        if not os.path.exists(self.token_file_path):
+            return None
+        return Credentials.from_authorized_user_file(self.token_file_path, self.scopes)
+
+    def _write_token_file(self, credentials) -> None:
+        # Write to a temporary file first so readers in other processes never see a partial token
+        temporary_path = f'{self.token_file_path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as token:
+            token.write(credentials.to_json())
+        os.replace(temporary_path, self.token_file_path)
+
+    def _load_or_authorize(self):
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+
+        with locked_file(self.lock_file_path):
+            credentials = self._read_token_file()
+            if credentials and credentials.valid and not self._needs_refresh(credentials, self.REFRESH_MARGIN):
+                return credentials
+
+            if credentials and credentials.refresh_token:
+                credentials.refresh(Request())
+            elif not self.interactive:
+                raise AccountNotAuthorized(f"Google account not authorized: no token in {os.path.basename(self.token_file_path)}")
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(self.client_secret_file, self.scopes)
+                credentials = flow.run_local_server(port=0)
+            self._write_token_file(credentials)
+            return credentials
+
+    def _refresh(self) -> None:
+        """Refreshes the shared credentials in place, reusing another process's refresh if there is one."""
+        from google.auth.transport.requests import Request
+
+        credentials = self._credentials
+        with locked_file(self.lock_file_path):
+            stored = self._read_token_file()
+            if stored and stored.token != credentials.token and not self._needs_refresh(stored, self.REFRESH_MARGIN):
+                credentials.token = stored.token
+                credentials.expiry = stored.expiry
+                logger.info(f"Adopted token refreshed by another process for {os.path.basename(self.token_file_path)}")
+                return
+
+            credentials.refresh(Request())
+            self._write_token_file(credentials)
+            logger.info(f"Refreshed token for {os.path.basename(self.token_file_path)}")
+
+    def _start_refresher(self) -> None:
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._refresh_loop, name='oauth-refresher', daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped.is_set():
+            credentials = self._credentials
+            if credentials is None or credentials.expiry is None:
+                return # Tokens without an expiry never need refreshing
+
+            wait = (credentials.expiry - _utcnow()).total_seconds() - self.REFRESH_MARGIN
+            if wait > 0:
+                self._stopped.wait(wait)
+                continue
+
+            try:
+                with self._lock:
+                    self._refresh()
+            except Exception as e:
+                logger.warning(f"Background token refresh failed, retrying in {self.RETRY_INTERVAL}s: {e}")
+                self._stopped.wait(self.RETRY_INTERVAL)
+
+
+_managers: dict[str, CredentialManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_credential_manager(client_secret_file: str, token_file_path: str, scopes: list[str],
+                           interactive: bool = True) -> CredentialManager:
+    """Returns the process-wide manager for a token file, creating it on first use."""
+    with _managers_lock:
+        manager = _managers.get(token_file_path)
+        if manager is None:
+            manager = _managers[token_file_path] = CredentialManager(client_secret_file, token_file_path, scopes, interactive)
+        return manager
+
+
+def discard_credential_manager(token_file_path: str) -> None:
+    """Stops and forgets the manager of a token file, if there is one; the token file itself is kept."""
+    with _managers_lock:
+        manager = _managers.pop(token_file_path, None)
+    if manager is not None:
+        manager.stop()
@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+DEFAULT_EVENT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'calendar.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    search_text TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events (start_ts);
+CREATE INDEX IF NOT EXISTS idx_events_end ON events (end_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def to_timestamp(value: str) -> float:
+    """Converts an RFC 3339 date-time or an all-day 'YYYY-MM-DD' date to a UTC timestamp."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _event_time(boundary: dict) -> float:
+    return to_timestamp(boundary.get('dateTime') or boundary['date'])
+
+
+def _search_text(event: dict) -> str:
+    """Text matched by local search: the fields Calendar's own `q` search looks at."""
+    organizer = event.get('organizer', {})
+    fields = [event.get('summary'), event.get('description'), event.get('location'),
+              organizer.get('displayName'), organizer.get('email')]
+    for attendee in event.get('attendees', []):
+        fields.extend([attendee.get('displayName'), attendee.get('email')])
+    return '\n'.join(field for field in fields if field).lower()
+
+
+class EventStore:
+    """
+    Persistent SQLite store of raw Google Calendar events indexed by start and end time.
+
+    CalendarTool keeps the store current with Calendar's syncToken flow and
+    writes through its own changes, so time-window listings and keyword
+    searches can be answered locally. Events are kept as the raw API payload
+    so they convert exactly like events fetched from the API. The connection is
+    shared between threads and guarded by a lock.
+    """
+
+    UPSERT = 'INSERT OR REPLACE INTO events (id, start_ts, end_ts, search_text, data) VALUES (?, ?, ?, ?, ?)'
+
+    def __init__(self, path: str = DEFAULT_EVENT_STORE_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _rows(events: list[dict]) -> list[tuple]:
+        return [
+            (event['id'], _event_time(event['start']), _event_time(event['end']), _search_text(event), json.dumps(event))
+            for event in events
+        ]
+
+    def get_state(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def upsert_events(self, events: list[dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(self.UPSERT, self._rows(events))
+
+    def delete_events(self, event_ids: list[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM events WHERE id = ?', [(event_id,) for event_id in event_ids])
+
+    def apply_changes(self, events: list[dict]) -> None:
+        """Applies an incremental sync page: cancelled events are removed, the rest upserted."""
+        cancelled = [(event['id'],) for event in events if event.get('status') == 'cancelled']
+        active = [event for event in events if event.get('status') != 'cancelled']
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM events WHERE id = ?', cancelled)
+            self._conn.executemany(self.UPSERT, self._rows(active))
+
+    def replace_events(self, events: list[dict]) -> None:
+        """Replaces all stored events (used by a full sync)."""
+        active = [event for event in events if event.get('status') != 'cancelled']
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM events')
+            self._conn.executemany(self.UPSERT, self._rows(active))
+
+    def events_between(self, start_ts: float, end_ts: float, limit: int) -> list[dict]:
+        """Returns events overlapping [start_ts, end_ts), ordered by start time."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM events WHERE end_ts > ? AND start_ts < ? ORDER BY start_ts LIMIT ?',
+                (start_ts, end_ts, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def search(self, query: str, limit: int, start_ts: float | None = None, end_ts: float | None = None) -> list[dict]:
+        """Returns events containing every term of `query`, optionally overlapping [start_ts, end_ts), ordered by start time."""
+        terms = query.lower().split()
+        conditions = ['instr(search_text, ?) > 0'] * len(terms)
+        params = list(terms)
+        if start_ts is not None:
+            conditions.append('end_ts > ?')
+            params.append(start_ts)
+        if end_ts is not None:
+            conditions.append('start_ts < ?')
+            params.append(end_ts)
+        where = ' AND '.join(conditions) or '1'
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT data FROM events WHERE {where} ORDER BY start_ts LIMIT ?', (*params, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -1,29 +1,98 @@
+import contextvars
 import json
-import base64
-from datetime import datetime
-from productivity_assistant.models import EmailItem, EmailItems, MessageBody
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from googleapiclient.errors import HttpError
+from productivity_assistant.models import ApiError, EmailItem, EmailItems, MessageBody
+from productivity_assistant.tools.accounts import DEFAULT_ACCOUNT, AccountRegistry, account_path, account_suffix
+from productivity_assistant.tools.batch import execute_batch
+from productivity_assistant.tools.converters import to_email_items
+from productivity_assistant.tools.body_cache import AccountBodyCache, BodyCache
+from productivity_assistant.tools.credential_manager import locked_file
+from productivity_assistant.tools.google_api_service import release_credentials
+from productivity_assistant.tools.mailbox_store import MailboxStore
+from productivity_assistant.tools.message_index import MessageIndex
+from productivity_assistant.tools.mime import extract_body
+from productivity_assistant.tools.request_executor import api_error, error_status, get_request_executor
+
+logger = logging.getLogger(__name__)
+
+
+class GmailAccount:
+    """The local mailbox, body cache and message index of one account, and when its mailbox was last synced."""
+
+    def __init__(self, mailbox_store: MailboxStore | None, body_cache, message_index: MessageIndex | None) -> None:
+        self.mailbox_store = mailbox_store
+        self.body_cache = body_cache
+        self.message_index = message_index
+        self.sync_lock = threading.Lock()
+        self.last_sync = None
+
 
 class GmailTool:
     API_NAME = 'gmail'
     API_VERSION = 'v1'
     SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"] # Readonly scope for now
+    METADATA_HEADERS = ['Subject', 'From', 'Date']
+    BATCH_SIZE = 50 # Gmail allows 100 requests per batch, but recommends at most 50
+    SYNC_INTERVAL = 30 # Seconds the local mailbox is served without asking Gmail for new history
+    SYNC_WINDOW = 100 # Number of most recent messages mirrored locally by a full sync
+    HIDDEN_LABELS = {'SPAM', 'TRASH'} # Messages with these labels are not part of the listed mailbox
+    PREFETCH_LIMIT = 10 # Bodies prefetched after one listing, most recent messages first
 
-    def __init__(self, client_secret_file: str, create_service_func) -> None:
+    def __init__(self, client_secret_file: str, create_service_func, mailbox_store: MailboxStore | None = None, pool_size: int = 8,
+                 body_cache: BodyCache | None = None, prefetch_bodies: bool = False, message_index: MessageIndex | None = None,
+                 max_accounts: int = 32, max_services: int = 64, account_idle_timeout: float = 900.0) -> None:
         self.client_secret_file = client_secret_file
         self.create_service_func = create_service_func
-        self._service = None # Lazy load the service
-    
+        # Services are built lazily, one per concurrent call, from the credentials of the calling account (see accounts)
+        self._services = AccountRegistry(self.API_NAME, self._build_service, self._new_account, self._release_account, pool_size=pool_size,
+                                         max_accounts=max_accounts, max_services=max_services, idle_timeout=account_idle_timeout)
+        self._requests = get_request_executor(self.API_NAME) # Rate limits and retries every Gmail request
+        # The stores and caches below belong to the default account; other accounts get their own files and cache keys
+        self._mailbox_store = mailbox_store # Optional local mailbox cache
+        self._body_cache = body_cache # Optional in-memory cache of decoded bodies, shared by all accounts
+        self.prefetch_bodies = prefetch_bodies # Fetch the bodies of listed messages in the background
+        self._message_index = message_index # Optional full-text index of every message seen
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gmail-prefetch')
+
+    @property
+    def mailbox_store(self) -> MailboxStore | None:
+        return self._services.state().mailbox_store
+
     @property
-    def service(self):
-        """Lazy load the service only when needed."""
-        if self._service is None:
-            self._service = self.create_service_func(
-                self.client_secret_file,
-                self.API_NAME,
-                self.API_VERSION,
-                self.SCOPES
-            )
-        return self._service
+    def body_cache(self):
+        return self._services.state().body_cache
+
+    @property
+    def message_index(self) -> MessageIndex | None:
+        return self._services.state().message_index
+
+    def _new_account(self, account: str) -> GmailAccount:
+        if account == DEFAULT_ACCOUNT:
+            return GmailAccount(self._mailbox_store, self._body_cache, self._message_index)
+        return GmailAccount(
+            MailboxStore(account_path(self._mailbox_store.path, account)) if self._mailbox_store is not None else None,
+            AccountBodyCache(self._body_cache, account) if self._body_cache is not None else None,
+            MessageIndex(account_path(self._message_index.path, account)) if self._message_index is not None else None,
+        )
+
+    def _release_account(self, account: str, state: GmailAccount) -> None:
+        release_credentials(self.API_NAME, self.API_VERSION, prefix=account_suffix(account))
+
+    def _build_service(self, account: str):
+        return self.create_service_func(
+            self.client_secret_file,
+            self.API_NAME,
+            self.API_VERSION,
+            self.SCOPES,
+            prefix=account_suffix(account) # Each account authorizes with its own token file
+        )
+
+    def account_stats(self) -> dict:
+        return self._services.stats()
 
     def list_messages(self, max_results: int = 10, query: str = '') -> 'EmailItems':
         """
@@ -36,42 +105,175 @@ class GmailTool:
         Returns:
             EmailItems: A Pydantic model of message metadata.
         """
+        if not query and self.mailbox_store is not None and max_results <= self.SYNC_WINDOW:
+            local = self._list_from_store(max_results)
+            if local is not None:
+                self._schedule_prefetch([msg.id for msg in local.messages])
+                return local
+
         try:
-            response = self.service.users().messages().list(userId='me', q=query, maxResults=max_results).execute()
-            messages = response.get('messages', [])
-            
-            messages_list = []
-            for msg in messages:
-                msg_data = self.service.users().messages().get(userId='me', id=msg['id'], format='metadata').execute()
-                headers = msg_data['payload']['headers']
-                
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
-                date_str = next((h['value'] for h in headers if h['name'] == 'Date'), None)
-                
-                # Robust date parsing
-                if date_str:
-                    try:
-                        # Remove timezone name in parentheses
-                        if ' (' in date_str:
-                            date_str = date_str.split(' (')[0]
-                        date = datetime.strptime(date_str.strip(), '%a, %d %b %Y %H:%M:%S %z')
-                    except ValueError:
-                        date = datetime.now() # Fallback
-                else:
-                    date = datetime.now()
-
-
-                messages_list.append(EmailItem(
-                    id=msg['id'],
-                    subject=subject,
-                    sender=sender,
-                    date=date,
-                    body=msg_data.get('snippet', '')
-                ))
+            with self._services.checkout() as service:
+                response = self._requests.execute(service.users().messages().list(userId='me', q=query, maxResults=max_results))
+                messages = self._fetch_metadata(service, [msg['id'] for msg in response.get('messages', [])])
+            messages_list = to_email_items(messages)
+            self._index_messages(messages)
+            self._schedule_prefetch([msg.id for msg in messages_list])
             return EmailItems(count=len(messages_list), messages=messages_list)
         except Exception as e:
-            return EmailItems(count=0, messages=[])
+            # Report the failure rather than an empty inbox, so the model does not mistake one for the other
+            return EmailItems(count=0, messages=[], error=api_error(e))
+
+    def search_messages_local(self, query: str, max_results: int = 10) -> 'EmailItems':
+        """
+        Searches the emails already seen (listed, synced or read) without contacting Gmail.
+
+        Args:
+            query (str): Free-text search terms, matched against subject, sender, snippet and any body already read.
+            max_results (int): Maximum number of messages to return.
+
+        Returns:
+            EmailItems: A Pydantic model of matching messages, best match first.
+        """
+        if self.message_index is None:
+            return EmailItems(count=0, messages=[], error=ApiError(reason='disabled', message='The local message index is disabled; use list-messages with a query instead.'))
+        try:
+            messages_list = [item for item, _ in self.message_index.search(query, max_results)]
+            return EmailItems(count=len(messages_list), messages=messages_list)
+        except Exception as e:
+            logger.warning(f"Local message search failed: {e}")
+            return EmailItems(count=0, messages=[], error=api_error(e))
+
+    def _index_messages(self, messages: list[dict], removed: list[str] = ()) -> None:
+        """Adds fetched message metadata to the full-text index and drops removed messages from it."""
+        if self.message_index is None:
+            return
+        try:
+            if messages:
+                self.message_index.add_messages(self._store_items(messages))
+            if removed:
+                self.message_index.remove_messages(list(removed))
+        except Exception as e:
+            logger.warning(f"Updating the message index failed: {e}")
+
+    def _fetch_metadata(self, service, message_ids: list[str]) -> list[dict]:
+        """Fetches message metadata in batch HTTP requests instead of one round trip per message, skipping failures."""
+        requests = [
+            service.users().messages().get(userId='me', id=message_id, format='metadata', metadataHeaders=self.METADATA_HEADERS)
+            for message_id in message_ids
+        ]
+        results = execute_batch(service, requests, chunk_size=self.BATCH_SIZE, executor=self._requests)
+
+        messages = []
+        for message_id, (msg_data, error) in zip(message_ids, results):
+            if error is not None:
+                logger.warning(f"Skipping message {message_id}: {error}")
+                continue
+            messages.append(msg_data)
+        return messages
+
+    def _list_from_store(self, max_results: int) -> EmailItems | None:
+        """Answers an unfiltered listing from the local mailbox, or returns None if it cannot."""
+        try:
+            self._sync_mailbox()
+        except Exception as e:
+            logger.warning(f"Mailbox sync failed, falling back to the Gmail API: {e}")
+            return None
+
+        store = self.mailbox_store
+        if store.count() < max_results and store.get_state('complete') != '1':
+            return None
+        messages_list = store.recent_messages(max_results)
+        return EmailItems(count=len(messages_list), messages=messages_list)
+
+    def _sync_mailbox(self) -> None:
+        """
+        Brings the local mailbox up to date, at most once per SYNC_INTERVAL.
+
+        Processes sharing the mailbox file (e.g. MCP server workers) take turns
+        through a lock file next to it, and skip a sync another one just made.
+        """
+        account = self._services.state()
+        with account.sync_lock:
+            if account.last_sync is not None and time.monotonic() - account.last_sync < self.SYNC_INTERVAL:
+                return
+            with locked_file(self.mailbox_store.path + '.sync.lock'):
+                synced_at = self.mailbox_store.get_state('synced_at')
+                if synced_at is None or time.time() - float(synced_at) >= self.SYNC_INTERVAL:
+                    self._pull_mailbox()
+                    self.mailbox_store.set_state('synced_at', str(time.time()))
+            account.last_sync = time.monotonic()
+
+    def _pull_mailbox(self) -> None:
+        """Runs an incremental sync from the stored historyId, or a full sync if there is none or it expired."""
+        history_id = self.mailbox_store.get_state('history_id')
+        with self._services.checkout() as service:
+            if history_id is None:
+                self._full_sync(service)
+            else:
+                try:
+                    self._incremental_sync(service, history_id)
+                except HttpError as e:
+                    if error_status(e) != 404:
+                        raise
+                    # The stored historyId has expired, so Gmail requires a full sync
+                    self._full_sync(service)
+
+    def _full_sync(self, service) -> None:
+        """Replaces the local mailbox with the SYNC_WINDOW most recent messages."""
+        # Read the historyId first so that changes made while listing are replayed by the next sync
+        profile = self._requests.execute(service.users().getProfile(userId='me'))
+        response = self._requests.execute(service.users().messages().list(userId='me', maxResults=self.SYNC_WINDOW))
+        messages = self._fetch_metadata(service, [msg['id'] for msg in response.get('messages', [])])
+
+        self.mailbox_store.replace_messages(self._store_items(messages))
+        self._index_messages(messages)
+        self.mailbox_store.set_state('complete', '0' if response.get('nextPageToken') else '1')
+        self.mailbox_store.set_state('history_id', str(profile['historyId']))
+
+    def _incremental_sync(self, service, history_id: str) -> None:
+        """Applies the mailbox changes recorded since `history_id`."""
+        added, removed = set(), set()
+        page_token = None
+        while True:
+            response = self._requests.execute(service.users().history().list(
+                userId='me',
+                startHistoryId=history_id,
+                historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+                pageToken=page_token
+            ))
+
+            # Replay the records in order so the last change to a message wins
+            for record in response.get('history', []):
+                for change in record.get('messagesAdded', []):
+                    added.add(change['message']['id'])
+                    removed.discard(change['message']['id'])
+                for change in record.get('labelsRemoved', []):
+                    if self.HIDDEN_LABELS.intersection(change.get('labelIds', [])):
+                        added.add(change['message']['id'])
+                        removed.discard(change['message']['id'])
+                for change in record.get('labelsAdded', []):
+                    if self.HIDDEN_LABELS.intersection(change.get('labelIds', [])):
+                        removed.add(change['message']['id'])
+                        added.discard(change['message']['id'])
+                for change in record.get('messagesDeleted', []):
+                    removed.add(change['message']['id'])
+                    added.discard(change['message']['id'])
+
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        messages = self._fetch_metadata(service, sorted(added))
+        hidden = {msg['id'] for msg in messages if self.HIDDEN_LABELS.intersection(msg.get('labelIds', []))}
+        visible = [msg for msg in messages if msg['id'] not in hidden]
+
+        self.mailbox_store.upsert_messages(self._store_items(visible))
+        self.mailbox_store.delete_messages(sorted(removed | hidden))
+        self._index_messages(visible, removed=sorted(removed | hidden))
+        self.mailbox_store.set_state('history_id', str(response['historyId']))
+
+    def _store_items(self, messages: list[dict]) -> list[tuple[EmailItem, int]]:
+        return list(zip(to_email_items(messages), [int(msg.get('internalDate', 0)) for msg in messages]))
 
     def get_message_body(self, message_id: str) -> 'MessageBody':
         """
@@ -83,27 +285,63 @@ class GmailTool:
         Returns:
             MessageBody: A Pydantic model containing the message body.
         """
+        body = self._cached_body(message_id)
+        if body is not None:
+            return MessageBody(status="success", body=body)
+
         try:
-            message = self.service.users().messages().get(userId='me', id=message_id, format='full').execute()
-            
-            # Helper to decode base64url data
-            def decode_data(data):
-                return base64.urlsafe_b64decode(data).decode('utf-8')
-
-            # Extract the plain text body part
-            payload = message['payload']
-            body_parts = []
-            if 'parts' in payload:
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/plain' and 'body' in part and 'data' in part['body']:
-                        body_parts.append(decode_data(part['body']['data']))
-            elif 'body' in payload and 'data' in payload['body']: # Fallback for messages without 'parts'
-                body_parts.append(decode_data(payload['body']['data']))
-
-            if body_parts:
-                return MessageBody(status="success", body="\n".join(body_parts))
-            else:
-                return MessageBody(status="success", body="No plain text body found.")
+            with self._services.checkout() as service:
+                message = self._requests.execute(service.users().messages().get(userId='me', id=message_id, format='full'))
+            body = self._remember_body(message_id, message)
+            return MessageBody(status="success", body=body)
+
+        except Exception as e:
+            return MessageBody(status="error", body=str(e), error=api_error(e))
+
+    def _cached_body(self, message_id: str) -> str | None:
+        """Looks a body up in memory, then in the local mailbox, promoting mailbox hits into memory."""
+        body = self.body_cache.get(message_id) if self.body_cache is not None else None
+        if body is None and self.mailbox_store is not None:
+            body = self.mailbox_store.get_body(message_id)
+            if body is not None and self.body_cache is not None:
+                self.body_cache.put(message_id, body)
+        return body
 
+    def _remember_body(self, message_id: str, message: dict) -> str:
+        """Decodes the body of a message fetched with format='full' and caches it."""
+        body = extract_body(message['payload'])
+        if body is None:
+            body = "No plain text body found."
+        if self.body_cache is not None:
+            self.body_cache.put(message_id, body)
+        if self.mailbox_store is not None:
+            self.mailbox_store.set_body(message_id, body)
+        if self.message_index is not None:
+            try:
+                self.message_index.add_body(message_id, body)
+            except Exception as e:
+                logger.warning(f"Indexing the body of {message_id} failed: {e}")
+        return body
+
+    def _schedule_prefetch(self, message_ids: list[str]) -> None:
+        """Starts fetching the bodies of just-listed messages in the background, if enabled."""
+        if not self.prefetch_bodies or self.body_cache is None:
+            return
+        missing = [message_id for message_id in message_ids[:self.PREFETCH_LIMIT] if message_id not in self.body_cache]
+        if missing:
+            # Run in a copy of the caller's context, so the bodies are fetched for the same account
+            self._prefetch_executor.submit(contextvars.copy_context().run, self._prefetch_bodies, missing)
+
+    def _prefetch_bodies(self, message_ids: list[str]) -> None:
+        try:
+            message_ids = [message_id for message_id in message_ids if self._cached_body(message_id) is None]
+            if not message_ids:
+                return
+            with self._services.checkout() as service:
+                requests = [service.users().messages().get(userId='me', id=message_id, format='full') for message_id in message_ids]
+                results = execute_batch(service, requests, chunk_size=self.BATCH_SIZE, executor=self._requests)
+            for message_id, (message, error) in zip(message_ids, results):
+                if error is None:
+                    self._remember_body(message_id, message)
         except Exception as e:
-            return MessageBody(status="error", body=str(e))
\ No newline at end of file
+            logger.warning(f"Body prefetch failed: {e}")
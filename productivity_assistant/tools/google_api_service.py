@@ -1,46 +1,94 @@
+import json
 import os
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
+from productivity_assistant.telemetry import TracedHttp, tracer
+from productivity_assistant.tools.credential_manager import discard_credential_manager, get_credential_manager
 
-def create_service(client_secret_file, api_name, api_version, *scopes, prefix=''):
+# Discovery documents of APIs not bundled with google-api-python-client are downloaded once and kept here
+DISCOVERY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'discovery')
+DISCOVERY_URL = 'https://www.googleapis.com/discovery/v1/apis/{api}/{apiVersion}/rest'
+
+
+def build_service(api_name, api_version, credentials=None, http=None):
+    """
+    Builds a Google API service without fetching its discovery document on the request path.
+
+    The discovery documents bundled with google-api-python-client (Gmail v1 and
+    Calendar v3 among them) are used directly. Other APIs are downloaded once
+    into DISCOVERY_CACHE_DIR and built from the cached copy afterwards.
+
+    Every HTTP request the service makes, batches included, is recorded as a
+    'google.http' span (see productivity_assistant.telemetry).
+    """
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.errors import UnknownApiNameOrVersion
+
+    if http is None:
+        from googleapiclient.http import build_http
+
+        if credentials is not None:
+            from google_auth_httplib2 import AuthorizedHttp
+
+            http = AuthorizedHttp(credentials, http=build_http())
+        else:
+            http = build_http()
+    http = TracedHttp(http, tracer)
+    credentials = None # Carried by the authorized http; googleapiclient rejects both
+
+    try:
+        return build(api_name, api_version, credentials=credentials, http=http, static_discovery=True)
+    except UnknownApiNameOrVersion:
+        pass
+
+    document_path = os.path.join(DISCOVERY_CACHE_DIR, f'{api_name}.{api_version}.json')
+    if not os.path.exists(document_path):
+        import requests
+
+        response = requests.get(DISCOVERY_URL.format(api=api_name, apiVersion=api_version), timeout=30)
+        response.raise_for_status()
+        os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+        with open(document_path, 'w') as document_file:
+            json.dump(response.json(), document_file)
+
+    with open(document_path) as document_file:
+        return build_from_document(json.load(document_file), credentials=credentials, http=http)
+
+
+def token_file_path(api_name, api_version, prefix=''):
+    """Path of the token file of an API, e.g. 'token_gmail_v1.json', or 'token_gmail_v1_<account>.json' with a prefix."""
+    token_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'token_files')
+    os.makedirs(token_path, exist_ok=True)
+    return os.path.join(token_path, f'token_{api_name}_{api_version}{prefix}.json')
+
+
+def create_service(client_secret_file, api_name, api_version, *scopes, prefix='', interactive=None):
     CLIENT_SECRET_FILE = client_secret_file
     API_SERVICE_NAME = api_name
     API_VERSION = api_version
     SCOPES = [scope for scope in scopes[0]]
-    
-    creds = None
-
-    working_dir = os.path.dirname(os.path.abspath(__file__))
-    token_dir = 'token_files'
-    token_file = f'token_{API_SERVICE_NAME}_{API_VERSION}{prefix}.json'
-    
-    token_path = os.path.join(working_dir, token_dir)
-    
-    if not os.path.exists(token_path):
-        os.makedirs(token_path, exist_ok=True)
-    
-    token_file_path = os.path.join(token_path, token_file)
-    
-    if os.path.exists(token_file_path):
-        creds = Credentials.from_authorized_user_file(token_file_path, SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        with open(token_file_path, 'w') as token:
-            token.write(creds.to_json())
-    
+
+    token_path = token_file_path(API_SERVICE_NAME, API_VERSION, prefix)
+
+    # Only the default account may open a browser to authorize on this host; other accounts
+    # are authorized beforehand (see productivity_assistant.tools.authorize_account)
+    if interactive is None:
+        interactive = not prefix
+
+    # One manager per token file keeps the access token fresh in the background and
+    # hands every service in this process the same credentials
+    credential_manager = get_credential_manager(CLIENT_SECRET_FILE, token_path, SCOPES, interactive)
+    creds = credential_manager.get()
+
     try:
-        service = build(API_SERVICE_NAME, API_VERSION, credentials=creds, static_discovery=False)
+        service = build_service(API_SERVICE_NAME, API_VERSION, credentials=creds)
         return service
     except Exception as e:
-        if os.path.exists(token_file_path):
-            os.remove(token_file_path)
-        raise e
\ No newline at end of file
+        credential_manager.reset()
+        if os.path.exists(token_path):
+            os.remove(token_path)
+        raise e
+
+
+def release_credentials(api_name, api_version, prefix=''):
+    """Stops refreshing the credentials of a token file and drops them from memory, e.g. when its account is evicted."""
+    discard_credential_manager(token_file_path(api_name, api_version, prefix))
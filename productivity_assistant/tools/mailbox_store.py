@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from productivity_assistant.models import EmailItem
+
+DEFAULT_MAILBOX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'mailbox.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    internal_date INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    date TEXT NOT NULL,
+    snippet TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_internal_date ON messages (internal_date DESC);
+CREATE TABLE IF NOT EXISTS bodies (
+    id TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class MailboxStore:
+    """
+    Persistent SQLite store of Gmail message metadata and decoded bodies.
+
+    The `messages` table mirrors the most recent part of the mailbox and is kept
+    current by GmailTool through Gmail's history API; `bodies` holds decoded
+    message bodies for any message that has been read, and `sync_state` holds
+    the last synced `historyId`. The connection is shared between threads and
+    guarded by a lock.
+    """
+
+    UPSERT = 'INSERT OR REPLACE INTO messages (id, internal_date, subject, sender, date, snippet) VALUES (?, ?, ?, ?, ?, ?)'
+
+    def __init__(self, path: str = DEFAULT_MAILBOX_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _rows(items: list[tuple[EmailItem, int]]) -> list[tuple]:
+        return [(item.id, internal_date, item.subject, item.sender, item.date.isoformat(), item.body) for item, internal_date in items]
+
+    def get_state(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_state(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+
+    def upsert_messages(self, items: list[tuple[EmailItem, int]]) -> None:
+        """Inserts or updates messages, given as (EmailItem, internalDate in ms) pairs."""
+        with self._lock, self._conn:
+            self._conn.executemany(self.UPSERT, self._rows(items))
+
+    def delete_messages(self, message_ids: list[str]) -> None:
+        rows = [(message_id,) for message_id in message_ids]
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM messages WHERE id = ?', rows)
+            self._conn.executemany('DELETE FROM bodies WHERE id = ?', rows)
+
+    def replace_messages(self, items: list[tuple[EmailItem, int]]) -> None:
+        """Replaces the stored mailbox window with `items` (used by a full sync)."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM messages')
+            self._conn.executemany(self.UPSERT, self._rows(items))
+
+    def recent_messages(self, limit: int) -> list[EmailItem]:
+        """Returns the most recent stored messages, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, subject, sender, date, snippet FROM messages ORDER BY internal_date DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [
+            EmailItem(id=row[0], subject=row[1], sender=row[2], date=datetime.fromisoformat(row[3]), body=row[4])
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def get_body(self, message_id: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute('SELECT body FROM bodies WHERE id = ?', (message_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_body(self, message_id: str, body: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO bodies (id, body) VALUES (?, ?)', (message_id, body))
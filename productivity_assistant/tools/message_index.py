@@ -0,0 +1,271 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from productivity_assistant.models import EmailItem
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'message_index.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_no INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT NOT NULL UNIQUE,
+    internal_date INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    date TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    has_body INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    terms TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT PRIMARY KEY,
+    doc_nos BLOB NOT NULL,
+    freqs BLOB NOT NULL
+);
+"""
+
+_TOKEN = re.compile(r'\w+')
+SUBJECT_WEIGHT = 2 # Subject terms count this many times, so a match there outranks one deep in a body
+MAX_FREQ = 0xFFFF # Term frequencies are stored as unsigned 16-bit integers
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class MessageIndex:
+    """
+    On-disk inverted index with BM25 ranking over the emails GmailTool has seen.
+
+    Every message listed or synced is indexed by subject, sender and snippet,
+    and re-indexed with its body once the body has been read. Each term's
+    postings are two compact arrays stored as SQLite blobs: ascending document
+    numbers (uint32) and term frequencies (uint16). A search reads only the
+    postings of its query terms, so it answers in milliseconds without the
+    network. Updates are applied incrementally, one read-modify-write per
+    affected term per batch. The connection is shared between threads and
+    guarded by a lock.
+
+    Several processes may share one index file. Every update runs in an
+    IMMEDIATE transaction, so writers in other processes wait for it instead
+    of interleaving their postings updates, and a search reads the document
+    count and lengths as of its own snapshot.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, k1: float = 1.2, b: float = 0.75) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        # Document lengths are needed for every scored posting, so they are kept in memory; a search
+        # reloads them when it meets a document another process has indexed since
+        self._lengths: dict[int, int] = {}
+        self._load_lengths()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    @contextmanager
+    def _write(self):
+        """Holds the lock and an IMMEDIATE transaction, committed when the `with` block succeeds."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    @staticmethod
+    def _term_counts(subject: str, sender: str, snippet: str, body: str | None) -> Counter:
+        counts = Counter(tokenize(subject))
+        for term in counts:
+            counts[term] *= SUBJECT_WEIGHT
+        counts.update(tokenize(sender))
+        counts.update(tokenize(snippet))
+        if body:
+            counts.update(tokenize(body))
+        return counts
+
+    def add_messages(self, items: list[tuple[EmailItem, int]]) -> None:
+        """Indexes messages given as (EmailItem, internalDate in ms) pairs; already indexed messages keep their body terms."""
+        with self._write():
+            known = self._existing([item.id for item, _ in items])
+            additions = []
+            for item, internal_date in items:
+                if item.id in known:
+                    continue # Message metadata never changes, and a re-index would drop the body terms
+                counts = self._term_counts(item.subject, item.sender, item.body, None)
+                additions.append(((item.id, internal_date, item.subject, item.sender, item.date.isoformat(), item.body, 0), counts))
+            self._insert(additions)
+
+    def add_body(self, message_id: str, body: str) -> None:
+        """Re-indexes an already indexed message with its body."""
+        with self._write():
+            row = self._conn.execute(
+                'SELECT doc_no, internal_date, subject, sender, date, snippet, has_body FROM docs WHERE message_id = ?', (message_id,)
+            ).fetchone()
+            if row is None or row[6]:
+                return
+            self._delete([row[0]])
+            counts = self._term_counts(row[2], row[3], row[5], body)
+            self._insert([((message_id, row[1], row[2], row[3], row[4], row[5], 1), counts)])
+
+    def remove_messages(self, message_ids: list[str]) -> None:
+        with self._write():
+            doc_nos = []
+            for start in range(0, len(message_ids), 900): # Stay below SQLite's bound parameter limit
+                chunk = message_ids[start:start + 900]
+                doc_nos.extend(row[0] for row in self._conn.execute(
+                    f'SELECT doc_no FROM docs WHERE message_id IN ({",".join("?" * len(chunk))})', chunk
+                ))
+            self._delete(doc_nos)
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[EmailItem, float]]:
+        """
+        Ranks indexed messages against `query` with BM25.
+
+        Args:
+            query (str): Free-text query; a message matches if it contains any query term.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (EmailItem, score) pairs, best match first.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            # One read transaction, so the postings, counts and documents all come from the same snapshot
+            self._conn.execute('BEGIN')
+            try:
+                doc_count, total_length = self._conn.execute('SELECT COUNT(*), SUM(length) FROM docs').fetchone()
+                if not doc_count:
+                    return []
+                placeholders = ','.join('?' * len(terms))
+                postings = self._conn.execute(
+                    f'SELECT doc_nos, freqs FROM postings WHERE term IN ({placeholders})', terms
+                ).fetchall()
+                length_factor = self.k1 * self.b * doc_count / total_length
+                base_norm = self.k1 * (1 - self.b)
+
+                try:
+                    scores = self._score(postings, doc_count, length_factor, base_norm)
+                except KeyError:
+                    self._load_lengths()
+                    scores = self._score(postings, doc_count, length_factor, base_norm)
+
+                best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+                if not best:
+                    return []
+                rows = {row[0]: row for row in self._conn.execute(
+                    f'SELECT doc_no, message_id, subject, sender, date, snippet FROM docs WHERE doc_no IN ({",".join("?" * len(best))})',
+                    [doc_no for doc_no, _ in best]
+                )}
+            finally:
+                self._conn.commit()
+        return [
+            (EmailItem(id=rows[doc_no][1], subject=rows[doc_no][2], sender=rows[doc_no][3],
+                       date=datetime.fromisoformat(rows[doc_no][4]), body=rows[doc_no][5]), score)
+            for doc_no, score in best
+        ]
+
+    def _score(self, postings: list[tuple[bytes, bytes]], doc_count: int, length_factor: float, base_norm: float) -> dict[int, float]:
+        """BM25 scores by doc_no; raises KeyError for a document whose length is not loaded."""
+        lengths = self._lengths
+        scores = defaultdict(float)
+        for doc_blob, freq_blob in postings:
+            doc_nos, freqs = array('I'), array('H')
+            doc_nos.frombytes(doc_blob)
+            freqs.frombytes(freq_blob)
+            weight = (self.k1 + 1) * math.log(1 + (doc_count - len(doc_nos) + 0.5) / (len(doc_nos) + 0.5))
+            for doc_no, freq in zip(doc_nos, freqs):
+                scores[doc_no] += weight * freq / (freq + base_norm + length_factor * lengths[doc_no])
+        return scores
+
+    def _load_lengths(self) -> None:
+        """Reads every document's length; caller holds the lock (or is the constructor)."""
+        self._lengths = dict(self._conn.execute('SELECT doc_no, length FROM docs'))
+
+    def _existing(self, message_ids: list[str]) -> set[str]:
+        known = set()
+        for start in range(0, len(message_ids), 900): # Stay below SQLite's bound parameter limit
+            chunk = message_ids[start:start + 900]
+            known.update(row[0] for row in self._conn.execute(
+                f'SELECT message_id FROM docs WHERE message_id IN ({",".join("?" * len(chunk))})', chunk
+            ))
+        return known
+
+    def _insert(self, additions: list[tuple[tuple, Counter]]) -> None:
+        """Adds documents and appends them to their terms' postings; caller holds the lock and transaction."""
+        new_postings = defaultdict(list)
+        for row, counts in additions:
+            length = sum(counts.values())
+            cursor = self._conn.execute(
+                'INSERT INTO docs (message_id, internal_date, subject, sender, date, snippet, has_body, length, terms) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (*row, length, ' '.join(counts))
+            )
+            self._lengths[cursor.lastrowid] = length
+            for term, count in counts.items():
+                new_postings[term].append((cursor.lastrowid, min(count, MAX_FREQ)))
+
+        # New document numbers are always the largest, so appending keeps every postings list sorted
+        for term, entries in new_postings.items():
+            doc_nos, freqs = self._load_postings(term)
+            doc_nos.extend(doc_no for doc_no, _ in entries)
+            freqs.extend(freq for _, freq in entries)
+            self._store_postings(term, doc_nos, freqs)
+
+    def _delete(self, doc_nos: list[int]) -> None:
+        """Removes documents and their postings entries; caller holds the lock and transaction."""
+        removals = defaultdict(list)
+        for doc_no in doc_nos:
+            row = self._conn.execute('SELECT length, terms FROM docs WHERE doc_no = ?', (doc_no,)).fetchone()
+            if row is None:
+                continue
+            self._conn.execute('DELETE FROM docs WHERE doc_no = ?', (doc_no,))
+            self._lengths.pop(doc_no, None)
+            for term in row[1].split():
+                removals[term].append(doc_no)
+
+        for term, removed in removals.items():
+            doc_nos, freqs = self._load_postings(term)
+            for doc_no in removed:
+                position = bisect_left(doc_nos, doc_no)
+                if position < len(doc_nos) and doc_nos[position] == doc_no:
+                    del doc_nos[position]
+                    del freqs[position]
+            if doc_nos:
+                self._store_postings(term, doc_nos, freqs)
+            else:
+                self._conn.execute('DELETE FROM postings WHERE term = ?', (term,))
+
+    def _load_postings(self, term: str) -> tuple[array, array]:
+        doc_nos, freqs = array('I'), array('H')
+        row = self._conn.execute('SELECT doc_nos, freqs FROM postings WHERE term = ?', (term,)).fetchone()
+        if row is not None:
+            doc_nos.frombytes(row[0])
+            freqs.frombytes(row[1])
+        return doc_nos, freqs
+
+    def _store_postings(self, term: str, doc_nos: array, freqs: array) -> None:
+        self._conn.execute('INSERT OR REPLACE INTO postings (term, doc_nos, freqs) VALUES (?, ?, ?)',
+                           (term, doc_nos.tobytes(), freqs.tobytes()))
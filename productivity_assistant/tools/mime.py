@@ -0,0 +1,96 @@
+import base64
+import re
+from html.parser import HTMLParser
+
+# Tags after which the text of an HTML body continues on a new line
+_BLOCK_TAGS = {'br', 'p', 'div', 'li', 'tr', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'hr'}
+_SKIPPED_TAGS = {'script', 'style', 'head', 'title'}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.chunks.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in _BLOCK_TAGS:
+            self.chunks.append('\n')
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.chunks.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Converts an HTML body to readable plain text: tags dropped, entities decoded, blocks on their own lines."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    text = ''.join(parser.chunks)
+    lines = (re.sub(r'[ \t\r\f\v\xa0]+', ' ', line).strip() for line in text.split('\n'))
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+
+def _charset(part: dict) -> str:
+    for header in part.get('headers', []):
+        if header['name'].lower() == 'content-type':
+            match = re.search(r'charset="?([\w.-]+)"?', header['value'], re.IGNORECASE)
+            if match:
+                return match.group(1)
+    return 'utf-8'
+
+
+def _decode(part: dict) -> str:
+    data = part['body']['data']
+    raw = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+    try:
+        return raw.decode(_charset(part), errors='replace')
+    except LookupError: # Unknown charset name
+        return raw.decode('utf-8', errors='replace')
+
+
+def _walk(part: dict, plain: list, html: list) -> None:
+    """Collects the inline text/plain and text/html parts of a MIME tree, depth first in document order."""
+    mime_type = part.get('mimeType', '')
+    if mime_type.startswith('multipart/') or part.get('parts'):
+        for child in part.get('parts', []):
+            _walk(child, plain, html)
+        return
+    if part.get('filename') or 'data' not in part.get('body', {}):
+        return # Attachments, and parts whose content must be fetched separately
+    if mime_type == 'text/plain':
+        plain.append(_decode(part))
+    elif mime_type == 'text/html':
+        html.append(_decode(part))
+
+
+def extract_body(payload: dict) -> str | None:
+    """
+    Extracts the readable body of a message fetched with format='full'.
+
+    Walks the whole MIME tree, so nested multipart/mixed, multipart/related
+    and multipart/alternative structures are handled. Plain-text parts are
+    preferred; if a message has none, its HTML parts are converted to text.
+
+    Args:
+        payload (dict): The message's `payload`.
+
+    Returns:
+        str | None: The body text, or None if the message has no text parts.
+    """
+    plain, html = [], []
+    _walk(payload, plain, html)
+    if plain:
+        return '\n'.join(plain)
+    if html:
+        return '\n'.join(html_to_text(text) for text in html)
+    return None
@@ -0,0 +1,83 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+# Shared by all iterators; a prefetch only ever waits on Google, never on another iterator
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='page-prefetch')
+
+
+class PageIterator:
+    """
+    Iterates over the items of a paginated Google API list call, one page at a time.
+
+    While the caller consumes (and typically converts) the items of one page,
+    the next page is already being fetched on a background thread. Each page
+    asks for no more than the items still needed to reach `limit`, so the last
+    page never over-fetches and no page is requested after the cap is reached.
+    When iteration stops at the cap, `next_page_token` resumes exactly after
+    the last item yielded.
+
+    Only one page request is in flight at a time, so `fetch_page` may use a
+    service object that is not thread-safe as long as the caller does not use
+    it while iterating.
+
+    Args:
+        fetch_page (Callable): Called as fetch_page(page_token, page_size) and returns the API response dict.
+        limit (int | None): Maximum number of items to yield in total; None for all of them.
+        page_size (int): Maximum number of items to request per page.
+        items_key (str): Key of the item list in each response.
+        prefetch (bool): Fetch the next page while the current one is consumed.
+    """
+
+    def __init__(self, fetch_page: Callable[[str | None, int], dict], limit: int | None = None,
+                 page_size: int = 250, items_key: str = 'items', prefetch: bool = True) -> None:
+        self.fetch_page = fetch_page
+        self.limit = limit
+        self.page_size = page_size
+        self.items_key = items_key
+        self.prefetch = prefetch
+        self.next_page_token = None # Set once iteration stops with more results available
+        self.pages_fetched = 0
+        self.last_response = None
+
+    def _request_size(self, received: int) -> int:
+        if self.limit is None:
+            return self.page_size
+        return min(self.page_size, self.limit - received)
+
+    def _fetch(self, page_token: str | None, page_size: int) -> dict:
+        response = self.fetch_page(page_token, page_size)
+        self.pages_fetched += 1
+        return response
+
+    def __iter__(self) -> Iterator[dict]:
+        received = 0
+        pending = None
+        response = self._fetch(None, self._request_size(0)) if self._request_size(0) > 0 else None
+        try:
+            while response is not None:
+                self.last_response = response
+                items = response.get(self.items_key, [])
+                received += len(items)
+                page_token = response.get('nextPageToken')
+
+                response = None
+                if page_token and self._request_size(received) > 0:
+                    if self.prefetch:
+                        # Run in a copy of the caller's context, so the page is fetched for the same account
+                        # and its google.http span nests under the caller's tool span
+                        pending = _prefetch_executor.submit(contextvars.copy_context().run, self._fetch, page_token,
+                                                            self._request_size(received))
+                    else:
+                        response = self._fetch(page_token, self._request_size(received))
+                else:
+                    self.next_page_token = page_token
+
+                yield from items
+
+                if pending is not None:
+                    response, pending = pending.result(), None
+        finally:
+            if pending is not None and not pending.cancel():
+                # Let an abandoned prefetch finish so the caller can safely reuse its service
+                pending.exception()
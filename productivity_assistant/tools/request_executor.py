@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from googleapiclient.errors import HttpError
+
+from productivity_assistant.models import ApiError
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limits and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Reasons Google gives with a 403 when a quota, not a permission, was exceeded
+QUOTA_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded', 'dailyLimitExceeded'}
+
+# Requests per second allowed to each API by default, kept under Google's per-user quotas
+# (Gmail allows 250 quota units per second, most requests cost 5; Calendar allows about 10 requests per second)
+DEFAULT_RATES = {'gmail': 40.0, 'calendar': 10.0}
+
+
+def error_status(error: Exception) -> int | None:
+    """The HTTP status of a failed request; None if it has no response (e.g. a BatchError)."""
+    resp = getattr(error, 'resp', None)
+    return resp.status if resp is not None else None
+
+
+def _error_reason(error: HttpError) -> str | None:
+    try:
+        details = json.loads(error.content.decode('utf-8'))['error']
+        return (details.get('errors') or [{}])[0].get('reason') or details.get('status')
+    except Exception:
+        return None
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Whether Google rejected a request because of a rate limit or quota."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error_status(error)
+    return status == 429 or (status == 403 and _error_reason(error) in QUOTA_REASONS)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request may succeed if sent again: rate limits, server errors and dropped connections."""
+    if isinstance(error, HttpError):
+        return error_status(error) in RETRYABLE_STATUS or is_quota_error(error)
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def api_error(error: Exception) -> ApiError:
+    """Describes a failed API call for the model, so it can tell a quota problem from a bad request."""
+    if isinstance(error, HttpError):
+        return ApiError(
+            status=error_status(error),
+            reason=_error_reason(error),
+            message=error.reason or str(error),
+            retryable=is_retryable(error),
+        )
+    return ApiError(status=None, reason=type(error).__name__, message=str(error), retryable=is_retryable(error))
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of up to `burst`; callers block until a token is free."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        tokens = min(tokens, self.burst) # A batch larger than the bucket still goes through, after the bucket fills up
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that grows while requests succeed and halves on quota errors (AIMD).
+
+    Each success adds 1/limit, so the limit grows by about one per round of
+    requests; each quota error halves it, down to `minimum`.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttled(self) -> None:
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class RequestExecutor:
+    """
+    Executes the Google API requests of one API under a shared rate limit.
+
+    Every request first takes a token from the API's TokenBucket and a slot of
+    its AdaptiveLimit, so concurrent tools together stay within quota. Requests
+    failing with a retryable error are retried up to `retries` times after an
+    exponential backoff with full jitter (or the server's Retry-After), which
+    keeps many clients from retrying in lockstep. Quota errors also shrink the
+    concurrency limit until requests succeed again. Errors that remain are
+    raised to the caller; `api_error` turns them into a result field.
+    """
+
+    def __init__(self, api_name: str, rate: float = 10.0, burst: float | None = None, max_concurrency: int = 8,
+                 retries: int = 4, base_delay: float = 0.5, max_delay: float = 16.0) -> None:
+        self.api_name = api_name
+        self.bucket = TokenBucket(rate, burst if burst is not None else rate)
+        self.limit = AdaptiveLimit(initial=max_concurrency, maximum=max_concurrency * 4)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retried = 0
+        self.throttled = 0
+
+    def backoff(self, attempt: int, error: Exception | None = None) -> float:
+        """Seconds to wait before retry number `attempt` (starting at 0)."""
+        if isinstance(error, HttpError) and error.resp is not None:
+            retry_after = error.resp.get('retry-after')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, cost: int = 1, idempotent: bool = True):
+        """
+        Calls `func()` (which sends `cost` API requests) with rate limiting and retries.
+
+        A request that is not idempotent (e.g. an insert) is only retried after a
+        quota error, since a server error leaves unknown whether it took effect.
+        """
+        should_retry = is_retryable if idempotent else is_quota_error
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire(cost)
+            try:
+                with self.limit.slot():
+                    result = func()
+            except Exception as e:
+                self.record_failure(e)
+                if attempt == self.retries or not should_retry(e):
+                    raise
+                self.retried += 1
+                delay = self.backoff(attempt, e)
+                logger.warning(f"{self.api_name} request failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                self.limit.on_success()
+                return result
+
+    def execute(self, request, idempotent: bool = True):
+        """Executes one googleapiclient HttpRequest."""
+        return self.call(request.execute, idempotent=idempotent)
+
+    def record_failure(self, error: Exception) -> None:
+        if is_quota_error(error):
+            self.throttled += 1
+            self.limit.on_throttled()
+
+    def stats(self) -> dict:
+        return {'concurrency_limit': round(self.limit.limit, 2), 'retried': self.retried, 'throttled': self.throttled}
+
+
+_executors: dict[str, RequestExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_request_executor(api_name: str) -> RequestExecutor:
+    """
+    The process-wide executor of an API, shared by every tool and service using it.
+
+    Its rate comes from GOOGLE_API_RATE_LIMITS (e.g. 'gmail=40,calendar=10',
+    in requests per second) or DEFAULT_RATES.
+    """
+    with _executors_lock:
+        executor = _executors.get(api_name)
+        if executor is None:
+            rates = dict(DEFAULT_RATES)
+            for item in os.getenv('GOOGLE_API_RATE_LIMITS', '').split(','):
+                if item.strip():
+                    name, _, rate = item.partition('=')
+                    rates[name.strip()] = float(rate)
+            executor = _executors[api_name] = RequestExecutor(api_name, rate=rates.get(api_name, 10.0))
+        return executor
+
+
+def executor_stats() -> dict:
+    with _executors_lock:
+        return {api_name: executor.stats() for api_name, executor in _executors.items()}
@@ -0,0 +1,67 @@
+import threading
+from contextlib import contextmanager
+
+
+class ServicePool:
+    """
+    Bounded pool of Google API service objects.
+
+    googleapiclient resources send requests through a single `httplib2.Http`,
+    which is not thread-safe, so each thread checks out its own service for the
+    duration of a call. Every pooled service keeps its own HTTP connection
+    alive between checkouts. At most `max_size` services are built; further
+    callers wait until one is returned. Services are built lazily, one at a
+    time, so a first-time OAuth flow never runs twice concurrently.
+    """
+
+    def __init__(self, factory, max_size: int = 8) -> None:
+        self._factory = factory
+        self.max_size = max_size
+        self._idle = [] # Most recently returned last, so warm connections are reused first
+        self._created = 0
+        self._cond = threading.Condition()
+        self._build_lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of services built and not closed, idle or checked out."""
+        return self._created
+
+    @contextmanager
+    def checkout(self):
+        """Borrow a service for the duration of a `with` block."""
+        service = self._acquire()
+        try:
+            yield service
+        finally:
+            self._release(service)
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._created >= self.max_size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            with self._build_lock:
+                return self._factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, service) -> None:
+        with self._cond:
+            self._idle.append(service)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Closes the HTTP connections of all idle services."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for service in idle:
+            service.close()
@@ -0,0 +1,102 @@
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+
+Interval = tuple[datetime, datetime]
+
+
+def parse_time_of_day(value: str) -> time:
+    """Parses 'HH:MM' (or 'HH:MM:SS') into a time."""
+    return time.fromisoformat(value)
+
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    """Sorts intervals and merges the ones that overlap or touch."""
+    merged: list[list[datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _working_windows(start: datetime, end: datetime, tz: tzinfo, day_start: time, day_end: time, include_weekends: bool):
+    """Yields the working-hours windows of each day between start and end, in chronological order, in UTC."""
+    day: date = start.astimezone(tz).date()
+    last_day = end.astimezone(tz).date()
+    while day <= last_day:
+        if include_weekends or day.weekday() < 5:
+            window_start = max(start, datetime.combine(day, day_start, tz))
+            window_end = min(end, datetime.combine(day, day_end, tz))
+            if window_start < window_end:
+                # Slot arithmetic is done in UTC, where adding a duration is exact across DST changes
+                yield window_start.astimezone(timezone.utc), window_end.astimezone(timezone.utc)
+        day += timedelta(days=1)
+
+
+def _round_up(moment: datetime, granularity: timedelta) -> datetime:
+    step = granularity.total_seconds()
+    remainder = moment.timestamp() % step
+    return moment + timedelta(seconds=step - remainder) if remainder else moment
+
+
+def find_free_slots(busy: list[Interval], start: datetime, end: datetime, duration: timedelta, tz: tzinfo,
+                    day_start: time = time(9), day_end: time = time(17), include_weekends: bool = False,
+                    granularity: timedelta = timedelta(minutes=15)) -> list[tuple[datetime, datetime, datetime]]:
+    """
+    Finds the free gaps between busy intervals that can hold a meeting of `duration`.
+
+    Busy intervals of all attendees are merged, then one sweep over the
+    working-hours windows (in `tz`) between `start` and `end` collects the gaps.
+    Each gap yields one candidate starting at its beginning, rounded up to
+    `granularity`.
+
+    Args:
+        busy (list): (start, end) busy intervals of every attendee, in any order, possibly overlapping.
+        start (datetime): Beginning of the searched range (timezone-aware).
+        end (datetime): End of the searched range (timezone-aware).
+        duration (timedelta): Minimum length of a slot.
+        tz (tzinfo): Time zone in which working hours and days apply.
+        day_start (time): Start of working hours.
+        day_end (time): End of working hours.
+        include_weekends (bool): Whether Saturdays and Sundays are searched.
+        granularity (timedelta): Slots start on multiples of this.
+
+    Returns:
+        list: (slot_start, slot_end, free_until) tuples in chronological order,
+        where free_until is the end of the gap the slot sits in.
+    """
+    merged = merge_intervals(busy)
+    slots = []
+    first_busy = 0
+    for window_start, window_end in _working_windows(start, end, tz, day_start, day_end, include_weekends):
+        # Busy intervals that ended before this window can never matter again
+        while first_busy < len(merged) and merged[first_busy][1] <= window_start:
+            first_busy += 1
+
+        cursor = window_start
+        index = first_busy
+        while cursor < window_end:
+            if index < len(merged) and merged[index][0] < window_end:
+                gap_end, next_cursor = merged[index]
+                index += 1
+            else:
+                gap_end, next_cursor = window_end, window_end
+
+            gap_end = min(gap_end, window_end)
+            slot_start = _round_up(cursor, granularity)
+            if slot_start + duration <= gap_end:
+                slots.append((slot_start, slot_start + duration, gap_end))
+            cursor = max(cursor, next_cursor)
+    return slots
+
+
+def rank_slots(slots: list[tuple[datetime, datetime, datetime]], buffer: timedelta = timedelta(minutes=15)):
+    """
+    Orders candidate slots by preference.
+
+    Slots whose gap leaves at least `buffer` free after the meeting come first,
+    so meetings are not booked back to back with the next commitment; within
+    each group, earlier slots come first.
+    """
+    return sorted(slots, key=lambda slot: (slot[2] - slot[1] < buffer, slot[0]))
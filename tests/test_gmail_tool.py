@@ -0,0 +1,71 @@
+import json
+
+from googleapiclient.http import HttpMockSequence
+
+from productivity_assistant.tools.gmail_tool import GmailTool
+from productivity_assistant.tools.google_api_service import build_service
+from productivity_assistant.tools.request_executor import RequestExecutor
+
+BOUNDARY = 'batch_test'
+
+
+def _message(message_id: str, subject: str) -> dict:
+    return {
+        'id': message_id,
+        'threadId': f't-{message_id}',
+        'snippet': f'Snippet of {subject}',
+        'payload': {'headers': [
+            {'name': 'Subject', 'value': subject},
+            {'name': 'From', 'value': 'Alice <alice@example.com>'},
+            {'name': 'Date', 'value': 'Mon, 1 Dec 2025 09:00:00 +0000'},
+        ]},
+    }
+
+
+def _json_response(payload: dict) -> tuple[dict, str]:
+    return {'status': '200', 'content-type': 'application/json'}, json.dumps(payload)
+
+
+def _batch_response(parts: list[tuple[str, int, dict]]) -> tuple[dict, str]:
+    """A multipart batch response with one (request_id, status, payload) part per request."""
+    body = ''.join(
+        f'--{BOUNDARY}\r\nContent-Type: application/http\r\nContent-ID: <response-test + {request_id}>\r\n\r\n'
+        f'HTTP/1.1 {status} Status\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n'
+        for request_id, status, payload in parts
+    )
+    return {'status': '200', 'content-type': f'multipart/mixed; boundary={BOUNDARY}'}, body + f'--{BOUNDARY}--'
+
+
+def test_list_messages_fetches_metadata_in_batches():
+    not_found = {'error': {'code': 404, 'message': 'Not Found', 'errors': [{'reason': 'notFound'}]}}
+    throttled = {'error': {'code': 429, 'message': 'Too many requests', 'errors': [{'reason': 'rateLimitExceeded'}]}}
+    http = HttpMockSequence([
+        _json_response({'messages': [{'id': 'm1'}, {'id': 'm2'}, {'id': 'm3'}]}),
+        # One batch for all three messages: m2 no longer exists and m3 is throttled
+        _batch_response([('0', 200, _message('m1', 'Budget')), ('1', 404, not_found), ('2', 429, throttled)]),
+        # The follow-up batch carries only the throttled request
+        _batch_response([('2', 200, _message('m3', 'Roadmap'))]),
+    ])
+    tool = GmailTool('client_secret.json', lambda *args, **kwargs: build_service('gmail', 'v1', http=http))
+    tool._requests = RequestExecutor('gmail', rate=1000, base_delay=0.001)
+
+    result = tool.list_messages(max_results=3)
+
+    assert result.error is None
+    assert [message.id for message in result.messages] == ['m1', 'm3']
+    assert [message.subject for message in result.messages] == ['Budget', 'Roadmap']
+    assert result.messages[0].body == 'Snippet of Budget'
+    assert tool._requests.throttled == 1
+    assert not http._iterable # Exactly one list and two batch round trips
+
+
+def test_list_messages_reports_api_errors():
+    http = HttpMockSequence([({'status': '403'}, json.dumps({'error': {'code': 403, 'message': 'Forbidden', 'errors': [{'reason': 'forbidden'}]}}))])
+    tool = GmailTool('client_secret.json', lambda *args, **kwargs: build_service('gmail', 'v1', http=http))
+
+    result = tool.list_messages(max_results=3)
+
+    assert result.count == 0
+    assert result.error.status == 403
+    assert result.error.reason == 'forbidden'
+    assert not result.error.retryable
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+from productivity_assistant.history import ConversationHistory
+
+
+def _turn(history: ConversationHistory, request: str, tool: str, result: str, answer: str):
+    """Run one user turn that makes a single tool call and then answers."""
+    tool_use_id = f"tu-{len(history.messages)}"
+    history.start_turn(request)
+    history.add_assistant([{"type": "tool_use", "id": tool_use_id, "name": tool, "input": {}}])
+    history.add_tool_results([{"type": "tool_result", "tool_use_id": tool_use_id, "content": result}])
+    history.add_assistant([{"type": "text", "text": answer}])
+
+
+def test_turn_messages_alternate_roles():
+    history = ConversationHistory()
+    _turn(history, "What's on today?", "list-calendar-events", "[]", "Nothing today.")
+    assert [message["role"] for message in history.messages] == ["user", "assistant", "user", "assistant"]
+    assert history.messages[0]["content"] == "What's on today?"
+
+
+def test_tool_results_of_finished_turns_are_shrunk_to_a_preview():
+    history = ConversationHistory(tool_result_preview=10)
+    _turn(history, "List my mail", "list-messages", "x" * 50, "You have mail.")
+    current = history.messages[2]["content"][0]
+    assert current["content"] == "x" * 50
+
+    history.start_turn("Thanks")
+    assert current["content"].startswith("x" * 10 + "… [40 more characters omitted; call list-messages again")
+    assert current["_shrunk"]
+
+
+def test_short_tool_results_are_kept_whole():
+    history = ConversationHistory(tool_result_preview=10)
+    _turn(history, "List my mail", "list-messages", "short", "One message.")
+    history.start_turn("Thanks")
+    assert history.messages[2]["content"][0]["content"] == "short"
+
+
+def test_oldest_turns_are_compacted_into_the_summary():
+    history = ConversationHistory(token_budget=150, keep_recent_turns=2)
+    for index in range(4):
+        _turn(history, f"Request {index}", "list-calendar-events", "e" * 200, f"Answer {index}")
+    history.start_turn("Request 4")
+
+    # Compaction stops at the two most recent turns even though they are still over budget
+    assert history._turn_starts == [0, 4]
+    assert [message["content"] for message in history.messages[::4]] == ["Request 3", "Request 4"]
+    assert history.summary == [
+        f"- User: Request {index} | Tools: list-calendar-events | Assistant: Answer {index}" for index in range(3)]
+
+
+def test_recent_turns_are_kept_even_over_budget():
+    history = ConversationHistory(token_budget=1, keep_recent_turns=2)
+    _turn(history, "Request 0", "list-messages", "m" * 100, "Answer 0")
+    _turn(history, "Request 1", "list-messages", "m" * 100, "Answer 1")
+    history.start_turn("Request 2")
+    assert history.messages[0]["content"] == "Request 1"
+    assert len(history.summary) == 1
+
+
+def test_summary_is_capped():
+    history = ConversationHistory(token_budget=1, keep_recent_turns=1, max_summary_lines=2)
+    for index in range(5):
+        history.start_turn(f"Request {index}")
+        history.add_assistant([{"type": "text", "text": f"Answer {index}"}])
+    assert [line.split(" | ")[0] for line in history.summary] == ["- User: Request 2", "- User: Request 3"]
+
+
+def test_system_prompt_carries_the_summary():
+    history = ConversationHistory()
+    assert history.system_prompt("2025-12-01") == "Current date is 2025-12-01."
+    history.summary.append("- User: hi | Assistant: hello")
+    assert history.system_prompt("2025-12-01").endswith(
+        "Summary of the earlier conversation:\n- User: hi | Assistant: hello")
+
+
+def test_for_request_drops_bookkeeping_fields():
+    history = ConversationHistory()
+    _turn(history, "List my mail", "list-messages", "[]", "No mail.")
+    history.start_turn("Thanks")
+    messages = history.for_request()
+    assert messages[2]["content"] == [{"type": "tool_result", "tool_use_id": "tu-0", "content": "[]"}]
+    assert messages[-1] == {"role": "user", "content": "Thanks"}
+    assert history.messages[2]["content"][0]["_shrunk"]
+
+
+def test_usage_is_summed_per_turn():
+    history = ConversationHistory()
+    history.start_turn("Hi")
+    for _ in range(2):
+        history.record_usage(SimpleNamespace(input_tokens=100, output_tokens=20,
+                                             cache_creation_input_tokens=None, cache_read_input_tokens=50))
+    turn = history.end_turn()
+    assert (turn.requests, turn.input_tokens, turn.output_tokens) == (2, 200, 40)
+    assert (turn.cache_creation_input_tokens, turn.cache_read_input_tokens) == (0, 100)
+    assert turn.history_tokens == history.estimate_tokens()
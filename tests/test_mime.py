@@ -0,0 +1,57 @@
+import base64
+
+from productivity_assistant.tools.mime import extract_body, html_to_text
+
+
+def _part(mime_type: str, text: str, charset: str = 'utf-8', **extra) -> dict:
+    data = base64.urlsafe_b64encode(text.encode(charset)).decode().rstrip('=')
+    headers = [{'name': 'Content-Type', 'value': f'{mime_type}; charset="{charset}"'}]
+    return {'mimeType': mime_type, 'headers': headers, 'body': {'data': data}, **extra}
+
+
+def _multipart(subtype: str, *parts: dict) -> dict:
+    return {'mimeType': f'multipart/{subtype}', 'body': {'size': 0}, 'parts': list(parts)}
+
+
+def test_single_part_plain_body():
+    assert extract_body(_part('text/plain', 'Hello Bob')) == 'Hello Bob'
+
+
+def test_nested_multipart_prefers_plain_text():
+    payload = _multipart(
+        'mixed',
+        _multipart('alternative', _part('text/plain', 'Agenda attached'), _part('text/html', '<p>Agenda <b>attached</b></p>')),
+        _part('application/pdf', 'not text', filename='agenda.pdf'),
+    )
+    assert extract_body(payload) == 'Agenda attached'
+
+
+def test_html_only_body_is_converted_to_text():
+    html = ('<html><head><title>Ignored</title><style>p { color: red }</style></head>'
+            '<body><p>Hi&nbsp;Bob,</p><script>track()</script><ul><li>One</li><li>Two &amp; three</li></ul></body></html>')
+    payload = _multipart('related', _multipart('alternative', _part('text/html', html)))
+    assert extract_body(payload) == 'Hi Bob,\n\nOne\n\nTwo & three'
+
+
+def test_attachments_and_external_parts_are_skipped():
+    payload = _multipart(
+        'mixed',
+        _part('text/plain', 'notes', filename='notes.txt'),
+        {'mimeType': 'text/plain', 'body': {'attachmentId': 'a1', 'size': 10}},
+    )
+    assert extract_body(payload) is None
+
+
+def test_part_charset_is_used_to_decode():
+    payload = _multipart('mixed', _part('text/plain', 'Grüße aus Köln', charset='iso-8859-1'))
+    assert extract_body(payload) == 'Grüße aus Köln'
+
+
+def test_unknown_charset_falls_back_to_utf8():
+    part = _part('text/plain', 'Café')
+    part['headers'][0]['value'] = 'text/plain; charset=x-unknown'
+    assert extract_body(part) == 'Café'
+
+
+def test_html_to_text_collapses_whitespace_and_blank_lines():
+    assert html_to_text('<div>  a \t b </div><br><br><br><br><p>c</p>') == 'a b\n\nc'
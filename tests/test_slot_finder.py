@@ -0,0 +1,79 @@
+from datetime import datetime, time, timedelta, timezone
+
+from productivity_assistant.tools.slot_finder import find_free_slots, merge_intervals, parse_time_of_day, rank_slots
+
+UTC = timezone.utc
+HOUR = timedelta(hours=1)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """A moment in December 2025, whose 1st is a Monday."""
+    return datetime(2025, 12, day, hour, minute, tzinfo=UTC)
+
+
+def test_parse_time_of_day():
+    assert parse_time_of_day('09:30') == time(9, 30)
+    assert parse_time_of_day('17:00:15') == time(17, 0, 15)
+
+
+def test_merge_intervals_joins_overlapping_and_touching_intervals():
+    intervals = [(at(1, 13), at(1, 14)), (at(1, 9), at(1, 10)), (at(1, 9, 30), at(1, 11)), (at(1, 11), at(1, 12))]
+    assert merge_intervals(intervals) == [(at(1, 9), at(1, 12)), (at(1, 13), at(1, 14))]
+
+
+def test_merge_intervals_keeps_contained_interval_inside():
+    assert merge_intervals([(at(1, 9), at(1, 17)), (at(1, 10), at(1, 11))]) == [(at(1, 9), at(1, 17))]
+
+
+def test_free_slots_fill_the_gaps_between_busy_intervals():
+    busy = [(at(1, 10), at(1, 11)), (at(1, 9), at(1, 9, 30)), (at(1, 10, 30), at(1, 12)), (at(1, 15), at(1, 18))]
+    slots = find_free_slots(busy, at(1, 0), at(2, 0), HOUR, UTC)
+    assert slots == [(at(1, 12), at(1, 13), at(1, 15))]
+
+
+def test_free_slots_skip_gaps_shorter_than_the_duration():
+    busy = [(at(1, 9, 45), at(1, 16, 30))]
+    assert find_free_slots(busy, at(1, 0), at(2, 0), HOUR, UTC) == []
+    assert find_free_slots(busy, at(1, 0), at(2, 0), timedelta(minutes=30), UTC) == [
+        (at(1, 9), at(1, 9, 30), at(1, 9, 45)),
+        (at(1, 16, 30), at(1, 17), at(1, 17)),
+    ]
+
+
+def test_free_slots_respect_working_hours_and_the_searched_range():
+    slots = find_free_slots([], at(1, 16), at(2, 11), HOUR, UTC, day_start=time(8), day_end=time(18))
+    assert slots == [
+        (at(1, 16), at(1, 17), at(1, 18)),
+        (at(2, 8), at(2, 9), at(2, 11)),
+    ]
+
+
+def test_free_slots_skip_weekends_unless_included():
+    saturday, monday = at(6, 0), at(8, 0)
+    assert find_free_slots([], saturday, monday, HOUR, UTC) == []
+    assert [slot[0] for slot in find_free_slots([], saturday, monday, HOUR, UTC, include_weekends=True)] == [
+        at(6, 9), at(7, 9)]
+
+
+def test_free_slots_start_on_the_granularity():
+    busy = [(at(1, 9), at(1, 10, 5))]
+    slots = find_free_slots(busy, at(1, 0), at(2, 0), HOUR, UTC)
+    assert slots[0] == (at(1, 10, 15), at(1, 11, 15), at(1, 17))
+    slots = find_free_slots(busy, at(1, 0), at(2, 0), HOUR, UTC, granularity=timedelta(minutes=30))
+    assert slots[0][0] == at(1, 10, 30)
+
+
+def test_working_hours_apply_in_the_given_time_zone():
+    tz = timezone(timedelta(hours=-5))
+    slots = find_free_slots([], at(1, 0), at(2, 0), HOUR, tz)
+    assert slots == [(at(1, 14), at(1, 15), at(1, 22))]
+
+
+def test_rank_slots_prefers_slots_with_a_buffer_after_them():
+    back_to_back = (at(1, 9), at(1, 10), at(1, 10))
+    short_buffer = (at(1, 11), at(1, 12), at(1, 12, 10))
+    buffered = (at(1, 14), at(1, 15), at(1, 16))
+    later_buffered = (at(1, 16), at(1, 17), at(1, 17, 15))
+    ranked = rank_slots([later_buffered, back_to_back, buffered, short_buffer])
+    assert ranked == [buffered, later_buffered, back_to_back, short_buffer]
+    assert rank_slots([back_to_back, short_buffer], buffer=timedelta(0)) == [back_to_back, short_buffer]
@@ -0,0 +1,166 @@
+import asyncio
+
+from productivity_assistant.tool_cache import ToolCache, parse_ttls
+
+SERVER = 'calendar'
+
+
+class Loader:
+    """A tool call that counts how often it runs and can be held until released."""
+
+    def __init__(self, result='events'):
+        self.result = result
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.result
+
+
+def test_second_call_is_a_hit():
+    async def scenario():
+        cache = ToolCache()
+        load = Loader()
+        first = await cache.call('list-calendar-events', SERVER, {'max_results': 10}, load)
+        second = await cache.call('list-calendar-events', SERVER, {'max_results': 10}, load)
+        return first, second, load.calls, cache.stats()
+
+    first, second, calls, stats = asyncio.run(scenario())
+    assert first == ('events', 'miss')
+    assert second == ('events', 'hit')
+    assert calls == 1
+    assert stats['tools']['list-calendar-events']['hit_rate'] == 0.5
+
+
+def test_concurrent_identical_calls_are_coalesced():
+    async def scenario():
+        cache = ToolCache()
+        load = Loader()
+        load.release.clear()
+        calls = [asyncio.ensure_future(cache.call('list-messages', 'gmail', {'query': 'is:unread'}, load))
+                 for _ in range(3)]
+        await asyncio.sleep(0)
+        load.release.set()
+        return await asyncio.gather(*calls), load.calls
+
+    results, calls = asyncio.run(scenario())
+    assert calls == 1
+    assert sorted(outcome for _, outcome in results) == ['coalesced', 'coalesced', 'miss']
+    assert all(result == 'events' for result, _ in results)
+
+
+def test_call_is_cancelled_once_every_waiter_gives_up():
+    async def scenario():
+        cache = ToolCache()
+        load = Loader()
+        load.release.clear()
+        calls = [cache.call('list-messages', 'gmail', {}, load) for _ in range(2)]
+        outcomes = await asyncio.gather(*(asyncio.wait_for(call, 0.01) for call in calls), return_exceptions=True)
+        await asyncio.sleep(0)
+        return outcomes, load, cache
+
+    outcomes, load, cache = asyncio.run(scenario())
+    assert all(isinstance(outcome, asyncio.TimeoutError) for outcome in outcomes)
+    assert load.calls == 1
+    assert load.cancelled == 1
+    assert not cache._pending and not cache._waiters
+    assert not cache._entries
+
+
+def test_call_keeps_running_while_a_waiter_remains():
+    async def scenario():
+        cache = ToolCache()
+        load = Loader()
+        load.release.clear()
+        patient = asyncio.ensure_future(cache.call('list-messages', 'gmail', {}, load))
+        await asyncio.sleep(0)
+        impatient = await asyncio.gather(asyncio.wait_for(cache.call('list-messages', 'gmail', {}, load), 0.01),
+                                         return_exceptions=True)
+        load.release.set()
+        return impatient[0], await patient, load
+
+    impatient, patient, load = asyncio.run(scenario())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == ('events', 'miss')
+    assert load.cancelled == 0
+
+
+def test_write_tool_invalidates_its_server():
+    async def scenario():
+        cache = ToolCache()
+        events, messages = Loader('events'), Loader('messages')
+        await cache.call('list-calendar-events', SERVER, {}, events)
+        await cache.call('list-messages', 'gmail', {}, messages)
+        written = await cache.call('create-calendar-event', SERVER, {'summary': 'Sync'}, Loader('created'))
+        after = await cache.call('list-calendar-events', SERVER, {}, events)
+        other = await cache.call('list-messages', 'gmail', {}, messages)
+        return written, after, other
+
+    written, after, other = asyncio.run(scenario())
+    assert written == ('created', 'write')
+    assert after == ('events', 'miss')
+    assert other == ('messages', 'hit')
+
+
+def test_read_in_flight_during_a_write_is_not_stored():
+    async def scenario():
+        cache = ToolCache()
+        read = Loader('stale')
+        read.release.clear()
+        pending = asyncio.ensure_future(cache.call('list-calendar-events', SERVER, {}, read))
+        await asyncio.sleep(0)
+        await cache.call('delete-calendar-event', SERVER, {'event_id': 'e1'}, Loader('deleted'))
+        read.release.set()
+        stale = await pending
+        fresh = await cache.call('list-calendar-events', SERVER, {}, Loader('fresh'))
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale == ('stale', 'miss')
+    assert fresh == ('fresh', 'miss')
+
+
+def test_accounts_do_not_share_entries_or_invalidations():
+    async def scenario():
+        cache = ToolCache()
+        await cache.call('list-calendar-events', SERVER, {}, Loader('alice'), account='alice')
+        bob = await cache.call('list-calendar-events', SERVER, {}, Loader('bob'), account='bob')
+        await cache.call('create-calendar-event', SERVER, {}, Loader('created'), account='bob')
+        alice = await cache.call('list-calendar-events', SERVER, {}, Loader('unused'), account='alice')
+        return bob, alice
+
+    bob, alice = asyncio.run(scenario())
+    assert bob == ('bob', 'miss')
+    assert alice == ('alice', 'hit')
+
+
+def test_uncacheable_results_and_disabled_tools_are_not_stored():
+    async def scenario():
+        cache = ToolCache(ttls=parse_ttls('list-messages=0'))
+        load = Loader({'error': 'quota'})
+        failed = await cache.call('list-calendar-events', SERVER, {}, load, cacheable=lambda result: 'error' not in result)
+        disabled = await cache.call('list-messages', 'gmail', {}, load)
+        retried = await cache.call('list-calendar-events', SERVER, {}, load)
+        return failed[1], disabled[1], retried[1], load.calls
+
+    assert asyncio.run(scenario()) == ('miss', 'uncached', 'miss', 3)
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache = ToolCache(max_entries=2)
+        for day in ('mon', 'tue'):
+            await cache.call('list-calendar-events', SERVER, {'day': day}, Loader(day))
+        await cache.call('list-calendar-events', SERVER, {'day': 'mon'}, Loader('unused'))
+        await cache.call('list-calendar-events', SERVER, {'day': 'wed'}, Loader('wed'))
+        return [ToolCache.key('list-calendar-events', {'day': day}) in cache._entries for day in ('mon', 'tue', 'wed')]
+
+    assert asyncio.run(scenario()) == [True, False, True]